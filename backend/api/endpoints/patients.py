@@ -7,6 +7,7 @@ from ...api.dependencies import get_db
 from ...api.schemas.patient import PatientCreate, PatientResponse, PatientUpdate
 from ...utils.auth import get_current_active_user
 from ...models.user import User
+from ...services.symptom_service import normalize_symptoms
 
 router = APIRouter()
 
@@ -28,7 +29,11 @@ def create_patient(
     current_user: User = Depends(get_current_active_user)
 ):
     """创建新患者"""
-    db_patient = Patient(**patient_data.dict(), created_by=current_user.id)
+    patient_dict = patient_data.dict()
+    # 保留原始症状文本，标准化结果另存
+    patient_dict["raw_symptoms"] = patient_dict["symptoms"]
+    patient_dict["symptoms"] = normalize_symptoms(patient_dict["symptoms"])
+    db_patient = Patient(**patient_dict, created_by=current_user.id)
     db.add(db_patient)
     db.commit()
     db.refresh(db_patient)
@@ -59,7 +64,12 @@ def update_patient(
         raise HTTPException(status_code=404, detail="患者不存在")
     
     # 更新患者数据
-    for key, value in patient_data.dict(exclude_unset=True).items():
+    update_data = patient_data.dict(exclude_unset=True)
+    if "symptoms" in update_data:
+        # 原始症状与标准化症状一起更新（包括清空为[]），不保留旧的原始文本
+        update_data["raw_symptoms"] = update_data["symptoms"]
+        update_data["symptoms"] = normalize_symptoms(update_data["symptoms"] or [])
+    for key, value in update_data.items():
         setattr(patient, key, value)
     
     db.commit()
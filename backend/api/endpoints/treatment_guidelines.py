@@ -2,11 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 
-from ...models.treatment_guideline import TreatmentGuideline
 from ...api.dependencies import get_db
 from ...api.schemas.treatment_guideline import TreatmentGuidelineCreate, TreatmentGuidelineResponse, TreatmentGuidelineUpdate
 from ...utils.auth import get_current_active_user, get_current_doctor_user
 from ...models.user import User
+from ...services.guideline_service import guideline_service
 
 router = APIRouter()
 
@@ -18,8 +18,7 @@ def get_guidelines(
     current_user: User = Depends(get_current_active_user)
 ):
     """获取治疗指南列表"""
-    guidelines = db.query(TreatmentGuideline).offset(skip).limit(limit).all()
-    return guidelines
+    return guideline_service.list_guidelines(db, skip, limit)
 
 @router.post("/", response_model=TreatmentGuidelineResponse)
 def create_guideline(
@@ -28,11 +27,7 @@ def create_guideline(
     current_user: User = Depends(get_current_doctor_user)  # 仅医生可创建
 ):
     """创建新治疗指南"""
-    db_guideline = TreatmentGuideline(**guideline_data.dict(), created_by=current_user.id)
-    db.add(db_guideline)
-    db.commit()
-    db.refresh(db_guideline)
-    return db_guideline
+    return guideline_service.create_guideline(db, guideline_data.dict(), current_user.id)
 
 @router.get("/{condition_id}", response_model=TreatmentGuidelineResponse)
 def get_guideline(
@@ -41,7 +36,7 @@ def get_guideline(
     current_user: User = Depends(get_current_active_user)
 ):
     """获取特定治疗指南详情"""
-    guideline = db.query(TreatmentGuideline).filter(TreatmentGuideline.condition_id == condition_id).first()
+    guideline = guideline_service.get_guideline(db, condition_id)
     if guideline is None:
         raise HTTPException(status_code=404, detail="治疗指南不存在")
     return guideline
@@ -54,16 +49,9 @@ def update_guideline(
     current_user: User = Depends(get_current_doctor_user)  # 仅医生可更新
 ):
     """更新治疗指南"""
-    guideline = db.query(TreatmentGuideline).filter(TreatmentGuideline.condition_id == condition_id).first()
+    guideline = guideline_service.update_guideline(db, condition_id, guideline_data.dict(exclude_unset=True))
     if guideline is None:
         raise HTTPException(status_code=404, detail="治疗指南不存在")
-    
-    # 更新指南数据
-    for key, value in guideline_data.dict(exclude_unset=True).items():
-        setattr(guideline, key, value)
-    
-    db.commit()
-    db.refresh(guideline)
     return guideline
 
 @router.delete("/{condition_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -73,10 +61,6 @@ def delete_guideline(
     current_user: User = Depends(get_current_doctor_user)  # 仅医生可删除
 ):
     """删除治疗指南"""
-    guideline = db.query(TreatmentGuideline).filter(TreatmentGuideline.condition_id == condition_id).first()
-    if guideline is None:
+    if not guideline_service.delete_guideline(db, condition_id):
         raise HTTPException(status_code=404, detail="治疗指南不存在")
-    
-    db.delete(guideline)
-    db.commit()
     return None
@@ -30,6 +30,7 @@ class PatientUpdate(BaseModel):
 # 患者响应模式
 class PatientResponse(PatientBase):
     id: int
+    raw_symptoms: Optional[List[str]] = None
     user_id: int
     created_at: datetime
     updated_at: datetime
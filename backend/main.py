@@ -6,10 +6,12 @@ from .api.router import api_router
 from .api.dependencies import get_db
 from .config.settings import settings
 from .models.base import Base
-from .utils.database import engine
+from .utils.database import engine, get_db_session, upgrade_schema
+from .services.guideline_service import guideline_service
 
-# 创建数据库表
+# 创建数据库表，并为已有数据库补充新增的列
 Base.metadata.create_all(bind=engine)
+upgrade_schema()
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -29,6 +31,12 @@ app.add_middleware(
 # 包含API路由
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+def reconcile_guidelines():
+    """对齐治疗指南数据表和多智能体系统知识库（导入知识库内置指南）"""
+    with get_db_session() as db:
+        guideline_service.reconcile(db)
+
 @app.get("/")
 def read_root():
     return {"message": "欢迎使用唇腭裂多智能体系统API"}
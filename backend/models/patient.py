@@ -13,6 +13,7 @@ class Patient(Base):
     age = Column(String, nullable=False)
     gender = Column(String, nullable=False)
     symptoms = Column(ARRAY(String), nullable=False)
+    raw_symptoms = Column(ARRAY(String))  # 录入时的原始症状文本，symptoms为标准化后的名称
     medical_history = Column(Text)
     family_history = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
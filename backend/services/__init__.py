@@ -3,9 +3,13 @@
 """
 from .agent_service import analyze_patient_data
 from .pubmed_service import search_pubmed, get_pubmed_article
+from .symptom_service import normalize_symptoms
+from .guideline_service import guideline_service
 
 __all__ = [
     "analyze_patient_data",
     "search_pubmed",
-    "get_pubmed_article"
+    "get_pubmed_article",
+    "normalize_symptoms",
+    "guideline_service"
 ]
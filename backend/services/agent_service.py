@@ -5,11 +5,14 @@ from typing import List, Dict, Any, Optional
 import json
 import logging
 import os
+import re
 from datetime import datetime
 
 # 导入OpenAI API
 import openai
 from ..config.settings import settings
+from ..utils.database import get_db_session
+from .guideline_service import guideline_service
 
 # 配置OpenAI API密钥
 openai.api_key = settings.OPENAI_API_KEY
@@ -97,6 +100,15 @@ async def analyze_patient_data(
         # 解析响应
         result = json.loads(response.choices[0].message.content)
         
+        # 在治疗建议中附上诊断对应的治疗指南（经治疗指南服务的缓存读取，与/guidelines接口一致）
+        guideline = _lookup_guideline(result)
+        if guideline is not None:
+            recommendations = result.get("treatment_recommendations")
+            if not isinstance(recommendations, dict):
+                recommendations = {"summary": recommendations} if recommendations else {}
+            recommendations["guideline"] = guideline
+            result["treatment_recommendations"] = recommendations
+        
         # 记录分析结果
         logger.info(f"Patient analysis completed: {result['syndrome_type']}, {result.get('syndrome_name', 'N/A')}")
         
@@ -113,3 +125,48 @@ async def analyze_patient_data(
                 "error": "分析过程中发生错误，请稍后重试"
             }
         }
+
+
+def _guideline_condition_ids(result: Dict[str, Any]) -> List[str]:
+    """
+    根据分析结果推断候选的治疗指南条件ID
+
+    Args:
+        result: 分析结果，包含syndrome_type、syndrome_name和cleft_type
+
+    Returns:
+        List[str]: 候选条件ID，如["van_der_woude_syndrome"]或["non_syndromic_cleft_lip"]
+    """
+    if result.get("syndrome_type") == "syndromic" and result.get("syndrome_name"):
+        slug = re.sub(r"[^a-z0-9]+", "_", str(result["syndrome_name"]).lower()).strip("_")
+        if slug:
+            return [slug if slug.endswith("_syndrome") else f"{slug}_syndrome"]
+        return []
+    cleft_type = str(result.get("cleft_type", "")).lower()
+    condition_ids = []
+    if "唇" in cleft_type or "lip" in cleft_type or cleft_type.startswith("cl"):
+        condition_ids.append("non_syndromic_cleft_lip")
+    if "腭" in cleft_type or "palate" in cleft_type or cleft_type in ("cp", "clp"):
+        condition_ids.append("non_syndromic_cleft_palate")
+    return condition_ids
+
+
+def _lookup_guideline(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    查找分析结果对应的治疗指南，查询失败时返回None（不影响分析结果）
+
+    Args:
+        result: 分析结果
+
+    Returns:
+        Optional[Dict[str, Any]]: 知识库格式的治疗指南
+    """
+    condition_ids = _guideline_condition_ids(result)
+    if not condition_ids:
+        return None
+    try:
+        with get_db_session() as db:
+            return guideline_service.get_agent_guideline(db, condition_ids)
+    except Exception as e:
+        logger.warning(f"查询治疗指南失败: {str(e)}")
+        return None
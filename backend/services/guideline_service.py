@@ -0,0 +1,391 @@
+"""
+治疗指南服务模块，统一API和多智能体系统的治疗指南数据
+treatment_guidelines数据表是唯一的权威数据源：读取经过进程内缓存，写入后使缓存失效，
+并同步写入多智能体系统知识库的存储。后端的智能体分析通过get_agent_guideline与API共用同一缓存；
+独立运行的多智能体系统进程不访问数据表，通过知识库热加载获得同步后的指南。
+启动时执行一次reconcile：知识库中有而数据表中没有的指南（如知识库内置的默认指南）导入数据表，
+再把数据表的全部指南写回知识库，此后两边内容一致，只由数据表向知识库单向同步。
+"""
+from typing import Dict, Any, List, Optional
+import os
+import copy
+import time
+import logging
+import threading
+
+from sqlalchemy.orm import Session
+
+from ..models.treatment_guideline import TreatmentGuideline
+
+# 配置日志
+logger = logging.getLogger("guideline_service")
+
+try:
+    # 多智能体系统源码需要在PYTHONPATH中（docker-compose中挂载到/clp_src）
+    from clp_agents.knowledge_store import create_knowledge_store, DEFAULT_KNOWLEDGE_DIR
+    from clp_agents.guideline_timeline import parse_age_interval
+except ImportError:
+    create_knowledge_store = None
+    DEFAULT_KNOWLEDGE_DIR = None
+    parse_age_interval = None
+    logger.warning("未找到clp_agents包，治疗指南不会同步到多智能体系统知识库")
+
+# 数据表的分类字段，知识库格式的指南中同名保存，数据表写回知识库时一并保留
+CLASSIFICATION_FIELDS = ("cleft_type", "syndrome_type", "age_group")
+
+# 年龄组的月龄上限（不含），按指南最早步骤的起始月龄划分
+AGE_GROUPS = (("infant", 12), ("child", 144), ("adolescent", 216), ("adult", float("inf")))
+
+# 缓存有效期（秒）：本进程的写入立即失效，其他工作进程的写入最迟在有效期后可见
+CACHE_TTL = float(os.getenv("GUIDELINE_CACHE_TTL", "60"))
+
+
+def guideline_to_dict(guideline: TreatmentGuideline) -> Dict[str, Any]:
+    """
+    将治疗指南记录转换为字典（缓存中保存字典，不持有会话中的ORM对象）
+
+    Args:
+        guideline: 治疗指南记录
+
+    Returns:
+        Dict[str, Any]: 各列的值
+    """
+    return {column.name: getattr(guideline, column.name) for column in guideline.__table__.columns}
+
+
+def _infer_cleft_type(condition_id: str, guideline: Dict[str, Any]) -> str:
+    """
+    推断指南适用的裂型：先看condition_id，再看名称、描述和各步骤中提到的唇裂/腭裂
+
+    Args:
+        condition_id: 疾病或综合征ID
+        guideline: 知识库格式的治疗指南
+
+    Returns:
+        str: CL、CP或CLP（两者都提到或都未提到时为CLP）
+    """
+    if "cleft_lip_palate" in condition_id or "cleft_lip_and_palate" in condition_id:
+        return "CLP"
+    if "cleft_lip" in condition_id:
+        return "CL"
+    if "cleft_palate" in condition_id:
+        return "CP"
+    steps = guideline.get("timeline") or []
+    text = " ".join(
+        [guideline.get("name") or "", guideline.get("description") or ""] +
+        [str(step.get("treatment", "")) if isinstance(step, dict) else str(step) for step in steps]
+    ).lower()
+    lip = "唇裂" in text or "cleft lip" in text
+    palate = "腭裂" in text or "cleft palate" in text
+    if lip and not palate:
+        return "CL"
+    if palate and not lip:
+        return "CP"
+    return "CLP"
+
+
+def _infer_age_group(guideline: Dict[str, Any]) -> str:
+    """
+    按指南时间线中最早步骤的起始月龄推断年龄组，时间线为空或无法解析时为infant（指南从出生开始管理）
+
+    Args:
+        guideline: 知识库格式的治疗指南
+
+    Returns:
+        str: infant、child、adolescent或adult
+    """
+    starts = []
+    if parse_age_interval is not None:
+        for step in guideline.get("timeline") or []:
+            interval = parse_age_interval(step.get("age")) if isinstance(step, dict) else None
+            if interval is not None:
+                starts.append(interval[0])
+    start = min(starts) if starts else 0.0
+    return next(group for group, upper in AGE_GROUPS if start < upper)
+
+
+def from_agent_guideline(condition_id: str, guideline: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将知识库格式的治疗指南转换为数据表的列；分类字段优先使用指南中保存的值，
+    没有时从condition_id和指南内容推断
+
+    Args:
+        condition_id: 疾病或综合征ID（如non_syndromic_cleft_lip）
+        guideline: 知识库格式的治疗指南
+
+    Returns:
+        Dict[str, Any]: 数据表各列的值
+    """
+    return {
+        "condition_id": condition_id,
+        "title": guideline.get("name") or condition_id,
+        "description": guideline.get("description", ""),
+        "cleft_type": guideline.get("cleft_type") or _infer_cleft_type(condition_id, guideline),
+        "syndrome_type": guideline.get("syndrome_type") or (
+            "non-syndromic" if condition_id.startswith("non_syndromic") else "syndromic"
+        ),
+        "age_group": guideline.get("age_group") or _infer_age_group(guideline),
+        "treatment_steps": guideline.get("timeline", []),
+        "specialist_involvement": guideline.get("specialists", []),
+        "follow_up_protocol": guideline.get("follow_up", []),
+        "references": guideline.get("references", [])
+    }
+
+
+def to_agent_guideline(guideline: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将治疗指南转换为知识库使用的格式（name、description、timeline、follow_up、references，
+    以及数据表的分类字段）
+
+    Args:
+        guideline: 治疗指南字典
+
+    Returns:
+        Dict[str, Any]: 知识库格式的治疗指南
+    """
+    steps = guideline.get("treatment_steps") or []
+    if isinstance(steps, dict):
+        # {"3-6个月": "唇裂修复手术"} 形式的步骤转换为时间线
+        steps = [{"age": age, "treatment": treatment} for age, treatment in steps.items()]
+    return {
+        "name": guideline.get("title", ""),
+        "description": guideline.get("description", ""),
+        "timeline": steps,
+        "specialists": guideline.get("specialist_involvement") or [],
+        "follow_up": guideline.get("follow_up_protocol") or [],
+        "references": guideline.get("references") or [],
+        **{field: guideline[field] for field in CLASSIFICATION_FIELDS if guideline.get(field)}
+    }
+
+
+class GuidelineService:
+    """
+    治疗指南服务，数据表上的读穿透缓存
+
+    单条指南按condition_id缓存（包括不存在的结果），列表缓存整表；返回的都是缓存条目的副本，
+    调用方修改返回值不会影响缓存；
+    create/update/delete在提交后清空缓存并同步到知识库存储。
+    每次清空缓存时代数加一，查询开始后缓存被清空过的结果不再写入缓存，避免把旧数据保留整个有效期。
+    """
+    def __init__(self, ttl: float = CACHE_TTL, knowledge_dir: Optional[str] = None):
+        """
+        初始化服务
+
+        Args:
+            ttl: 缓存有效期（秒）
+            knowledge_dir: 多智能体系统知识库目录，默认读取CLP_KB_DIR环境变量
+        """
+        self.ttl = ttl
+        self.knowledge_dir = knowledge_dir or os.getenv("CLP_KB_DIR") or DEFAULT_KNOWLEDGE_DIR
+        self._lock = threading.Lock()
+        self._items: Dict[str, Any] = {}  # condition_id -> (过期时间, 指南字典或None)
+        self._all = None  # (过期时间, 全部指南字典列表)
+        self._generation = 0  # 缓存代数，每次清空时加一
+        self._store = None
+
+    def invalidate(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._items.clear()
+            self._all = None
+            self._generation += 1
+
+    def reconcile(self, db: Session) -> int:
+        """
+        对齐数据表和知识库存储：知识库中有而数据表中没有的指南导入数据表，再把数据表的全部指南写回知识库
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            int: 导入数据表的指南数
+        """
+        try:
+            store = self._knowledge_store()
+            if store is None:
+                return 0
+
+            existing = {condition_id for (condition_id,) in db.query(TreatmentGuideline.condition_id).all()}
+            seeded = 0
+            for condition_id, guideline in store.load("treatment_guidelines").items():
+                if condition_id not in existing:
+                    db.add(TreatmentGuideline(**from_agent_guideline(condition_id, guideline)))
+                    seeded += 1
+            db.commit()
+
+            guidelines = [guideline_to_dict(g) for g in db.query(TreatmentGuideline).all()]
+            with self._lock:
+                store.put_many("treatment_guidelines", [(g["condition_id"], to_agent_guideline(g)) for g in guidelines])
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"对齐治疗指南数据表和知识库失败: {str(e)}")
+            return 0
+        self.invalidate()
+        if seeded:
+            logger.info(f"从知识库导入了{seeded}条治疗指南")
+        return seeded
+
+    def list_guidelines(self, db: Session, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        获取治疗指南列表
+
+        Args:
+            db: 数据库会话
+            skip: 跳过的数量
+            limit: 返回的最大数量
+
+        Returns:
+            List[Dict[str, Any]]: 治疗指南列表（按ID排序）
+        """
+        cached = self._all
+        if cached is None or cached[0] < time.monotonic():
+            generation = self._generation
+            guidelines = [guideline_to_dict(g) for g in db.query(TreatmentGuideline).order_by(TreatmentGuideline.id).all()]
+            cached = (time.monotonic() + self.ttl, guidelines)
+            with self._lock:
+                if generation == self._generation:
+                    self._all = cached
+                    for guideline in guidelines:
+                        self._items[guideline["condition_id"]] = (cached[0], guideline)
+        return copy.deepcopy(cached[1][skip:skip + limit])
+
+    def get_guideline(self, db: Session, condition_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取特定治疗指南
+
+        Args:
+            db: 数据库会话
+            condition_id: 条件ID
+
+        Returns:
+            Optional[Dict[str, Any]]: 治疗指南，不存在时返回None
+        """
+        cached = self._items.get(condition_id)
+        if cached is not None and cached[0] >= time.monotonic():
+            return copy.deepcopy(cached[1])
+
+        generation = self._generation
+        guideline = db.query(TreatmentGuideline).filter(TreatmentGuideline.condition_id == condition_id).first()
+        guideline = guideline_to_dict(guideline) if guideline is not None else None
+        with self._lock:
+            if generation == self._generation:
+                self._items[condition_id] = (time.monotonic() + self.ttl, guideline)
+        return copy.deepcopy(guideline)
+
+    def get_agent_guideline(self, db: Session, condition_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        按候选condition_id依次查找治疗指南并转换为知识库格式，供后端的智能体分析使用（与API共用缓存）
+
+        Args:
+            db: 数据库会话
+            condition_ids: 候选条件ID，按优先级排列
+
+        Returns:
+            Optional[Dict[str, Any]]: 第一个存在的指南（知识库格式，含condition_id），都不存在时返回None
+        """
+        for condition_id in condition_ids:
+            guideline = self.get_guideline(db, condition_id)
+            if guideline is not None:
+                return dict(to_agent_guideline(guideline), condition_id=condition_id)
+        return None
+
+    def create_guideline(self, db: Session, data: Dict[str, Any], created_by: int) -> Dict[str, Any]:
+        """
+        创建治疗指南
+
+        Args:
+            db: 数据库会话
+            data: 指南数据
+            created_by: 创建者ID
+
+        Returns:
+            Dict[str, Any]: 创建的治疗指南
+        """
+        db_guideline = TreatmentGuideline(**data, created_by=created_by)
+        db.add(db_guideline)
+        db.commit()
+        db.refresh(db_guideline)
+        guideline = guideline_to_dict(db_guideline)
+        self.invalidate()
+        self._sync_knowledge_base(guideline["condition_id"], guideline)
+        return guideline
+
+    def update_guideline(self, db: Session, condition_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        更新治疗指南
+
+        Args:
+            db: 数据库会话
+            condition_id: 条件ID
+            data: 需要更新的字段
+
+        Returns:
+            Optional[Dict[str, Any]]: 更新后的治疗指南，不存在时返回None
+        """
+        db_guideline = db.query(TreatmentGuideline).filter(TreatmentGuideline.condition_id == condition_id).first()
+        if db_guideline is None:
+            return None
+
+        for key, value in data.items():
+            setattr(db_guideline, key, value)
+        db.commit()
+        db.refresh(db_guideline)
+        guideline = guideline_to_dict(db_guideline)
+        self.invalidate()
+        self._sync_knowledge_base(condition_id, guideline)
+        return guideline
+
+    def delete_guideline(self, db: Session, condition_id: str) -> bool:
+        """
+        删除治疗指南
+
+        Args:
+            db: 数据库会话
+            condition_id: 条件ID
+
+        Returns:
+            bool: 是否删除（不存在时为False）
+        """
+        db_guideline = db.query(TreatmentGuideline).filter(TreatmentGuideline.condition_id == condition_id).first()
+        if db_guideline is None:
+            return False
+
+        db.delete(db_guideline)
+        db.commit()
+        self.invalidate()
+        self._sync_knowledge_base(condition_id, None)
+        return True
+
+    def _knowledge_store(self):
+        """打开知识库存储（首次使用时），clp_agents包不可用时返回None"""
+        if create_knowledge_store is None:
+            return None
+        with self._lock:
+            if self._store is None:
+                os.makedirs(self.knowledge_dir, exist_ok=True)
+                self._store = create_knowledge_store(self.knowledge_dir)
+            return self._store
+
+    def _sync_knowledge_base(self, condition_id: str, guideline: Optional[Dict[str, Any]]) -> None:
+        """
+        将指南变更同步到知识库存储，知识库不可用时只记录警告（数据表仍是权威数据源）
+
+        Args:
+            condition_id: 条件ID
+            guideline: 指南字典，None表示删除
+        """
+        try:
+            store = self._knowledge_store()
+            if store is None:
+                return
+            with self._lock:
+                if guideline is None:
+                    store.delete("treatment_guidelines", condition_id)
+                else:
+                    store.put("treatment_guidelines", condition_id, to_agent_guideline(guideline))
+        except Exception as e:
+            logger.warning(f"同步治疗指南到知识库失败: {str(e)}")
+
+
+# 进程级治疗指南服务
+guideline_service = GuidelineService()
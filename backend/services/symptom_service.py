@@ -0,0 +1,40 @@
+"""
+症状标准化服务模块，复用多智能体系统的症状标准化器，使患者症状以标准名称入库
+"""
+from typing import List
+import os
+import logging
+
+# 配置日志
+logger = logging.getLogger("symptom_service")
+
+try:
+    # 多智能体系统源码需要在PYTHONPATH中（docker-compose中挂载到/clp_src）
+    from clp_agents.symptom_normalizer import normalize_symptoms as _normalize_symptoms
+    from clp_agents.kb_client import KnowledgeBaseClient
+except ImportError:
+    _normalize_symptoms = None
+    KnowledgeBaseClient = None
+    logger.warning("未找到clp_agents包，患者症状将不做标准化")
+
+# 设置了CLP_KB_SOCKET时使用共享知识库守护进程的标准化器（包含知识库中登记的症状）
+_kb_client = KnowledgeBaseClient(os.environ["CLP_KB_SOCKET"]) if KnowledgeBaseClient and os.environ.get("CLP_KB_SOCKET") else None
+
+def normalize_symptoms(symptoms: List[str]) -> List[str]:
+    """
+    将患者症状标准化为标准症状名称，无法解析的症状保留原文
+    
+    Args:
+        symptoms: 症状列表
+        
+    Returns:
+        List[str]: 标准化后的症状列表
+    """
+    if _normalize_symptoms is None:
+        return [symptom.strip() for symptom in symptoms if symptom.strip()]
+    if _kb_client is not None:
+        try:
+            return _kb_client.normalize_symptoms(symptoms)
+        except Exception as e:
+            logger.warning(f"知识库守护进程不可用，使用本地标准化器: {str(e)}")
+    return _normalize_symptoms(symptoms)
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
 from contextlib import contextmanager
@@ -15,6 +15,12 @@ engine = create_engine(
     echo=False           # 是否打印SQL语句
 )
 
+# 后来新增的列：表名 -> {列名: 已有行的初始值取自的列（None表示留空）}
+# create_all不会修改已存在的表，启动时由upgrade_schema补充
+ADDED_COLUMNS = {
+    "patients": {"raw_symptoms": "symptoms"}  # 已有患者的原始症状无法恢复，以当前症状填充
+}
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -38,6 +44,25 @@ def init_db():
     """初始化数据库"""
     from ..models.base import Base
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
+
+def upgrade_schema():
+    """为已有数据库补充ADDED_COLUMNS中登记的新增列，已存在的列跳过"""
+    from ..models.base import Base
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table_name, columns in ADDED_COLUMNS.items():
+            if not inspector.has_table(table_name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table_name)}
+            table = Base.metadata.tables[table_name]
+            for column_name, source in columns.items():
+                if column_name in existing:
+                    continue
+                column_type = table.c[column_name].type.compile(dialect=engine.dialect)
+                connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+                if source:
+                    connection.execute(text(f"UPDATE {table_name} SET {column_name} = {source} WHERE {column_name} IS NULL"))
 
 def backup_database(backup_path):
     """备份数据库"""
@@ -0,0 +1,100 @@
+"""
+合成患者入库工具，将多智能体系统生成的合成患者（或NDJSON文件中的患者）批量写入患者表，用于规模测试和压力测试
+"""
+from typing import Dict, Any, Iterable, Optional
+import sys
+import json
+import logging
+import argparse
+from itertools import islice
+
+from sqlalchemy.orm import Session
+
+from ..models.patient import Patient
+from .database import get_db_session
+
+# 配置日志
+logger = logging.getLogger("seed_patients")
+
+try:
+    # 多智能体系统源码需要在PYTHONPATH中（docker-compose中挂载到/clp_src）
+    from clp_agents.knowledge_base import KnowledgeBase
+    from clp_agents.patient_generator import PatientGenerator
+except ImportError:
+    KnowledgeBase = None
+    PatientGenerator = None
+
+# 患者表中的列
+PATIENT_COLUMNS = ("name", "age", "gender", "symptoms", "medical_history", "family_history")
+
+
+def seed_patients(db: Session, patients: Iterable[Dict[str, Any]], created_by: Optional[int] = None, batch_size: int = 5000) -> int:
+    """
+    分批写入患者，每批一次批量插入和提交，内存占用与总数无关
+
+    Args:
+        db: 数据库会话
+        patients: 患者数据（多余的字段如true_syndrome会被忽略）
+        created_by: 创建者ID
+        batch_size: 每批写入的患者数
+
+    Returns:
+        int: 写入的患者数
+    """
+    patients = iter(patients)
+    total = 0
+    while True:
+        batch = [
+            dict(
+                {column: patient.get(column) for column in PATIENT_COLUMNS},
+                raw_symptoms=patient.get("raw_symptoms", patient.get("symptoms")),
+                created_by=created_by
+            )
+            for patient in islice(patients, batch_size)
+        ]
+        if not batch:
+            return total
+        db.bulk_insert_mappings(Patient, batch)
+        db.commit()
+        total += len(batch)
+        logger.info(f"已写入{total}位合成患者")
+
+
+def _read_ndjson(path: str) -> Iterable[Dict[str, Any]]:
+    """逐行读取NDJSON患者文件，-表示标准输入"""
+    stream = sys.stdin if path == "-" else open(path, 'r', encoding='utf-8')
+    try:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def main() -> None:
+    """命令行入口：生成合成患者或读取NDJSON文件并写入患者表"""
+    parser = argparse.ArgumentParser(description="将合成患者写入患者表")
+    parser.add_argument("--input", default=None, help="NDJSON患者文件（-表示标准输入），未提供时直接生成")
+    parser.add_argument("-n", "--count", type=int, default=10000, help="直接生成时的患者数量")
+    parser.add_argument("--seed", type=int, default=0, help="直接生成时的随机种子")
+    parser.add_argument("--created-by", type=int, default=None, help="创建者用户ID")
+    parser.add_argument("--batch-size", type=int, default=5000, help="每批写入的患者数")
+    args = parser.parse_args()
+
+    if args.input:
+        patients = _read_ndjson(args.input)
+    else:
+        if PatientGenerator is None:
+            raise SystemExit("未找到clp_agents包，请通过--input提供NDJSON患者文件")
+        knowledge_base = KnowledgeBase()
+        patients = PatientGenerator.from_knowledge_base(knowledge_base, args.seed).generate(args.count)
+        knowledge_base.close()
+
+    with get_db_session() as db:
+        total = seed_patients(db, patients, args.created_by, args.batch_size)
+    print(f"已写入{total}位合成患者")
+
+
+if __name__ == "__main__":
+    main()
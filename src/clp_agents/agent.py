@@ -7,6 +7,9 @@ import os
 import json
 from typing import Dict, List, Optional, Any, Tuple
 
+from .patient_context import build_patient_context, format_patient_context
+from .symptom_normalizer import normalize_symptom, normalize_symptoms
+
 class Agent:
     """
     智能体基类，所有专科智能体都继承自此类
@@ -39,6 +42,9 @@ class Agent:
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         self.messages = []
         self.activation_conditions = []
+        self.context_fields = None  # 需要发送的患者字段，None表示FIELD_LABELS中登记的全部字段
+        self.symptom_categories = None  # 需要发送的症状类别，None表示全部症状
+        self.llm_client = None  # 语言模型客户端，未设置时返回模拟回复
         
     def add_message(self, role: str, content: str) -> None:
         """
@@ -63,6 +69,51 @@ class Agent:
         """
         self.activation_conditions.append(condition)
     
+    def set_context_profile(self, fields: Optional[List[str]] = None, symptom_categories: Optional[List[str]] = None) -> None:
+        """
+        声明智能体关注的患者字段和症状类别
+        
+        Args:
+            fields: 需要发送的患者字段，None表示FIELD_LABELS中登记的全部字段
+            symptom_categories: 需要发送的症状类别，None表示全部症状
+        """
+        self.context_fields = fields
+        self.symptom_categories = symptom_categories
+    
+    def build_patient_context(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        按智能体声明的字段和症状类别裁剪患者数据
+        
+        Args:
+            patient_data: 患者数据字典
+            
+        Returns:
+            Dict[str, Any]: 裁剪后的患者上下文
+        """
+        return build_patient_context(patient_data, self.context_fields, self.symptom_categories)
+    
+    def build_analysis_query(self, patient_data: Dict[str, Any]) -> str:
+        """
+        构建只包含相关患者信息的分析查询
+        
+        Args:
+            patient_data: 患者数据字典
+            
+        Returns:
+            str: 分析查询
+        """
+        context_str = format_patient_context(self.build_patient_context(patient_data))
+        context_str = "\n".join(f"        {line}" for line in context_str.splitlines())
+        
+        return f"""
+        请分析以下唇腭裂患者的情况，并提供详细的诊断和治疗建议：
+        
+        患者基本信息：
+{context_str}
+        
+        请根据您的专业领域，提供相关的分析和建议。
+        """
+    
     def check_activation(self, patient_data: Dict[str, Any]) -> bool:
         """
         检查是否满足激活条件
@@ -84,7 +135,8 @@ class Agent:
             if condition_type == "symptom_present":
                 # 检查特定症状是否存在
                 symptom = condition.get("symptom")
-                if symptom not in patient_data.get("symptoms", []):
+                canonical = normalize_symptom(symptom) or symptom
+                if canonical not in normalize_symptoms(patient_data.get("symptoms", [])):
                     return False
             
             elif condition_type == "syndrome_type":
@@ -131,8 +183,10 @@ class Agent:
         Returns:
             str: 语言模型的回复
         """
-        # 这里应该实现实际的API调用
-        # 简化实现，返回模拟回复
+        if self.llm_client is not None:
+            return await self.llm_client.chat(self.messages, self.model_info, self.temperature)
+        
+        # 未配置语言模型客户端时返回模拟回复
         return f"这是来自{self.role}的回复，基于{self.expertise}专业知识。"
     
     def to_dict(self) -> Dict[str, Any]:
@@ -148,7 +202,9 @@ class Agent:
             "description": self.description,
             "model_info": self.model_info,
             "temperature": self.temperature,
-            "activation_conditions": self.activation_conditions
+            "activation_conditions": self.activation_conditions,
+            "context_fields": self.context_fields,
+            "symptom_categories": self.symptom_categories
         }
     
     @classmethod
@@ -173,4 +229,6 @@ class Agent:
         for condition in data.get("activation_conditions", []):
             agent.add_activation_condition(condition)
         
+        agent.set_context_profile(data.get("context_fields"), data.get("symptom_categories"))
+        
         return agent
@@ -8,6 +8,8 @@ from typing import Dict, List, Optional, Any, Tuple
 import asyncio
 
 from .agent import Agent
+from .circuit_breaker import LLMUnavailableError
+from . import telemetry
 
 class AgentManager:
     """
@@ -18,7 +20,8 @@ class AgentManager:
         self,
         model_info: str = "gpt-4o",
         temperature: float = 0.5,
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        llm_client: Optional[Any] = None
     ):
         """
         初始化智能体管理器
@@ -27,6 +30,7 @@ class AgentManager:
             model_info: 使用的语言模型信息
             temperature: 生成文本的随机性参数
             api_key: API密钥（可选）
+            llm_client: 语言模型客户端（可选），未设置时返回模拟回复
         """
         self.model_info = model_info
         self.temperature = temperature
@@ -34,6 +38,7 @@ class AgentManager:
         self.agents = {}  # 存储所有注册的智能体
         self.active_agents = {}  # 当前激活的智能体
         self.messages = []  # 管理器的消息历史
+        self.llm_client = llm_client  # 管理器及未单独配置客户端的智能体共用
         
     def register_agent(self, agent_id: str, agent: Agent) -> None:
         """
@@ -44,6 +49,8 @@ class AgentManager:
             agent: 智能体实例
         """
         self.agents[agent_id] = agent
+        if agent.llm_client is None:
+            agent.llm_client = self.llm_client
         
     def unregister_agent(self, agent_id: str) -> None:
         """
@@ -154,8 +161,10 @@ class AgentManager:
         Returns:
             str: 语言模型的回复
         """
-        # 这里应该实现实际的API调用
-        # 简化实现，返回模拟回复
+        if self.llm_client is not None:
+            return await self.llm_client.chat(self.messages, self.model_info, self.temperature)
+        
+        # 未配置语言模型客户端时返回模拟回复
         return """
         {
             "syndrome_type": "syndromic",
@@ -216,7 +225,14 @@ class AgentManager:
         
         # 更新患者数据中的综合征类型
         patient_data["syndrome_type"] = analysis_result.get("syndrome_type", "unknown")
-        patient_data["possible_syndromes"] = analysis_result.get("possible_syndromes", [])
+        # 合并而不是覆盖：保留知识库检索（症状匹配、病史语义检索）已经给出的可能综合征
+        possible_syndromes = list(analysis_result.get("possible_syndromes", []))
+        known = {_syndrome_name(syndrome) for syndrome in possible_syndromes}
+        for syndrome in patient_data.get("possible_syndromes", []):
+            if _syndrome_name(syndrome) not in known:
+                possible_syndromes.append(syndrome)
+                known.add(_syndrome_name(syndrome))
+        patient_data["possible_syndromes"] = possible_syndromes
         
         # 获取需要激活的智能体列表
         agent_names = analysis_result.get("activated_agents", [])
@@ -230,12 +246,13 @@ class AgentManager:
         
         return activated_agent_ids
     
-    async def coordinate_analysis(self, query: str) -> Dict[str, Any]:
+    async def coordinate_analysis(self, query: str, patient_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         协调各智能体进行分析
         
         Args:
             query: 查询文本
+            patient_data: 患者数据字典（可选），提供时每个智能体只接收其声明的相关患者信息
             
         Returns:
             Dict[str, Any]: 综合分析结果
@@ -247,27 +264,35 @@ class AgentManager:
                 "results": {}
             }
         
-        # 收集各智能体的分析结果
-        analysis_results = {}
-        tasks = []
-        
-        for agent_id, agent in self.active_agents.items():
-            tasks.append(self._get_agent_analysis(agent_id, agent, query))
-        
-        # 并行执行所有智能体的分析
-        results = await asyncio.gather(*tasks)
-        
-        for agent_id, result in results:
-            analysis_results[agent_id] = result
-        
-        # 整合分析结果
-        integrated_result = await self._integrate_analysis_results(analysis_results, query)
+        with telemetry.consult_trace() as trace:
+            # 收集各智能体的分析结果
+            analysis_results = {}
+            tasks = []
+            
+            for agent_id, agent in self.active_agents.items():
+                agent_query = agent.build_analysis_query(patient_data) if patient_data is not None else query
+                tasks.append(self._get_agent_analysis(agent_id, agent, agent_query))
+            
+            # 并行执行所有智能体的分析，等待全部结束后再抛出服务不可用的错误，避免遗留未完成的调用
+            with telemetry.stage("specialists"):
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            
+            for agent_id, result in results:
+                analysis_results[agent_id] = result
+            
+            # 整合分析结果
+            with telemetry.stage("integration"):
+                integrated_result = await self._integrate_analysis_results(analysis_results, query)
         
         return {
             "status": "success",
             "message": "分析完成",
             "results": analysis_results,
-            "integrated_result": integrated_result
+            "integrated_result": integrated_result,
+            "trace": trace.to_dict()
         }
     
     async def _get_agent_analysis(self, agent_id: str, agent: Agent, query: str) -> Tuple[str, str]:
@@ -283,8 +308,12 @@ class AgentManager:
             Tuple[str, str]: 智能体ID和分析结果
         """
         try:
-            result = await agent.analyze(query)
+            with telemetry.stage(f"specialist:{agent_id}"):
+                result = await agent.analyze(query)
             return agent_id, result
+        except LLMUnavailableError:
+            # 语言模型服务不可用时由上层降级处理，不把错误当作分析结果
+            raise
         except Exception as e:
             return agent_id, f"分析过程中出错: {str(e)}"
     
@@ -340,8 +369,10 @@ class AgentManager:
         Returns:
             str: 语言模型的回复
         """
-        # 这里应该实现实际的API调用
-        # 简化实现，返回模拟回复
+        if self.llm_client is not None:
+            return await self.llm_client.chat(self.messages, self.model_info, self.temperature)
+        
+        # 未配置语言模型客户端时返回模拟回复
         return """
         # 最终诊断报告
         
@@ -424,3 +455,8 @@ class AgentManager:
                 manager.active_agents[agent_id] = manager.agents[agent_id]
         
         return manager
+
+
+def _syndrome_name(syndrome: Any) -> str:
+    """可能综合征条目的名称（条目为{"name": ..., "confidence": ...}或名称字符串）"""
+    return syndrome.get("name", "") if isinstance(syndrome, dict) else str(syndrome)
@@ -8,18 +8,22 @@ import asyncio
 from typing import Dict, List, Optional, Any, Tuple
 import aiohttp
 
+from .cassette import Cassette
+
 class ExternalAPIClient:
     """
     外部API客户端基类，提供与医学数据库和服务的集成
     """
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, cassette: Optional[Cassette] = None):
         """
         初始化API客户端
         
         Args:
             api_key: API密钥（可选）
+            cassette: 录制/回放cassette（可选）
         """
         self.api_key = api_key
+        self.cassette = cassette
         self.session = None
     
     async def __aenter__(self):
@@ -43,6 +47,29 @@ class ExternalAPIClient:
         if self.session:
             await self.session.close()
             self.session = None
+    
+    async def _get_json(self, url: str, params: Dict[str, Any], kind: str) -> Optional[Dict[str, Any]]:
+        """
+        发送GET请求并解析JSON响应，配置cassette时经由cassette录制或回放
+        
+        Args:
+            url: 请求URL
+            params: 查询参数
+            kind: 请求类别，用于区分cassette中的记录
+            
+        Returns:
+            Optional[Dict[str, Any]]: 响应数据，请求失败时返回None
+        """
+        async def send():
+            await self.ensure_session()
+            async with self.session.get(url, params=params) as response:
+                if response.status != 200:
+                    return None
+                return await response.json()
+        
+        if self.cassette:
+            return await self.cassette.call(kind, {"url": url, "params": params}, send)
+        return await send()
 
 
 class PubMedClient(ExternalAPIClient):
@@ -75,18 +102,16 @@ class PubMedClient(ExternalAPIClient):
         
         try:
             # 执行搜索请求
-            async with self.session.get(search_url, params=params) as response:
-                if response.status != 200:
-                    return []
-                
-                search_data = await response.json()
-                id_list = search_data.get("esearchresult", {}).get("idlist", [])
-                
-                if not id_list:
-                    return []
-                
-                # 获取文章详情
-                return await self.fetch_articles(id_list)
+            search_data = await self._get_json(search_url, params, "pubmed")
+            if search_data is None:
+                return []
+            id_list = search_data.get("esearchresult", {}).get("idlist", [])
+            
+            if not id_list:
+                return []
+            
+            # 获取文章详情
+            return await self.fetch_articles(id_list)
         except Exception as e:
             print(f"PubMed搜索失败: {str(e)}")
             return []
@@ -116,29 +141,27 @@ class PubMedClient(ExternalAPIClient):
         
         try:
             # 执行获取详情请求
-            async with self.session.get(fetch_url, params=params) as response:
-                if response.status != 200:
-                    return []
-                
-                data = await response.json()
-                result = data.get("result", {})
-                
-                # 解析文章详情
-                articles = []
-                for article_id in id_list:
-                    article_data = result.get(article_id, {})
-                    if article_data:
-                        articles.append({
-                            "id": article_id,
-                            "title": article_data.get("title", ""),
-                            "authors": [author.get("name", "") for author in article_data.get("authors", [])],
-                            "journal": article_data.get("fulljournalname", ""),
-                            "publication_date": article_data.get("pubdate", ""),
-                            "abstract": article_data.get("abstract", ""),
-                            "url": f"https://pubmed.ncbi.nlm.nih.gov/{article_id}/"
-                        })
-                
-                return articles
+            data = await self._get_json(fetch_url, params, "pubmed")
+            if data is None:
+                return []
+            result = data.get("result", {})
+            
+            # 解析文章详情
+            articles = []
+            for article_id in id_list:
+                article_data = result.get(article_id, {})
+                if article_data:
+                    articles.append({
+                        "id": article_id,
+                        "title": article_data.get("title", ""),
+                        "authors": [author.get("name", "") for author in article_data.get("authors", [])],
+                        "journal": article_data.get("fulljournalname", ""),
+                        "publication_date": article_data.get("pubdate", ""),
+                        "abstract": article_data.get("abstract", ""),
+                        "url": f"https://pubmed.ncbi.nlm.nih.gov/{article_id}/"
+                    })
+            
+            return articles
         except Exception as e:
             print(f"获取PubMed文章详情失败: {str(e)}")
             return []
@@ -174,18 +197,16 @@ class MedGenClient(ExternalAPIClient):
         
         try:
             # 执行搜索请求
-            async with self.session.get(search_url, params=params) as response:
-                if response.status != 200:
-                    return []
-                
-                search_data = await response.json()
-                id_list = search_data.get("esearchresult", {}).get("idlist", [])
-                
-                if not id_list:
-                    return []
-                
-                # 获取条件详情
-                return await self.fetch_conditions(id_list)
+            search_data = await self._get_json(search_url, params, "medgen")
+            if search_data is None:
+                return []
+            id_list = search_data.get("esearchresult", {}).get("idlist", [])
+            
+            if not id_list:
+                return []
+            
+            # 获取条件详情
+            return await self.fetch_conditions(id_list)
         except Exception as e:
             print(f"MedGen搜索失败: {str(e)}")
             return []
@@ -215,28 +236,26 @@ class MedGenClient(ExternalAPIClient):
         
         try:
             # 执行获取详情请求
-            async with self.session.get(fetch_url, params=params) as response:
-                if response.status != 200:
-                    return []
-                
-                data = await response.json()
-                result = data.get("result", {})
-                
-                # 解析条件详情
-                conditions = []
-                for condition_id in id_list:
-                    condition_data = result.get(condition_id, {})
-                    if condition_data:
-                        conditions.append({
-                            "id": condition_id,
-                            "name": condition_data.get("title", ""),
-                            "definition": condition_data.get("definition", ""),
-                            "synonyms": condition_data.get("synonyms", []),
-                            "concepts": condition_data.get("concepts", []),
-                            "url": f"https://www.ncbi.nlm.nih.gov/medgen/{condition_id}"
-                        })
-                
-                return conditions
+            data = await self._get_json(fetch_url, params, "medgen")
+            if data is None:
+                return []
+            result = data.get("result", {})
+            
+            # 解析条件详情
+            conditions = []
+            for condition_id in id_list:
+                condition_data = result.get(condition_id, {})
+                if condition_data:
+                    conditions.append({
+                        "id": condition_id,
+                        "name": condition_data.get("title", ""),
+                        "definition": condition_data.get("definition", ""),
+                        "synonyms": condition_data.get("synonyms", []),
+                        "concepts": condition_data.get("concepts", []),
+                        "url": f"https://www.ncbi.nlm.nih.gov/medgen/{condition_id}"
+                    })
+            
+            return conditions
         except Exception as e:
             print(f"获取MedGen条件详情失败: {str(e)}")
             return []
@@ -272,18 +291,16 @@ class ClinVarClient(ExternalAPIClient):
         
         try:
             # 执行搜索请求
-            async with self.session.get(search_url, params=params) as response:
-                if response.status != 200:
-                    return []
-                
-                search_data = await response.json()
-                id_list = search_data.get("esearchresult", {}).get("idlist", [])
-                
-                if not id_list:
-                    return []
-                
-                # 获取变异详情
-                return await self.fetch_variants(id_list)
+            search_data = await self._get_json(search_url, params, "clinvar")
+            if search_data is None:
+                return []
+            id_list = search_data.get("esearchresult", {}).get("idlist", [])
+            
+            if not id_list:
+                return []
+            
+            # 获取变异详情
+            return await self.fetch_variants(id_list)
         except Exception as e:
             print(f"ClinVar搜索失败: {str(e)}")
             return []
@@ -313,29 +330,31 @@ class ClinVarClient(ExternalAPIClient):
         
         try:
             # 执行获取详情请求
-            async with self.session.get(fetch_url, params=params) as response:
-                if response.status != 200:
-                    return []
-                
-                data = await response.json()
-                result = data.get("result", {})
-                
-                # 解析变异详情
-                variants = []
-                for variant_id in id_list:
-                    variant_data = result.get(variant_id, {})
-                    if variant_data:
-                        variants.append({
-                            "id": variant_id,
-                            "name": variant_data.get("title", ""),
-                            "gene": variant_data.get("gene", ""),
-                            "clinical_significance": variant_data.get("clinical_significance", ""),
-                            "condition": variant_data.get("condition", ""),
-                            "chromosome": variant_data.get("chromosome", ""),
-                            "url": f"https://www.ncbi.nlm.nih.gov/clinvar/variation/{variant_id}/"
-                        })
-                
-                return variants
+            data = await self._get_json(fetch_url, params, "clinvar")
+            if data is None:
+                return []
+            result = data.get("result", {})
+            
+            # 解析变异详情
+            variants = []
+            for variant_id in id_list:
+                variant_data = result.get(variant_id, {})
+                if variant_data:
+                    # esummary中基因为genes列表（[{"symbol": ...}]），临床意义在germline_classification中
+                    genes = variant_data.get("genes", [])
+                    variants.append({
+                        "id": variant_id,
+                        "name": variant_data.get("title", ""),
+                        "gene": ", ".join(gene.get("symbol", "") for gene in genes if isinstance(gene, dict)) or variant_data.get("gene", ""),
+                        "genes": genes,
+                        "clinical_significance": variant_data.get("clinical_significance", ""),
+                        "germline_classification": variant_data.get("germline_classification", {}),
+                        "condition": variant_data.get("condition", ""),
+                        "chromosome": variant_data.get("chromosome", ""),
+                        "url": f"https://www.ncbi.nlm.nih.gov/clinvar/variation/{variant_id}/"
+                    })
+            
+            return variants
         except Exception as e:
             print(f"获取ClinVar变异详情失败: {str(e)}")
             return []
@@ -345,23 +364,25 @@ class APIIntegration:
     """
     API集成管理器，统一管理各种外部API客户端
     """
-    def __init__(self, api_keys: Dict[str, str] = None):
+    def __init__(self, api_keys: Dict[str, str] = None, cassette: Optional[Cassette] = None):
         """
         初始化API集成管理器
         
         Args:
             api_keys: API密钥字典，键为API名称，值为密钥
+            cassette: 录制/回放cassette（可选），由所有客户端共享
         """
         self.api_keys = api_keys or {}
+        self.cassette = cassette
         self.pubmed_client = None
         self.medgen_client = None
         self.clinvar_client = None
     
     async def __aenter__(self):
         """异步上下文管理器入口"""
-        self.pubmed_client = PubMedClient(self.api_keys.get("pubmed"))
-        self.medgen_client = MedGenClient(self.api_keys.get("medgen"))
-        self.clinvar_client = ClinVarClient(self.api_keys.get("clinvar"))
+        self.pubmed_client = PubMedClient(self.api_keys.get("pubmed"), self.cassette)
+        self.medgen_client = MedGenClient(self.api_keys.get("medgen"), self.cassette)
+        self.clinvar_client = ClinVarClient(self.api_keys.get("clinvar"), self.cassette)
         
         await self.pubmed_client.__aenter__()
         await self.medgen_client.__aenter__()
@@ -399,7 +420,7 @@ class APIIntegration:
             List[Dict[str, Any]]: 搜索结果列表
         """
         if not self.pubmed_client:
-            self.pubmed_client = PubMedClient(self.api_keys.get("pubmed"))
+            self.pubmed_client = PubMedClient(self.api_keys.get("pubmed"), self.cassette)
             await self.pubmed_client.__aenter__()
         
         return await self.pubmed_client.search(query, max_results)
@@ -416,7 +437,7 @@ class APIIntegration:
             List[Dict[str, Any]]: 搜索结果列表
         """
         if not self.medgen_client:
-            self.medgen_client = MedGenClient(self.api_keys.get("medgen"))
+            self.medgen_client = MedGenClient(self.api_keys.get("medgen"), self.cassette)
             await self.medgen_client.__aenter__()
         
         return await self.medgen_client.search_condition(query, max_results)
@@ -433,7 +454,7 @@ class APIIntegration:
             List[Dict[str, Any]]: 搜索结果列表
         """
         if not self.clinvar_client:
-            self.clinvar_client = ClinVarClient(self.api_keys.get("clinvar"))
+            self.clinvar_client = ClinVarClient(self.api_keys.get("clinvar"), self.cassette)
             await self.clinvar_client.__aenter__()
         
         return await self.clinvar_client.search_variant(query, max_results)
@@ -0,0 +1,272 @@
+"""
+贝叶斯鉴别诊断排序组件：由患病率先验和症状出现频率计算各综合征的后验概率
+"""
+
+import re
+from typing import Dict, List, Optional, Any, Tuple, Iterable, Mapping
+
+import numpy as np
+
+from .syndrome_index import SyndromeIndex
+
+# 未标注频率的症状在该综合征中的默认出现频率
+DEFAULT_FEATURE_FREQUENCY = 0.5
+
+# 症状出现在未列出它的综合征中的概率（表型噪声、偶发表现）
+BACKGROUND_FREQUENCY = 0.01
+
+# 没有可解析患病率时使用的默认患病率
+DEFAULT_PREVALENCE = 1e-5
+
+# 综合征列出但患者未提及的症状按排除症状的权重折算（未提及可能只是未检查）
+UNOBSERVED_WEIGHT = 0.5
+
+# 频率描述 -> 出现频率（HPO频率术语及对应中文）
+FREQUENCY_TERMS = {
+    "obligate": 1.0, "必有": 1.0,
+    "very frequent": 0.9, "非常常见": 0.9,
+    "frequent": 0.55, "常见": 0.55,
+    "occasional": 0.17, "偶见": 0.17,
+    "very rare": 0.02, "罕见": 0.02,
+    "excluded": 0.0
+}
+
+_NUMBER = r"(\d+(?:,\d{3})*(?:\.\d+)?)"
+_FRACTION = re.compile(_NUMBER + r"\s*(?:/|:|in|per)\s*" + _NUMBER)
+_PERCENT = re.compile(_NUMBER + r"\s*%")
+
+
+def _number(text: str) -> float:
+    """解析带千位分隔符的数字"""
+    return float(text.replace(",", ""))
+
+
+def parse_prevalence(text: Any) -> Optional[float]:
+    """
+    将患病率文本解析为概率
+
+    支持"1/50,000"、"1:5000"、"1 in 10,000"、"2 per 100,000"、"0.5%"，
+    区间（如"1/35,000-1/100,000"）取两端的几何平均。
+
+    Args:
+        text: 患病率文本或数字
+
+    Returns:
+        Optional[float]: 患病率，无法解析时返回None
+    """
+    if isinstance(text, (int, float)) and not isinstance(text, bool):
+        return float(text) if 0 < text <= 1 else None
+    if not isinstance(text, str):
+        return None
+
+    values = [_number(a) / _number(b) for a, b in _FRACTION.findall(text.lower()) if _number(b) > 0]
+    if not values:
+        values = [_number(p) / 100 for p in _PERCENT.findall(text)]
+    values = [value for value in values if 0 < value <= 1]
+    if not values:
+        return None
+    return float(np.exp(np.mean(np.log(values))))
+
+
+def parse_frequency(value: Any) -> Optional[float]:
+    """
+    将症状出现频率解析为概率
+
+    Args:
+        value: 0到1之间的数字、百分比（如"80%"）、分数（如"7/10"）或频率描述（如"very frequent"）
+
+    Returns:
+        Optional[float]: 出现频率，无法解析时返回None
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value) if 0 <= value <= 1 else None
+    if not isinstance(value, str):
+        return None
+
+    text = value.strip().lower()
+    if text in FREQUENCY_TERMS:
+        return FREQUENCY_TERMS[text]
+    percent = _PERCENT.fullmatch(text)
+    if percent:
+        return min(_number(percent.group(1)) / 100, 1.0)
+    fraction = re.fullmatch(r"(\d+)\s*/\s*(\d+)", text)
+    if fraction and int(fraction.group(2)) > 0:
+        return min(int(fraction.group(1)) / int(fraction.group(2)), 1.0)
+    return None
+
+
+class BayesianRanker:
+    """
+    朴素贝叶斯鉴别诊断排序
+
+    log P(D|症状) = log P(D) + Σ已观察症状 log P(s|D) + Σ已排除症状 log(1 - P(s|D)) + 常数。
+    未列出症状s的综合征取P(s|D)=背景频率，因此打分拆成两部分：
+    所有综合征共享的背景项（只与症状个数有关，排序时抵消）和关联矩阵非零元上的对数似然比。
+    对数似然比按关联矩阵的CSR顺序编译成float32数组，一位患者的打分是一次聚合和一次带权bincount。
+    综合征列出而患者既未提及也未排除的症状按unobserved_weight折算为排除证据，
+    因此只匹配一个症状的综合征不会仅凭匹配度排在前面。
+    """
+    def __init__(
+        self,
+        index: SyndromeIndex,
+        log_priors: np.ndarray,
+        present_llr: np.ndarray,
+        absent_llr: np.ndarray,
+        unobserved_weight: float = UNOBSERVED_WEIGHT
+    ):
+        """
+        初始化排序器
+
+        Args:
+            index: 症状-综合征关联矩阵
+            log_priors: 各综合征的对数先验（float32）
+            present_llr: 与index.indices对齐的观察到症状时的对数似然比 log(f / 背景频率)
+            absent_llr: 与index.indices对齐的排除症状时的对数似然比 log((1 - f) / (1 - 背景频率))
+            unobserved_weight: 未提及症状相对排除症状的证据权重，0表示不计入
+        """
+        self.index = index
+        self.log_priors = log_priors
+        self.present_llr = present_llr
+        self.absent_llr = absent_llr
+        self.unobserved_weight = unobserved_weight
+        # 各综合征全部列出症状都被排除时的对数似然比之和
+        self.absent_totals = np.bincount(index.indices, weights=absent_llr, minlength=index.num_syndromes)
+
+    @classmethod
+    def build(
+        cls,
+        index: SyndromeIndex,
+        syndrome_data: Mapping[str, Dict[str, Any]],
+        canonicalize=None
+    ) -> 'BayesianRanker':
+        """
+        由关联矩阵和综合征数据编译先验和似然表
+
+        综合征信息中可选的symptom_frequencies字段（症状 -> 频率）给出各症状的出现频率，
+        未标注的症状使用DEFAULT_FEATURE_FREQUENCY；prevalence字段解析为先验，
+        无法解析时使用其他综合征患病率的中位数。
+
+        Args:
+            index: 症状-综合征关联矩阵
+            syndrome_data: 综合征ID -> 综合征信息
+            canonicalize: 症状名称 -> 关联矩阵中的症状名称（如标准化器），None表示原样使用
+
+        Returns:
+            BayesianRanker: 排序器
+        """
+        canonicalize = canonicalize or (lambda symptom: symptom)
+
+        prevalences = np.array(
+            [parse_prevalence(syndrome_data[s].get("prevalence")) or np.nan for s in index.syndrome_ids],
+            dtype=np.float64
+        )
+        known = prevalences[~np.isnan(prevalences)]
+        default = float(np.median(known)) if len(known) else DEFAULT_PREVALENCE
+        log_priors = np.log(np.where(np.isnan(prevalences), default, prevalences)).astype(np.float32)
+
+        # 各非零元对应的(症状, 综合征)出现频率；每行的列下标有序，标注过的条目用二分查找定位
+        frequencies = np.full(len(index.indices), DEFAULT_FEATURE_FREQUENCY, dtype=np.float64)
+        for column, syndrome_id in enumerate(index.syndrome_ids):
+            for symptom, value in (syndrome_data[syndrome_id].get("symptom_frequencies") or {}).items():
+                row = index.symptom_pos.get(canonicalize(symptom))
+                frequency = parse_frequency(value)
+                if row is None or frequency is None:
+                    continue
+                start, end = int(index.indptr[row]), int(index.indptr[row + 1])
+                position = start + int(np.searchsorted(index.indices[start:end], column))
+                if position < end and index.indices[position] == column:
+                    frequencies[position] = frequency
+
+        # 频率限制在(背景频率, 1)内，避免对数为无穷
+        frequencies = np.clip(frequencies, BACKGROUND_FREQUENCY, 1 - BACKGROUND_FREQUENCY)
+        present_llr = np.log(frequencies / BACKGROUND_FREQUENCY).astype(np.float32)
+        absent_llr = np.log((1 - frequencies) / (1 - BACKGROUND_FREQUENCY)).astype(np.float32)
+        return cls(index, log_priors, present_llr, absent_llr)
+
+    def _entry_positions(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        取出多行全部非零元在CSR数组中的位置
+
+        Args:
+            rows: 行号数组
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (非零元位置, 各非零元素所属的第几个输入行)
+        """
+        starts = self.index.indptr[rows]
+        lengths = self.index.indptr[rows + 1] - starts
+        total = int(lengths.sum())
+        owners = np.repeat(np.arange(len(rows)), lengths)
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return starts[owners] + offsets, owners
+
+    def log_scores(self, symptoms: Iterable[str], absent_symptoms: Iterable[str] = ()) -> np.ndarray:
+        """
+        计算各综合征的未归一化对数后验
+
+        Args:
+            symptoms: 已观察到的症状（关联矩阵中的症状名称）
+            absent_symptoms: 明确排除的症状
+
+        Returns:
+            np.ndarray: 各综合征的对数后验（相差一个所有综合征共享的常数）
+        """
+        present_rows = self.index.symptom_rows(symptoms)
+        absent_rows = np.setdiff1d(self.index.symptom_rows(absent_symptoms), present_rows)
+        rows = np.concatenate((present_rows, absent_rows))
+        positions, owners = self._entry_positions(rows)
+        is_present = owners < len(present_rows)
+
+        # 已观察症状取观察似然比；已排除症状取排除似然比；其余列出的症状取加权的排除似然比
+        weights = np.where(is_present, self.present_llr[positions], self.absent_llr[positions])
+        weights -= self.unobserved_weight * self.absent_llr[positions]
+        scores = self.log_priors + self.unobserved_weight * self.absent_totals
+        return scores + np.bincount(self.index.indices[positions], weights=weights, minlength=self.index.num_syndromes)
+
+    def posteriors(self, symptoms: Iterable[str], absent_symptoms: Iterable[str] = ()) -> np.ndarray:
+        """
+        计算各综合征的后验概率（在知识库收录的综合征范围内归一化）
+
+        Args:
+            symptoms: 已观察到的症状
+            absent_symptoms: 明确排除的症状
+
+        Returns:
+            np.ndarray: 各综合征的后验概率
+        """
+        scores = self.log_scores(symptoms, absent_symptoms)
+        if not len(scores):
+            return scores
+        scores = np.exp(scores - scores.max())
+        return scores / scores.sum()
+
+    def top_k(
+        self,
+        symptoms: Iterable[str],
+        absent_symptoms: Iterable[str] = (),
+        k: Optional[int] = 10
+    ) -> List[Tuple[str, float, float]]:
+        """
+        按后验概率选出前k个综合征
+
+        Args:
+            symptoms: 已观察到的症状
+            absent_symptoms: 明确排除的症状
+            k: 返回数量，None表示全部
+
+        Returns:
+            List[Tuple[str, float, float]]: (综合征ID, 后验概率, 对数后验)列表，按后验概率降序
+        """
+        scores = self.log_scores(symptoms, absent_symptoms)
+        if not len(scores):
+            return []
+        posteriors = np.exp(scores - scores.max())
+        posteriors /= posteriors.sum()
+
+        candidates = np.arange(len(scores))
+        if k is not None and 0 < k < len(scores):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        order = np.lexsort((candidates, -scores[candidates]))
+        if k is not None:
+            order = order[:k]
+        return [(self.index.syndrome_ids[i], float(posteriors[i]), float(scores[i])) for i in candidates[order]]
@@ -0,0 +1,115 @@
+"""
+知识库批量导入组件，解析NDJSON/CSV格式的综合征、治疗指南和基因关联数据流
+"""
+
+import csv
+import json
+from itertools import chain
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Tuple
+
+# 支持的记录类型
+SYNDROME = "syndrome"
+GUIDELINE = "guideline"
+GENE_LINK = "gene_link"
+RECORD_TYPES = (SYNDROME, GUIDELINE, GENE_LINK)
+
+# CSV中列表字段的分隔符
+LIST_SEPARATORS = (";", "|", "；")
+
+# 各记录类型中需要按列表解析的CSV列
+_LIST_COLUMNS = {
+    SYNDROME: ("symptoms", "genes", "references"),
+    GUIDELINE: ("follow_up", "references"),
+    GENE_LINK: ()
+}
+
+
+def split_list(value: Any) -> List[str]:
+    """
+    将CSV单元格解析为列表，支持分号、竖线分隔；已经是列表时原样返回
+
+    Args:
+        value: 单元格内容
+
+    Returns:
+        List[str]: 去除空白后的非空元素列表
+    """
+    if isinstance(value, list):
+        return value
+    if not value:
+        return []
+    text = str(value)
+    for separator in LIST_SEPARATORS[1:]:
+        text = text.replace(separator, LIST_SEPARATORS[0])
+    return [item.strip() for item in text.split(LIST_SEPARATORS[0]) if item.strip()]
+
+
+def _normalize_record(record_type: str, record: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """
+    整理一条记录：去掉记录类型字段、空值，并把列表列解析为列表
+
+    Args:
+        record_type: 记录类型
+        record: 原始记录
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: (记录类型, 整理后的记录)
+    """
+    if record_type not in RECORD_TYPES:
+        raise ValueError(f"未知的记录类型: {record_type}")
+
+    record = {
+        key: value for key, value in record.items()
+        if key not in ("type", None) and value not in (None, "")
+    }
+    for column in _LIST_COLUMNS[record_type]:
+        if column in record:
+            record[column] = split_list(record[column])
+
+    # CSV中的治疗指南每行一个时间点（age、treatment列），统一为timeline列表
+    if record_type == GUIDELINE and "timeline" not in record and "treatment" in record:
+        record["timeline"] = [{"age": record.pop("age", ""), "treatment": record.pop("treatment")}]
+    return record_type, record
+
+
+def iter_records(
+    stream: Iterable[str],
+    fmt: Optional[str] = None,
+    record_type: Optional[str] = None
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    逐条解析数据流
+
+    NDJSON每行一个JSON对象；CSV第一行为表头。记录类型取记录中的type字段，
+    没有该字段时使用record_type参数。
+
+    Args:
+        stream: 文本行的可迭代对象（如打开的文件）
+        fmt: "ndjson"或"csv"，None表示按第一行自动判断
+        record_type: 默认记录类型（syndrome、guideline或gene_link）
+
+    Yields:
+        Tuple[str, Dict[str, Any]]: (记录类型, 记录)
+    """
+    lines = iter(stream)
+    first = next((line for line in lines if line.strip()), None)
+    if first is None:
+        return
+    lines = chain([first], lines)
+    if fmt is None:
+        fmt = "ndjson" if first.lstrip().startswith("{") else "csv"
+
+    if fmt == "ndjson":
+        for line_no, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"第{line_no}行不是有效的JSON: {str(e)}")
+            yield _normalize_record(record.get("type", record_type), record)
+    elif fmt == "csv":
+        for record in csv.DictReader(lines):
+            yield _normalize_record(record.get("type") or record_type, record)
+    else:
+        raise ValueError(f"不支持的批量导入格式: {fmt}")
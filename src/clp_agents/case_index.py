@@ -0,0 +1,194 @@
+"""
+相似病例检索组件：病例临床特征集合的MinHash签名和LSH分桶索引，候选病例按精确Jaccard相似度重排
+"""
+
+import zlib
+from typing import Dict, List, Optional, Any, Iterable, Set
+
+import numpy as np
+
+from .symptom_normalizer import SymptomNormalizer, clean_symptom_text, default_normalizer
+
+# MinHash使用的梅森素数模数
+_PRIME = (1 << 31) - 1
+
+# 分桶键的混合乘数（64位，溢出按模2^64截断）
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+# 没有诊断的病例（不能作为参考病例或标准答案）
+UNLABELED_DIAGNOSES = {"", "未提供诊断"}
+
+
+def is_labeled(case: Dict[str, Any]) -> bool:
+    """病例是否有诊断"""
+    return str(case.get("diagnosis", "")).strip() not in UNLABELED_DIAGNOSES
+
+
+def normalize_features(features: Iterable[str], normalizer: Optional[SymptomNormalizer] = None) -> Set[str]:
+    """
+    将临床特征规范化为特征集合：能解析的映射为标准症状名称，其余清洗后原样保留
+
+    Args:
+        features: 临床特征或症状列表
+        normalizer: 症状标准化器，默认使用进程级默认标准化器
+
+    Returns:
+        Set[str]: 特征集合
+    """
+    normalizer = normalizer or default_normalizer
+    normalized = set()
+    for feature in features:
+        feature = normalizer.normalize(feature) or clean_symptom_text(feature)
+        if feature:
+            normalized.add(feature)
+    return normalized
+
+
+class CaseIndex:
+    """
+    MinHash LSH相似病例索引
+
+    每个病例的特征集合映射为num_perm个最小哈希值，相邻rows_per_band个值组成一个分桶键；
+    两个病例只要在任一分桶键上相同即成为候选（Jaccard越高越可能碰撞）。
+    全部分桶的键按(分桶, 签名值)混合后合并为一个有序数组，查询时一次向量化二分查找取出同键病例，
+    候选按碰撞次数预筛后再计算精确Jaccard相似度。
+    """
+    def __init__(
+        self,
+        cases: List[Dict[str, Any]],
+        normalizer: Optional[SymptomNormalizer] = None,
+        num_perm: int = 64,
+        bands: int = 32,
+        max_candidates: int = 200,
+        seed: int = 1
+    ):
+        """
+        构建索引
+
+        Args:
+            cases: 病例列表，每项包含case_id、clinical_features和diagnosis
+            normalizer: 症状标准化器
+            num_perm: MinHash签名长度
+            bands: 分桶数，需整除num_perm（每个分桶num_perm/bands行）
+            max_candidates: 参与精确Jaccard重排的最大候选数
+            seed: 哈希函数随机种子
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm必须是bands的整数倍")
+        self.normalizer = normalizer or default_normalizer
+        self.cases = cases
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.max_candidates = max_candidates
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+        # 文献病例中的特征大量重复，按原文缓存标准化结果
+        resolved: Dict[str, str] = {}
+        self.feature_sets = []
+        for case in cases:
+            features = set()
+            for feature in case.get("clinical_features", []):
+                if feature not in resolved:
+                    resolved[feature] = self.normalizer.normalize(feature) or clean_symptom_text(feature)
+                if resolved[feature]:
+                    features.add(resolved[feature])
+            self.feature_sets.append(features)
+
+        # 全部分桶的键混入分桶序号后合并排序，查询时一次二分查找覆盖所有分桶
+        keys = self._band_keys(self._signatures(self.feature_sets)).ravel()
+        self._order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._order]
+        self._order %= max(len(cases), 1)
+
+    @staticmethod
+    def _tokens(features: Iterable[str]) -> np.ndarray:
+        """特征哈希为整数"""
+        return np.array([zlib.crc32(feature.encode("utf-8")) % _PRIME for feature in features], dtype=np.uint64)
+
+    def _signatures(self, feature_sets: List[Set[str]], block: int = 65536) -> np.ndarray:
+        """
+        批量计算MinHash签名：全部特征排成一维，按病例分段用minimum.reduceat取最小值
+
+        Args:
+            feature_sets: 特征集合列表
+            block: 每批处理的特征数上限（控制中间矩阵大小）
+
+        Returns:
+            np.ndarray: 形状为(病例数, num_perm)的签名，没有特征的病例签名为全最大值
+        """
+        signatures = np.full((len(feature_sets), len(self._a)), _PRIME, dtype=np.uint64)
+        start = 0
+        while start < len(feature_sets):
+            end, total = start, 0
+            while end < len(feature_sets) and (end == start or total + len(feature_sets[end]) <= block):
+                total += len(feature_sets[end])
+                end += 1
+            lengths = np.array([len(features) for features in feature_sets[start:end]], dtype=np.int64)
+            tokens = np.concatenate([self._tokens(features) for features in feature_sets[start:end]] + [np.empty(0, dtype=np.uint64)])
+            if len(tokens):
+                hashes = (self._a[None, :] * tokens[:, None] + self._b[None, :]) % _PRIME
+                nonempty = np.flatnonzero(lengths)
+                offsets = (np.cumsum(lengths) - lengths)[nonempty]
+                signatures[start + nonempty] = np.minimum.reduceat(hashes, offsets, axis=0)
+            start = end
+        return signatures
+
+    def _band_keys(self, signatures: np.ndarray) -> np.ndarray:
+        """
+        把每个分桶的序号和rows_per_band个签名值混合为一个64位键
+
+        Args:
+            signatures: 形状为(数量, num_perm)的签名
+
+        Returns:
+            np.ndarray: 形状为(分桶数, 数量)的键
+        """
+        banded = signatures.reshape(len(signatures), self.bands, self.rows_per_band)
+        keys = np.broadcast_to(np.arange(1, self.bands + 1, dtype=np.uint64), (len(signatures), self.bands))
+        with np.errstate(over="ignore"):
+            for row in range(self.rows_per_band):
+                keys = keys * _MIX + banded[:, :, row]
+        return keys.T.copy()
+
+    def query(self, features: Iterable[str], k: int = 5) -> List[Dict[str, Any]]:
+        """
+        查找特征最相似的k个病例
+
+        Args:
+            features: 患者症状或临床特征
+            k: 返回数量
+
+        Returns:
+            List[Dict[str, Any]]: 每项包含case（病例记录）、similarity（Jaccard相似度）和shared_features，
+                按相似度降序
+        """
+        query_set = normalize_features(features, self.normalizer)
+        if not query_set or not self.cases or k <= 0:
+            return []
+
+        keys = self._band_keys(self._signatures([query_set]))[:, 0]
+        lefts = np.searchsorted(self._sorted_keys, keys, side="left").tolist()
+        rights = np.searchsorted(self._sorted_keys, keys, side="right").tolist()
+        buckets = [self._order[left:right] for left, right in zip(lefts, rights) if right > left]
+        if not buckets:
+            return []
+
+        # 碰撞次数越多，估计的相似度越高；候选过多时只重排碰撞最多的一部分
+        candidates, collisions = np.unique(np.concatenate(buckets), return_counts=True)
+        if len(candidates) > self.max_candidates:
+            candidates = candidates[np.argpartition(-collisions, self.max_candidates - 1)[:self.max_candidates]]
+
+        scored = []
+        for position in candidates.tolist():
+            shared = query_set & self.feature_sets[position]
+            if shared:
+                similarity = len(shared) / len(query_set | self.feature_sets[position])
+                scored.append((similarity, position, shared))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [
+            {"case": self.cases[position], "similarity": similarity, "shared_features": sorted(shared)}
+            for similarity, position, shared in scored[:k]
+        ]
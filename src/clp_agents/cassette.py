@@ -0,0 +1,189 @@
+"""
+录制/回放组件，将LLM和外部API的请求与响应保存为压缩的cassette文件，便于离线复现性能测试
+"""
+
+import os
+import json
+import gzip
+import time
+import asyncio
+import hashlib
+from typing import Dict, List, Optional, Any, Callable, Awaitable
+
+# 请求中不应写入cassette文件的敏感字段
+SENSITIVE_KEYS = {"api_key", "authorization", "Authorization"}
+
+
+class CassetteMissError(KeyError):
+    """回放模式下cassette中没有找到对应的请求"""
+
+
+class Cassette:
+    """
+    请求/响应录制与回放
+
+    录制模式下透传真实请求，并记录请求、响应和耗时；
+    回放模式下按请求内容返回录制的响应，同一请求多次出现时按录制顺序依次返回。
+    """
+    RECORD = "record"
+    REPLAY = "replay"
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        replay_latency: bool = False,
+        latency_scale: float = 1.0
+    ):
+        """
+        初始化cassette
+
+        Args:
+            path: cassette文件路径（gzip压缩的JSON Lines）
+            mode: 工作模式，record或replay
+            replay_latency: 回放时是否模拟录制时的响应耗时
+            latency_scale: 模拟耗时的缩放系数
+        """
+        if mode not in (self.RECORD, self.REPLAY):
+            raise ValueError(f"不支持的cassette模式: {mode}")
+
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self.latency_scale = latency_scale
+        self.entries: List[Dict[str, Any]] = []
+        self._replay_index: Dict[str, List[Dict[str, Any]]] = {}
+        self._replay_cursor: Dict[str, int] = {}
+
+        if self.mode == self.REPLAY:
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> Optional['Cassette']:
+        """
+        根据环境变量创建cassette
+
+        CLP_CASSETTE_PATH: cassette文件路径，未设置时返回None
+        CLP_CASSETTE_MODE: record或replay，默认replay
+        CLP_CASSETTE_REPLAY_LATENCY: 设置为1时回放录制的耗时
+
+        Returns:
+            Optional[Cassette]: cassette实例
+        """
+        path = os.environ.get("CLP_CASSETTE_PATH")
+        if not path:
+            return None
+
+        return cls(
+            path,
+            mode=os.environ.get("CLP_CASSETTE_MODE", cls.REPLAY),
+            replay_latency=os.environ.get("CLP_CASSETTE_REPLAY_LATENCY") == "1"
+        )
+
+    @staticmethod
+    def request_key(kind: str, request: Dict[str, Any]) -> str:
+        """
+        计算请求的唯一键
+
+        Args:
+            kind: 请求类别，如llm、pubmed
+            request: 请求内容
+
+        Returns:
+            str: 请求内容的SHA-256摘要
+        """
+        canonical = json.dumps([kind, request], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _scrub(request: Dict[str, Any]) -> Dict[str, Any]:
+        """去除请求中的敏感字段"""
+        scrubbed = {}
+        for key, value in request.items():
+            if key in SENSITIVE_KEYS:
+                continue
+            scrubbed[key] = Cassette._scrub(value) if isinstance(value, dict) else value
+        return scrubbed
+
+    def _load(self) -> None:
+        """加载cassette文件并建立回放索引"""
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"cassette文件 {self.path} 不存在")
+
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    self.entries.append(json.loads(line))
+
+        for entry in self.entries:
+            self._replay_index.setdefault(entry["key"], []).append(entry)
+
+    def save(self) -> None:
+        """将录制的请求写入cassette文件（先写临时文件再原子替换）"""
+        if self.mode != self.RECORD:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    async def call(
+        self,
+        kind: str,
+        request: Dict[str, Any],
+        send: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        通过cassette执行请求
+
+        Args:
+            kind: 请求类别，如llm、pubmed
+            request: 请求内容（用于匹配，敏感字段不会被记录）
+            send: 实际发送请求的协程函数
+
+        Returns:
+            Any: 响应内容（必须可JSON序列化）
+        """
+        request = self._scrub(request)
+        key = self.request_key(kind, request)
+
+        if self.mode == self.REPLAY:
+            return await self._replay(kind, key)
+
+        start = time.perf_counter()
+        response = await send()
+        elapsed = time.perf_counter() - start
+
+        self.entries.append({
+            "kind": kind,
+            "key": key,
+            "request": request,
+            "response": response,
+            "elapsed": elapsed
+        })
+        return response
+
+    async def _replay(self, kind: str, key: str) -> Any:
+        """按录制顺序返回请求对应的响应，超出录制次数时重复最后一次响应"""
+        recorded = self._replay_index.get(key)
+        if not recorded:
+            raise CassetteMissError(f"cassette中没有匹配的{kind}请求: {key}")
+
+        cursor = self._replay_cursor.get(key, 0)
+        entry = recorded[min(cursor, len(recorded) - 1)]
+        self._replay_cursor[key] = cursor + 1
+
+        if self.replay_latency and entry.get("elapsed"):
+            await asyncio.sleep(entry["elapsed"] * self.latency_scale)
+
+        return entry["response"]
+
+    def rewind(self) -> None:
+        """重置回放位置，使同一cassette可以重复回放"""
+        self._replay_cursor = {}
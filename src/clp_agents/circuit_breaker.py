@@ -0,0 +1,175 @@
+"""
+熔断器组件，在语言模型服务异常或过慢时快速拒绝请求，并通过探测请求自动恢复
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Optional, Any
+
+
+# 默认慢调用阈值（秒），超过的成功调用也计为失败；CLP_LLM_LATENCY_THRESHOLD为0时不检查
+DEFAULT_LATENCY_THRESHOLD = float(os.environ.get("CLP_LLM_LATENCY_THRESHOLD", "20")) or None
+
+
+class LLMUnavailableError(RuntimeError):
+    """语言模型服务不可用：超时、连接失败，或429、5xx在重试后仍未恢复"""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """熔断器处于打开状态，请求被拒绝"""
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    关闭状态下正常放行请求并统计最近的调用结果；失败（包括超过延迟阈值的慢调用）
+    达到阈值后打开，在恢复等待时间内直接拒绝请求；之后进入半开状态，
+    只放行少量探测请求，探测成功则关闭，失败则重新打开。
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        window_size: int = 20,
+        failure_rate_threshold: float = 0.5,
+        latency_threshold: Optional[float] = DEFAULT_LATENCY_THRESHOLD,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 连续失败多少次后打开
+            window_size: 统计失败率的最近调用数
+            failure_rate_threshold: 窗口填满后失败率达到该值时打开
+            latency_threshold: 慢调用阈值（秒），超过该值的成功调用也计为失败，None表示不检查
+            recovery_timeout: 打开后等待多久进入半开状态（秒）
+            half_open_max_calls: 半开状态下同时放行的探测请求数
+        """
+        self.failure_threshold = failure_threshold
+        self.window_size = window_size
+        self.failure_rate_threshold = failure_rate_threshold
+        self.latency_threshold = latency_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.window = []  # 最近调用结果，True表示失败
+        self.half_open_calls = 0
+        self.rejected = 0
+
+    def allow_request(self) -> bool:
+        """
+        判断是否放行请求
+
+        Returns:
+            bool: 是否放行
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self.half_open_calls = 0
+
+            if self.state == self.HALF_OPEN:
+                if self.half_open_calls >= self.half_open_max_calls:
+                    self.rejected += 1
+                    return False
+                self.half_open_calls += 1
+
+            return True
+
+    def is_open(self) -> bool:
+        """
+        判断熔断器是否正在拒绝请求（打开且未到探测时间）
+
+        Returns:
+            bool: 是否正在拒绝请求
+        """
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.recovery_timeout
+
+    def record_success(self, latency: float = 0.0) -> None:
+        """
+        记录一次成功调用，超过延迟阈值时按失败处理
+
+        Args:
+            latency: 调用耗时（秒）
+        """
+        if self.latency_threshold is not None and latency > self.latency_threshold:
+            self.record_failure()
+            return
+
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._close()
+                return
+            self.consecutive_failures = 0
+            self._push(False)
+
+    def record_failure(self) -> None:
+        """记录一次失败调用"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._open()
+                return
+
+            self.consecutive_failures += 1
+            self._push(True)
+
+            failure_rate = sum(self.window) / len(self.window)
+            if (self.consecutive_failures >= self.failure_threshold or
+                    (len(self.window) >= self.window_size and failure_rate >= self.failure_rate_threshold)):
+                self._open()
+
+    def release(self) -> None:
+        """请求被取消或因请求本身的错误（如400、401）失败时，既不算成功也不算失败，归还半开状态的探测名额"""
+        with self._lock:
+            if self.state == self.HALF_OPEN and self.half_open_calls > 0:
+                self.half_open_calls -= 1
+
+    def _push(self, failed: bool) -> None:
+        """将调用结果加入统计窗口"""
+        self.window.append(failed)
+        if len(self.window) > self.window_size:
+            del self.window[0]
+
+    def _open(self) -> None:
+        """打开熔断器"""
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.half_open_calls = 0
+
+    def _close(self) -> None:
+        """关闭熔断器并清空统计"""
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.window = []
+        self.half_open_calls = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        将熔断器状态转换为字典表示
+
+        Returns:
+            Dict[str, Any]: 熔断器状态
+        """
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "window_failures": sum(self.window),
+                "window_size": len(self.window),
+                "rejected": self.rejected
+            }
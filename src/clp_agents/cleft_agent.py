@@ -38,6 +38,12 @@ class CleftLipPalateAgent(Agent):
             "syndrome_type": "non-syndromic"  # 非综合征性时激活
         })
         
+        # 声明相关的患者字段和症状类别（唇腭裂专科只关注口腔颌面、喂养和气道相关信息）
+        self.set_context_profile(
+            fields=["age", "gender", "symptoms", "medical_history", "feeding_history", "exam_results", "similar_cases"],
+            symptom_categories=["orofacial", "feeding", "airway"]
+        )
+        
         # 添加系统提示
         self.add_message("system", self._get_system_prompt())
     
@@ -103,11 +109,12 @@ class CleftLipPalateAgent(Agent):
         Returns:
             str: 分析提示
         """
-        age = patient_data.get("age", "未知")
-        gender = patient_data.get("gender", "未知")
-        symptoms = patient_data.get("symptoms", [])
+        context = self.build_patient_context(patient_data)
+        age = context.get("age", "未知")
+        gender = context.get("gender", "未知")
+        symptoms = context.get("symptoms", [])
         symptoms_str = ", ".join(symptoms)
-        medical_history = patient_data.get("medical_history", "无")
+        medical_history = context.get("medical_history", "无")
         
         prompt = f"""
         请分析以下非综合征性唇腭裂患者的情况，并提供详细的分类和治疗建议：
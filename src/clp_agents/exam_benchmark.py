@@ -0,0 +1,504 @@
+"""
+考题基准测试组件，用CLP_exams.json中的单项选择题测试智能体或智能体管理器的准确率、耗时和费用
+不同配置（模型、提示、路由）的结果按(题目, 配置)缓存，可以一条命令对比多个配置
+"""
+
+import os
+import re
+import copy
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import unicodedata
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+from .agent import Agent
+from .agent_manager import AgentManager
+from .record_loader import read_records, EXAM_SCHEMA
+from . import telemetry
+
+# 默认考题文件（项目根目录下的CLP_exams.json）
+DEFAULT_EXAMS_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'CLP_exams.json')
+
+# 要求模型按固定格式给出答案的默认提示
+DEFAULT_INSTRUCTION = "请从选项中选择一个最佳答案，最后一行按“答案：X”的格式给出选项字母。"
+
+# 被否定的选项（如“不是A，是D”“not A but D”），连同其后的转折词一起去掉，只保留肯定的选项；
+# 小写字母只在其后紧跟标点或行尾时才视为选项，避免把英文冠词a当作选项A
+_NEGATED_CHOICE = re.compile(
+    r"(?:不是|并非|而非|不选|(?i:\bnot\b))\s*[（(\[【]?\s*[A-E](?![A-Za-z])[）)\]】]?\s*[,，;；]?\s*"
+    r"(?:而是|但是|而|但|(?i:but\s+rather|but|rather|it'?s|it\s+is)\b)?\s*"
+)
+
+# 模型回复中给出答案的常见写法（按优先级排列）
+_ANSWER_PATTERNS = [
+    re.compile(
+        r"(?:答案|(?i:\banswer))\s*(?:应该是|应为|是|为|(?i:is|should\s+be|would\s+be)\b|:|：)?\s*"
+        r"[（(\[【]?\s*([A-E](?![A-Za-z])|[a-e](?=\s*[）)\]】.。,，;；]|\s*$))",
+        re.MULTILINE
+    ),
+    re.compile(r"(?:选|选择)\s*[（(\[【]?\s*([A-E])(?![A-Za-z])"),
+    re.compile(r"^\s*[（(\[【]?([A-E])[）)\]】]?\s*(?:[.、．:：]|$)", re.MULTILINE)
+]
+
+
+def format_question(item: Dict[str, Any], instruction: str = DEFAULT_INSTRUCTION) -> str:
+    """
+    将考题格式化为提问文本
+
+    Args:
+        item: 考题记录，包含question和option
+        instruction: 答题格式要求
+
+    Returns:
+        str: 提问文本
+    """
+    options = "\n".join(f"{letter}. {text}" for letter, text in sorted(item["option"].items()))
+    return f"{item['question']}\n{options}\n\n{instruction}"
+
+
+def parse_choice(text: str, options: str = "ABCDE") -> Optional[str]:
+    """
+    从模型回复中解析选择的选项
+
+    Args:
+        text: 模型回复
+        options: 有效的选项字母
+
+    Returns:
+        Optional[str]: 选项字母，无法解析时返回None
+    """
+    text = _NEGATED_CHOICE.sub("", unicodedata.normalize("NFKC", text or ""))
+    for pattern in _ANSWER_PATTERNS:
+        # 同一写法出现多次时以最后一次为准（模型常在分析后给出最终答案）
+        choices = [match.upper() for match in pattern.findall(text) if match.upper() in options]
+        if choices:
+            return choices[-1]
+    stripped = text.strip().rstrip("。.")
+    return stripped.upper() if len(stripped) == 1 and stripped.upper() in options else None
+
+
+class BenchmarkConfig:
+    """
+    一组测试配置：答题的目标（单个智能体或管理器）、模型、温度和提示
+    """
+    def __init__(
+        self,
+        name: str,
+        target: str = "cleft_agent",
+        model: Optional[str] = None,
+        temperature: float = 0.0,
+        instruction: str = DEFAULT_INSTRUCTION,
+        agents: Optional[List[str]] = None
+    ):
+        """
+        初始化测试配置
+
+        Args:
+            name: 配置名称
+            target: 智能体ID，或"manager"表示由管理器协调多个智能体并整合答案
+            model: 使用的模型，None表示使用智能体自身的模型
+            temperature: 生成文本的随机性参数
+            instruction: 答题格式要求
+            agents: target为manager时参与会诊的智能体ID，None表示全部
+        """
+        self.name = name
+        self.target = target
+        self.model = model
+        self.temperature = temperature
+        self.instruction = instruction
+        self.agents = agents
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        将配置转换为字典表示
+
+        Returns:
+            Dict[str, Any]: 配置的字典表示
+        """
+        return {
+            "name": self.name,
+            "target": self.target,
+            "model": self.model,
+            "temperature": self.temperature,
+            "instruction": self.instruction,
+            "agents": self.agents
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BenchmarkConfig':
+        """
+        从字典创建配置
+
+        Args:
+            data: 配置的字典表示
+
+        Returns:
+            BenchmarkConfig: 配置
+        """
+        return cls(
+            name=data["name"],
+            target=data.get("target", "cleft_agent"),
+            model=data.get("model"),
+            temperature=data.get("temperature", 0.0),
+            instruction=data.get("instruction", DEFAULT_INSTRUCTION),
+            agents=data.get("agents")
+        )
+
+    def cache_key(self, item: Dict[str, Any], resolved: Optional[Dict[str, Any]] = None) -> str:
+        """
+        计算(题目, 配置)的缓存键，配置名称不参与计算（改名不会使缓存失效）
+
+        Args:
+            item: 考题记录
+            resolved: 运行时才能确定的设置（实际使用的模型、各智能体的系统提示），见ExamBenchmark.resolve
+
+        Returns:
+            str: SHA-256摘要
+        """
+        config = {key: value for key, value in self.to_dict().items() if key != "name"}
+        canonical = json.dumps([item["question"], item["option"], config, resolved], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class RateLimiter:
+    """
+    请求速率限制，相邻两次请求的开始时间至少间隔1/rate秒
+    """
+    def __init__(self, rate: Optional[float] = None):
+        """
+        初始化速率限制
+
+        Args:
+            rate: 每秒最多开始的请求数，None或0表示不限制
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        """等待到允许开始下一个请求"""
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class ExamBenchmark:
+    """
+    考题基准测试
+
+    每道题使用目标智能体的独立副本答题（只保留系统提示），互不影响消息历史，
+    因此同一配置的题目可以并发执行；每道题单独记录调用轨迹以统计token和费用。
+    """
+    def __init__(
+        self,
+        agent_manager: AgentManager,
+        items: List[Dict[str, Any]],
+        concurrency: int = 4,
+        rate: Optional[float] = None,
+        cache_path: Optional[str] = None
+    ):
+        """
+        初始化基准测试
+
+        Args:
+            agent_manager: 注册了各专科智能体的管理器
+            items: 考题列表
+            concurrency: 同时进行的题目数
+            rate: 每秒最多开始的题目数，None表示不限制
+            cache_path: 结果缓存文件路径（JSON Lines），None表示不缓存
+        """
+        self.agent_manager = agent_manager
+        self.items = items
+        self.concurrency = concurrency
+        self.rate = rate
+        self.cache_path = cache_path
+        self.cache: Dict[str, Dict[str, Any]] = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.cache[entry["key"]] = entry["result"]
+
+    def resolve(self, config: BenchmarkConfig) -> Dict[str, Any]:
+        """
+        解析配置实际使用的模型和参与答题的智能体的系统提示，model为None时取智能体（或管理器）自身的模型，
+        修改智能体的提示或默认模型后缓存随之失效
+
+        Args:
+            config: 测试配置
+
+        Returns:
+            Dict[str, Any]: 包含model和agents（智能体ID -> 模型和系统提示）的字典
+        """
+        if config.target == "manager":
+            model = config.model or self.agent_manager.model_info
+            agents = {
+                agent_id: agent for agent_id, agent in self.agent_manager.agents.items()
+                if config.agents is None or agent_id in config.agents
+            }
+        else:
+            agent = self.agent_manager.get_agent(config.target)
+            model = config.model or (agent.model_info if agent else None)
+            agents = {config.target: agent} if agent else {}
+        return {
+            "model": model,
+            "agents": {
+                agent_id: {
+                    "model": config.model or agent.model_info,
+                    "system": [message["content"] for message in agent.messages if message["role"] == "system"]
+                }
+                for agent_id, agent in agents.items()
+            }
+        }
+
+    @staticmethod
+    def _fresh_agent(agent: Agent, model: Optional[str], temperature: float) -> Agent:
+        """复制智能体，只保留系统提示"""
+        clone = copy.copy(agent)
+        clone.messages = [message for message in agent.messages if message["role"] == "system"]
+        clone.model_info = model or agent.model_info
+        clone.temperature = temperature
+        return clone
+
+    async def _answer(self, config: BenchmarkConfig, query: str) -> str:
+        """按配置回答一道题"""
+        if config.target != "manager":
+            agent = self.agent_manager.get_agent(config.target)
+            if agent is None:
+                raise ValueError(f"未注册的智能体: {config.target}")
+            return await self._fresh_agent(agent, config.model, config.temperature).analyze(query)
+
+        manager = copy.copy(self.agent_manager)
+        manager.messages = []
+        manager.model_info = config.model or self.agent_manager.model_info
+        manager.temperature = config.temperature
+        manager.active_agents = {
+            agent_id: self._fresh_agent(agent, config.model, config.temperature)
+            for agent_id, agent in self.agent_manager.agents.items()
+            if config.agents is None or agent_id in config.agents
+        }
+        result = await manager.coordinate_analysis(query)
+        return result.get("integrated_result", "")
+
+    async def run_item(
+        self,
+        config: BenchmarkConfig,
+        item: Dict[str, Any],
+        resolved: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        回答一道题，命中缓存时直接返回缓存的结果
+
+        Args:
+            config: 测试配置
+            item: 考题记录
+            resolved: resolve(config)的结果，None时重新解析
+
+        Returns:
+            Dict[str, Any]: 包含answer、predicted、correct、latency、prompt_tokens、completion_tokens、cost、
+                error和cached的结果
+        """
+        key = config.cache_key(item, resolved or self.resolve(config))
+        if key in self.cache:
+            return dict(self.cache[key], cached=True)
+
+        error = None
+        response = ""
+        start = time.perf_counter()
+        with telemetry.consult_trace() as trace:
+            try:
+                response = await self._answer(config, format_question(item, config.instruction))
+            except Exception as e:
+                error = f"{type(e).__name__}: {str(e)}"
+        latency = time.perf_counter() - start
+        totals = trace.to_dict()["totals"]
+
+        predicted = parse_choice(response, "".join(item["option"].keys()))
+        result = {
+            "answer": item["answer"],
+            "predicted": predicted,
+            "correct": predicted == item["answer"],
+            "latency": round(latency, 6),
+            "prompt_tokens": totals["prompt_tokens"],
+            "completion_tokens": totals["completion_tokens"],
+            "cost": totals["cost"],
+            "error": error
+        }
+        if error is None:
+            self._store(key, result)
+        return dict(result, cached=False)
+
+    def _store(self, key: str, result: Dict[str, Any]) -> None:
+        """保存结果到缓存（失败的题目不缓存，下次重新测试）"""
+        self.cache[key] = result
+        if self.cache_path:
+            with open(self.cache_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"key": key, "result": result}, ensure_ascii=False) + "\n")
+
+    async def run(self, config: BenchmarkConfig) -> Dict[str, Any]:
+        """
+        用一组配置测试全部考题
+
+        Args:
+            config: 测试配置
+
+        Returns:
+            Dict[str, Any]: 汇总结果（见summarize）和逐题结果results
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.rate)
+        resolved = self.resolve(config)
+
+        async def run_one(item: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                if config.cache_key(item, resolved) not in self.cache:
+                    await limiter.wait()
+                return await self.run_item(config, item, resolved)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_one(item) for item in self.items))
+        summary = summarize(results)
+        summary.update(config=config.name, wall_time=round(time.perf_counter() - start, 6), results=results)
+        return summary
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    汇总逐题结果
+
+    Args:
+        results: 逐题结果
+
+    Returns:
+        Dict[str, Any]: 包含题目数、准确率、未能解析答案数、错误数、耗时分位数（缓存命中的题目使用首次测试时的耗时）、
+            token、费用和缓存命中数
+    """
+    latencies = np.array([result["latency"] for result in results], dtype=np.float64)
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]).tolist() if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        "items": len(results),
+        "accuracy": round(sum(result["correct"] for result in results) / len(results), 4) if results else 0.0,
+        "unparsed": sum(1 for result in results if result["predicted"] is None and not result["error"]),
+        "errors": sum(1 for result in results if result["error"]),
+        "latency_p50": round(p50, 6),
+        "latency_p90": round(p90, 6),
+        "latency_p99": round(p99, 6),
+        "prompt_tokens": sum(result["prompt_tokens"] for result in results),
+        "completion_tokens": sum(result["completion_tokens"] for result in results),
+        "cost": round(sum(result["cost"] for result in results), 6),
+        "cache_hits": sum(1 for result in results if result.get("cached"))
+    }
+
+
+def build_agent_manager(llm_client: Optional[Any] = None) -> AgentManager:
+    """
+    创建注册了全部专科智能体的管理器
+
+    Args:
+        llm_client: 语言模型客户端，None表示智能体返回模拟回复
+
+    Returns:
+        AgentManager: 智能体管理器
+    """
+    from .cleft_agent import CleftLipPalateAgent
+    from .craniofacial_agent import CraniofacialAgent
+    from .genetic_agent import GeneticAgent
+    from .otology_agent import OtologyAgent
+    from .ophthalmology_agent import OphthalmologyAgent
+
+    manager = AgentManager(llm_client=llm_client)
+    manager.register_agent("cleft_agent", CleftLipPalateAgent())
+    manager.register_agent("craniofacial_agent", CraniofacialAgent())
+    manager.register_agent("genetic_agent", GeneticAgent())
+    manager.register_agent("otology_agent", OtologyAgent())
+    manager.register_agent("ophthalmology_agent", OphthalmologyAgent())
+    return manager
+
+
+async def run_benchmark(
+    configs: List[BenchmarkConfig],
+    exams_file: str = DEFAULT_EXAMS_FILE,
+    concurrency: int = 4,
+    rate: Optional[float] = None,
+    cache_path: Optional[str] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    依次测试多组配置；配置了OPENAI_API_KEY或CLP_CASSETTE_PATH时调用语言模型，否则使用模拟回复
+
+    Args:
+        configs: 测试配置列表
+        exams_file: 考题文件路径
+        concurrency: 同时进行的题目数
+        rate: 每秒最多开始的题目数
+        cache_path: 结果缓存文件路径
+        limit: 只测试前limit道题
+
+    Returns:
+        List[Dict[str, Any]]: 各配置的汇总结果
+    """
+    from .cassette import Cassette
+    from .llm_client import LLMClient
+
+    # 只有项目自带的考题文件已知含有未转义的双引号，其他文件按严格JSON解析
+    repair_quotes = os.path.abspath(exams_file) == os.path.abspath(DEFAULT_EXAMS_FILE)
+    items = list(read_records(exams_file, EXAM_SCHEMA, repair_quotes=repair_quotes))[:limit]
+    cassette = Cassette.from_env()
+    llm_client = LLMClient(cassette=cassette) if os.environ.get("OPENAI_API_KEY") or cassette else None
+    benchmark = ExamBenchmark(build_agent_manager(llm_client), items, concurrency, rate, cache_path)
+    try:
+        return [await benchmark.run(config) for config in configs]
+    finally:
+        if llm_client:
+            await llm_client.close()
+        if cassette:
+            cassette.save()
+
+
+def main() -> None:
+    """命令行入口：测试一组或多组配置并输出对比表"""
+    parser = argparse.ArgumentParser(description="用考题测试智能体的准确率、耗时和费用")
+    parser.add_argument("--configs", help="配置文件（JSON列表，每项为BenchmarkConfig的字典表示）")
+    parser.add_argument("--target", default="cleft_agent", help="未提供配置文件时测试的智能体ID或manager")
+    parser.add_argument("--model", default=None, help="未提供配置文件时使用的模型")
+    parser.add_argument("--exams", default=DEFAULT_EXAMS_FILE, help="考题文件路径")
+    parser.add_argument("--concurrency", type=int, default=4, help="同时进行的题目数")
+    parser.add_argument("--rate", type=float, default=None, help="每秒最多开始的题目数")
+    parser.add_argument("--cache", default=None, help="结果缓存文件路径（JSON Lines）")
+    parser.add_argument("--limit", type=int, default=None, help="只测试前N道题")
+    parser.add_argument("--output", default=None, help="逐题结果输出路径（JSON）")
+    args = parser.parse_args()
+
+    if args.configs:
+        with open(args.configs, 'r', encoding='utf-8') as f:
+            configs = [BenchmarkConfig.from_dict(data) for data in json.load(f)]
+    else:
+        configs = [BenchmarkConfig(args.target, target=args.target, model=args.model)]
+
+    summaries = asyncio.run(run_benchmark(configs, args.exams, args.concurrency, args.rate, args.cache, args.limit))
+
+    print(f"{'配置':<20}{'题数':>6}{'准确率':>8}{'P50(s)':>10}{'P90(s)':>10}{'输入token':>12}{'输出token':>12}{'费用($)':>10}{'缓存':>6}")
+    for summary in summaries:
+        print(
+            f"{summary['config']:<20}{summary['items']:>6}{summary['accuracy']:>8.2%}"
+            f"{summary['latency_p50']:>10.3f}{summary['latency_p90']:>10.3f}"
+            f"{summary['prompt_tokens']:>12}{summary['completion_tokens']:>12}{summary['cost']:>10.4f}{summary['cache_hits']:>6}"
+        )
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summaries, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
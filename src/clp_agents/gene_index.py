@@ -0,0 +1,191 @@
+"""
+基因-综合征-变异交叉索引，用于遗传学检查中按综合征查找候选基因和已知致病变异
+"""
+
+import re
+from typing import Dict, List, Optional, Any, Iterable, Mapping
+
+# ClinVar临床意义的排序（越靠前越重要），未列出的排在最后
+CLINICAL_SIGNIFICANCE_ORDER = [
+    "pathogenic",
+    "pathogenic/likely pathogenic",
+    "likely pathogenic",
+    "conflicting interpretations of pathogenicity",
+    "uncertain significance",
+    "likely benign",
+    "benign/likely benign",
+    "benign"
+]
+_SIGNIFICANCE_RANK = {name: rank for rank, name in enumerate(CLINICAL_SIGNIFICANCE_ORDER)}
+
+# 视为致病的临床意义
+PATHOGENIC_SIGNIFICANCE = {"pathogenic", "pathogenic/likely pathogenic", "likely pathogenic"}
+
+
+def normalize_gene(symbol: str) -> str:
+    """基因符号统一为去除空白的大写形式"""
+    return symbol.strip().upper()
+
+
+def variant_significance(variant: Dict[str, Any]) -> str:
+    """
+    获取变异的临床意义（小写）
+
+    兼容ClinVar esummary的clinical_significance字符串和germline_classification.description字段。
+
+    Args:
+        variant: 变异摘要
+
+    Returns:
+        str: 临床意义
+    """
+    significance = variant.get("clinical_significance") or ""
+    if isinstance(significance, dict):
+        significance = significance.get("description", "")
+    if not significance and isinstance(variant.get("germline_classification"), dict):
+        significance = variant["germline_classification"].get("description", "")
+    return str(significance).strip().lower()
+
+
+def variant_genes(variant: Dict[str, Any]) -> List[str]:
+    """
+    获取变异所在的基因符号
+
+    兼容字符串（可用逗号、分号分隔多个基因）和ClinVar esummary的genes列表（[{"symbol": ...}]）。
+
+    Args:
+        variant: 变异摘要
+
+    Returns:
+        List[str]: 基因符号列表
+    """
+    genes = variant.get("genes") or variant.get("gene") or []
+    if isinstance(genes, str):
+        genes = re.split(r"[,;|]", genes)
+    symbols = []
+    for gene in genes:
+        symbol = gene.get("symbol", "") if isinstance(gene, dict) else str(gene)
+        if symbol.strip():
+            symbols.append(normalize_gene(symbol))
+    return symbols
+
+
+class GeneIndex:
+    """
+    基因-综合征-变异交叉索引
+
+    基因->综合征和综合征->基因两个方向的邻接表由综合征数据的genes字段构建，
+    基因->变异的列表来自本地缓存的ClinVar变异摘要，并按临床意义排序（致病变异在前）。
+    """
+    def __init__(self, syndrome_data: Mapping[str, Dict[str, Any]], variants: Optional[Mapping[str, Dict[str, Any]]] = None):
+        """
+        构建索引
+
+        Args:
+            syndrome_data: 综合征ID -> 综合征信息
+            variants: 变异ID -> ClinVar变异摘要
+        """
+        self.gene_syndromes: Dict[str, List[str]] = {}
+        self.syndrome_genes: Dict[str, List[str]] = {}
+        for syndrome_id, info in syndrome_data.items():
+            genes = list(dict.fromkeys(normalize_gene(gene) for gene in info.get("genes", []) if gene.strip()))
+            if not genes:
+                continue
+            self.syndrome_genes[syndrome_id] = genes
+            for gene in genes:
+                self.gene_syndromes.setdefault(gene, []).append(syndrome_id)
+
+        self.gene_variants: Dict[str, List[Dict[str, Any]]] = {}
+        for variant_id, variant in (variants or {}).items():
+            variant = dict(variant, id=variant.get("id", variant_id))
+            for gene in variant_genes(variant):
+                self.gene_variants.setdefault(gene, []).append(variant)
+        for gene_variants in self.gene_variants.values():
+            gene_variants.sort(key=lambda variant: _SIGNIFICANCE_RANK.get(variant_significance(variant), len(_SIGNIFICANCE_RANK)))
+
+        self._gene_pattern = None
+
+    def syndromes_for_gene(self, gene: str) -> List[str]:
+        """
+        查找与基因相关的综合征
+
+        Args:
+            gene: 基因符号
+
+        Returns:
+            List[str]: 综合征ID列表
+        """
+        return self.gene_syndromes.get(normalize_gene(gene), [])
+
+    def genes_for_syndrome(self, syndrome_id: str) -> List[str]:
+        """
+        查找综合征的相关基因
+
+        Args:
+            syndrome_id: 综合征ID
+
+        Returns:
+            List[str]: 基因符号列表
+        """
+        return self.syndrome_genes.get(syndrome_id, [])
+
+    def variants_for_gene(self, gene: str, pathogenic_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        查找基因的已缓存变异
+
+        Args:
+            gene: 基因符号
+            pathogenic_only: 是否只返回致病/可能致病变异
+
+        Returns:
+            List[Dict[str, Any]]: 变异摘要列表，致病变异在前
+        """
+        variants = self.gene_variants.get(normalize_gene(gene), [])
+        if pathogenic_only:
+            variants = [variant for variant in variants if variant_significance(variant) in PATHOGENIC_SIGNIFICANCE]
+        return variants
+
+    def candidate_genes(self, syndrome_ids: Iterable[str], pathogenic_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        查找一组综合征的候选基因及其已知变异
+
+        Args:
+            syndrome_ids: 综合征ID列表（如按匹配度排序的可能综合征）
+            pathogenic_only: 是否只附带致病/可能致病变异
+
+        Returns:
+            List[Dict[str, Any]]: 每个候选基因的gene、syndromes（该组中与之相关的综合征）和variants，
+                按涉及的综合征数降序，相同时保持综合征的输入顺序
+        """
+        candidates: Dict[str, List[str]] = {}
+        for syndrome_id in syndrome_ids:
+            for gene in self.syndrome_genes.get(syndrome_id, []):
+                syndromes = candidates.setdefault(gene, [])
+                if syndrome_id not in syndromes:
+                    syndromes.append(syndrome_id)
+
+        ordered = sorted(candidates.items(), key=lambda item: -len(item[1]))
+        return [
+            {"gene": gene, "syndromes": syndromes, "variants": self.variants_for_gene(gene, pathogenic_only)}
+            for gene, syndromes in ordered
+        ]
+
+    def find_genes(self, text: str) -> List[str]:
+        """
+        查找文本中提到的已索引基因符号
+
+        Args:
+            text: 文本（如智能体的分析结果）
+
+        Returns:
+            List[str]: 基因符号列表，按首次出现顺序
+        """
+        if self._gene_pattern is None:
+            genes = sorted(set(self.gene_syndromes) | set(self.gene_variants), key=len, reverse=True)
+            if not genes:
+                return []
+            self._gene_pattern = re.compile(
+                r"(?<![A-Za-z0-9])(" + "|".join(re.escape(gene) for gene in genes) + r")(?![A-Za-z0-9])",
+                re.IGNORECASE
+            )
+        return list(dict.fromkeys(normalize_gene(gene) for gene in self._gene_pattern.findall(text)))
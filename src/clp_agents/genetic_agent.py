@@ -2,9 +2,13 @@
 遗传学智能体，负责判断遗传异常，提供遗传检测建议
 """
 
+import re
 from typing import Dict, List, Optional, Any
 from .agent import Agent
 
+# 患者数据中没有候选基因时，在分析结果中查找的唇腭裂相关基因
+DEFAULT_CANDIDATE_GENES = ["IRF6", "TCOF1", "POLR1C", "POLR1D", "COL2A1", "COL11A1", "COL11A2"]
+
 class GeneticAgent(Agent):
     """
     遗传学智能体，专注于遗传异常的分析和遗传咨询
@@ -38,6 +42,9 @@ class GeneticAgent(Agent):
             "syndrome_type": "syndromic"  # 综合征性时激活
         })
         
+        # 声明相关的患者字段和症状类别（遗传学分析需要完整的症状谱和家族史）
+        self.set_context_profile(fields=None, symptom_categories=None)
+        
         # 添加系统提示
         self.add_message("system", self._get_system_prompt())
     
@@ -90,8 +97,8 @@ class GeneticAgent(Agent):
         # 添加分析结果到消息历史
         self.add_message("assistant", analysis_result)
         
-        # 解析分析结果
-        return self._parse_genetic_analysis(analysis_result)
+        # 解析分析结果（按知识库给出的候选基因识别基因异常）
+        return self._parse_genetic_analysis(analysis_result, patient_data.get("candidate_genes"))
     
     def _build_genetic_analysis_prompt(self, patient_data: Dict[str, Any]) -> str:
         """
@@ -103,14 +110,15 @@ class GeneticAgent(Agent):
         Returns:
             str: 分析提示
         """
-        age = patient_data.get("age", "未知")
-        gender = patient_data.get("gender", "未知")
-        symptoms = patient_data.get("symptoms", [])
+        context = self.build_patient_context(patient_data)
+        age = context.get("age", "未知")
+        gender = context.get("gender", "未知")
+        symptoms = context.get("symptoms", [])
         symptoms_str = ", ".join(symptoms)
-        medical_history = patient_data.get("medical_history", "无")
-        family_history = patient_data.get("family_history", "无")
-        syndrome_type = patient_data.get("syndrome_type", "unknown")
-        possible_syndromes = patient_data.get("possible_syndromes", [])
+        medical_history = context.get("medical_history", "无")
+        family_history = context.get("family_history", "无")
+        syndrome_type = context.get("syndrome_type", "unknown")
+        possible_syndromes = context.get("possible_syndromes", [])
         
         syndromes_str = ""
         if possible_syndromes:
@@ -142,12 +150,13 @@ class GeneticAgent(Agent):
         
         return prompt
     
-    def _parse_genetic_analysis(self, analysis_result: str) -> Dict[str, Any]:
+    def _parse_genetic_analysis(self, analysis_result: str, candidate_genes: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         解析遗传分析结果
         
         Args:
             analysis_result: 分析结果文本
+            candidate_genes: 知识库给出的候选基因（包含gene字段）
             
         Returns:
             Dict[str, Any]: 解析后的分析结果
@@ -155,18 +164,19 @@ class GeneticAgent(Agent):
         # 简化实现，实际应该进行更复杂的解析
         return {
             "analysis": analysis_result,
-            "genetic_abnormalities": self._extract_genetic_abnormalities(analysis_result),
+            "genetic_abnormalities": self._extract_genetic_abnormalities(analysis_result, candidate_genes),
             "inheritance_pattern": self._extract_inheritance_pattern(analysis_result),
             "recommended_tests": self._extract_recommended_tests(analysis_result),
             "family_risk": self._extract_family_risk(analysis_result)
         }
     
-    def _extract_genetic_abnormalities(self, text: str) -> List[str]:
+    def _extract_genetic_abnormalities(self, text: str, candidate_genes: Optional[List[Dict[str, Any]]] = None) -> List[str]:
         """
         从文本中提取可能的遗传异常
         
         Args:
             text: 分析结果文本
+            candidate_genes: 知识库给出的候选基因，与DEFAULT_CANDIDATE_GENES合并使用
             
         Returns:
             List[str]: 可能的遗传异常列表
@@ -174,14 +184,11 @@ class GeneticAgent(Agent):
         # 简化实现，实际应该使用更复杂的文本分析
         abnormalities = []
         
-        if "IRF6" in text:
-            abnormalities.append("IRF6基因突变")
-        
-        if "TCOF1" in text:
-            abnormalities.append("TCOF1基因突变")
-        
-        if "COL2A1" in text or "COL11A1" in text or "COL11A2" in text:
-            abnormalities.append("胶原蛋白基因突变")
+        # 知识库候选基因只是补充，分析中提到的常见唇腭裂相关基因同样保留
+        genes = list(dict.fromkeys([candidate["gene"] for candidate in candidate_genes or []] + DEFAULT_CANDIDATE_GENES))
+        for gene in genes:
+            if re.search(rf"(?<![A-Za-z0-9]){re.escape(gene)}(?![A-Za-z0-9])", text):
+                abnormalities.append(f"{gene}基因突变")
         
         if "染色体" in text and "缺失" in text:
             abnormalities.append("染色体缺失")
@@ -0,0 +1,226 @@
+"""
+治疗指南时间线组件：解析年龄文本为月龄区间，并为每个疾病的时间线建立区间树，按患者年龄查询到期和即将到来的治疗步骤
+"""
+
+import re
+import unicodedata
+from bisect import bisect_right
+from typing import Dict, List, Optional, Any, Tuple, Union
+
+# 年龄单位 -> 月数
+AGE_UNITS = {
+    "个月": 1.0, "月": 1.0, "months": 1.0, "month": 1.0, "mo": 1.0, "m": 1.0,
+    "岁": 12.0, "周岁": 12.0, "年": 12.0, "years": 12.0, "year": 12.0, "yrs": 12.0, "yr": 12.0, "y": 12.0,
+    "周": 12.0 / 52, "weeks": 12.0 / 52, "week": 12.0 / 52, "wk": 12.0 / 52, "w": 12.0 / 52,
+    "天": 12.0 / 365, "日": 12.0 / 365, "days": 12.0 / 365, "day": 12.0 / 365, "d": 12.0 / 365
+}
+
+# 新生儿期按出生后第一个月计
+NEWBORN_TERMS = ("newborn", "neonate", "neonatal", "at birth", "birth", "新生儿", "新生儿期", "出生时", "出生")
+NEWBORN_INTERVAL = (0.0, 1.0)
+
+# 开放式后缀（"8岁以上"）表示该年龄之后一直适用，"以内"表示从出生到该年龄
+OPEN_END_SUFFIXES = ("以上", "以后", "后")
+WITHIN_SUFFIXES = ("内", "以内")
+
+# "出生后3个月"、"生后2周"等从出生起算的写法，去掉前缀后按年龄值解析
+_BIRTH_PREFIX = re.compile(r"^(?:出生后|生后)\s*(?=\d)")
+_SUFFIX_PATTERN = re.compile(r"\s*(以后|以上|后|以内|内)$")
+
+_UNIT_PATTERN = "|".join(sorted((re.escape(unit) for unit in AGE_UNITS), key=len, reverse=True))
+# 一个年龄值：数字加可选单位，后面可以再跟一段更小的单位或"半"
+# （如"1岁3个月"、"4岁半"、"2y6m"、"2 years and 3 months"、"1岁零3个月"）
+_VALUE_PATTERN = (
+    r"\d+(?:\.\d+)?\s*(?:" + _UNIT_PATTERN + r")?"
+    r"(?:\s*(?:(?:and|,|又|零)\s*)?(?:半|\d+(?:\.\d+)?\s*(?:" + _UNIT_PATTERN + r")))?"
+)
+_AGE_PATTERN = re.compile(
+    r"^(?P<start>" + _VALUE_PATTERN + r")"
+    r"(?:\s*(?:-|~|至|到|to)\s*(?P<end>" + _VALUE_PATTERN + r"))?"
+    r"\s*(?P<suffix>old|大|以后|以上|后|以内|内)?$"
+)
+_TERM_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(" + _UNIT_PATTERN + r")?|半")
+
+
+def _value_months(text: str, default_unit: Optional[str]) -> Tuple[float, Optional[str]]:
+    """
+    计算一个年龄值的月龄，各段相加（"半"按上一段单位的一半计）
+
+    Args:
+        text: 年龄值文本
+        default_unit: 第一段没有单位时使用的单位
+
+    Returns:
+        Tuple[float, Optional[str]]: (月龄, 第一段的单位)
+    """
+    months = 0.0
+    first_unit = None
+    previous_unit = None
+    for term in _TERM_PATTERN.finditer(text):
+        if term.group(0) == "半":
+            months += AGE_UNITS.get(previous_unit, 1.0) / 2
+            continue
+        unit = term.group(2) or (default_unit if previous_unit is None else None)
+        if previous_unit is None:
+            first_unit = term.group(2)
+        months += float(term.group(1)) * AGE_UNITS.get(unit, 1.0)
+        previous_unit = unit
+    return months, first_unit
+
+
+def parse_age_interval(text: Union[str, int, float, None]) -> Optional[Tuple[float, float]]:
+    """
+    将年龄文本解析为月龄闭区间
+
+    支持"6个月"、"4 years"、"1岁3个月"、"2 years and 3 months"、"4岁半"、"3-6个月"、"5-7岁"、"2岁-4岁"、
+    "newborn"、"出生后3个月"等写法；区间只在末尾写单位时两端使用同一单位，没有单位时按月计。数字按月龄处理。
+    "8岁以上"、"3个月后"、"出生后"等开放式写法的结束月龄为无穷大，"3个月内"的起始月龄为0。
+
+    Args:
+        text: 年龄文本或月龄数字
+
+    Returns:
+        Optional[Tuple[float, float]]: (起始月龄, 结束月龄)，无法解析时返回None
+    """
+    if text is None or isinstance(text, bool):
+        return None
+    if isinstance(text, (int, float)):
+        return float(text), float(text)
+
+    key = unicodedata.normalize("NFKC", str(text)).strip().lower()
+    if not key:
+        return None
+    if key in NEWBORN_TERMS:
+        return NEWBORN_INTERVAL
+    # "出生后"、"出生以后"表示从出生起一直适用
+    suffix = _SUFFIX_PATTERN.search(key)
+    if suffix and key[:suffix.start()] in NEWBORN_TERMS:
+        if suffix.group(1) in OPEN_END_SUFFIXES:
+            return 0.0, float("inf")
+        return NEWBORN_INTERVAL
+    key = _BIRTH_PREFIX.sub("", key)
+
+    match = _AGE_PATTERN.match(key)
+    if match is None:
+        return None
+    if match.group("end") is None:
+        start, _ = _value_months(match.group("start"), None)
+        end = start
+    else:
+        end, end_unit = _value_months(match.group("end"), None)
+        start, _ = _value_months(match.group("start"), end_unit)
+        start, end = min(start, end), max(start, end)
+
+    suffix = match.group("suffix")
+    if suffix in OPEN_END_SUFFIXES:
+        return start, float("inf")
+    if suffix in WITHIN_SUFFIXES and match.group("end") is None:
+        return 0.0, end
+    return start, end
+
+
+def parse_age_months(text: Union[str, int, float, None]) -> Optional[float]:
+    """
+    将患者年龄解析为月龄，区间取起始值
+
+    Args:
+        text: 年龄文本或月龄数字
+
+    Returns:
+        Optional[float]: 月龄，无法解析时返回None
+    """
+    interval = parse_age_interval(text)
+    return interval[0] if interval else None
+
+
+class GuidelineTimeline:
+    """
+    单个疾病治疗指南时间线的区间树
+
+    时间线步骤按起始月龄排序后作为隐式平衡二叉树存储（区间[lo, hi)的根为中点），
+    每个节点记录子树内的最大结束月龄。查询某一月龄时，子树最大结束月龄小于该月龄
+    或节点起始月龄大于该月龄的分支整体跳过，复杂度为O(log n + 命中数)；
+    即将到来的步骤即起始月龄大于该月龄的第一段，用二分查找定位。
+    """
+    def __init__(self, timeline: List[Dict[str, Any]]):
+        """
+        解析时间线并构建区间树
+
+        Args:
+            timeline: 治疗指南的timeline列表，每项包含age和treatment
+        """
+        parsed = []
+        self.unparsed: List[Dict[str, Any]] = []  # 年龄无法解析的步骤，不参与按年龄查询
+        for order, step in enumerate(timeline):
+            interval = parse_age_interval(step.get("age"))
+            if interval is None:
+                self.unparsed.append(step)
+            else:
+                parsed.append((interval[0], interval[1], order, step))
+        parsed.sort(key=lambda item: (item[0], item[1], item[2]))
+
+        self.starts = [item[0] for item in parsed]
+        self.ends = [item[1] for item in parsed]
+        self.steps = [item[3] for item in parsed]
+        self.max_ends = list(self.ends)
+        self._build_max_ends(0, len(self.steps))
+
+    def __len__(self) -> int:
+        """已解析的步骤数"""
+        return len(self.steps)
+
+    def _build_max_ends(self, lo: int, hi: int) -> float:
+        """自底向上计算[lo, hi)子树的最大结束月龄"""
+        if lo >= hi:
+            return float("-inf")
+        mid = (lo + hi) // 2
+        self.max_ends[mid] = max(self.ends[mid], self._build_max_ends(lo, mid), self._build_max_ends(mid + 1, hi))
+        return self.max_ends[mid]
+
+    def due(self, age_months: float) -> List[Dict[str, Any]]:
+        """
+        查找覆盖该月龄的步骤
+
+        Args:
+            age_months: 患者月龄
+
+        Returns:
+            List[Dict[str, Any]]: 步骤列表，按起始月龄排序
+        """
+        found = []
+        stack = [(0, len(self.steps))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self.max_ends[mid] < age_months:
+                continue
+            if self.starts[mid] <= age_months:
+                if self.ends[mid] >= age_months:
+                    found.append(mid)
+                stack.append((mid + 1, hi))
+            stack.append((lo, mid))
+        return [self.steps[i] for i in sorted(found)]
+
+    def upcoming(self, age_months: float, limit: int = 1) -> List[Dict[str, Any]]:
+        """
+        查找起始月龄晚于该月龄的最近步骤
+
+        Args:
+            age_months: 患者月龄
+            limit: 返回的起始时间点个数（同一起始月龄的步骤一并返回）
+
+        Returns:
+            List[Dict[str, Any]]: 步骤列表，按起始月龄排序
+        """
+        position = bisect_right(self.starts, age_months)
+        if position >= len(self.starts) or limit <= 0:
+            return []
+        # 取前limit个不同起始月龄的全部步骤
+        end = position
+        for _ in range(limit):
+            if end >= len(self.starts):
+                break
+            end = bisect_right(self.starts, self.starts[end], lo=end)
+        return self.steps[position:end]
@@ -0,0 +1,205 @@
+"""
+知识库守护进程客户端，通过Unix套接字向kb_server批量发送查询
+只依赖标准库，后端服务等不需要加载知识库的进程也可以使用
+"""
+
+import json
+import socket
+import threading
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Any, Tuple, Iterable
+
+# 守护进程支持的查询（与KnowledgeBase的同名方法一致）
+QUERY_OPERATIONS = (
+    "search_syndromes",
+    "search_syndromes_batch",
+    "search_syndromes_page",
+    "search_syndromes_by_phenotype",
+    "rank_syndromes",
+    "next_questions",
+    "semantic_search",
+    "similar_cases",
+    "get_syndrome_info",
+    "get_syndromes_by_symptom",
+    "get_treatment_guideline",
+    "guideline_steps_for",
+    "genetic_workup",
+    "normalize_symptoms"
+)
+
+
+class KnowledgeBaseError(Exception):
+    """守护进程返回的查询错误"""
+    pass
+
+
+class KnowledgeBaseClient:
+    """
+    知识库守护进程客户端
+
+    请求和响应都是一行JSON：请求为{"requests": [{"op": 查询名, "args": {...}}, ...]}，
+    响应为{"results": [{"ok": true, "result": ...} 或 {"ok": false, "error": ...}, ...]}，
+    一次往返可以携带多个查询。连接在多次调用间复用，断开后下次调用自动重连。
+    查询方法与KnowledgeBase同名，并提供与ReloadableKnowledgeBase相同的current/lease/open_writer/start/close接口，
+    可以直接替换进程内知识库。
+    """
+    poll_interval = 0.0  # 由守护进程负责热加载
+
+    def __init__(self, socket_path: str, timeout: float = 10.0):
+        """
+        初始化客户端
+
+        Args:
+            socket_path: 守护进程的Unix套接字路径
+            timeout: 单次往返的超时时间（秒）
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._socket = None
+        self._reader = None
+
+    @property
+    def current(self) -> 'KnowledgeBaseClient':
+        """当前版本的知识库（查询总是发往守护进程的当前版本）"""
+        return self
+
+    def lease(self):
+        """与ReloadableKnowledgeBase接口一致，版本由守护进程在每批查询内固定"""
+        return nullcontext(self)
+
+    def open_writer(self):
+        """守护进程只提供查询，不能通过客户端写入知识库"""
+        raise RuntimeError("知识库通过守护进程只读访问，不能写入；请写入守护进程的知识库目录，由守护进程热加载")
+
+    def start(self) -> None:
+        """与ReloadableKnowledgeBase接口一致，热加载由守护进程负责"""
+        pass
+
+    def _connect(self) -> None:
+        """建立连接"""
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(self.timeout)
+        self._socket.connect(self.socket_path)
+        self._reader = self._socket.makefile("rb")
+
+    def _disconnect(self) -> None:
+        """关闭连接"""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def _round_trip(self, payload: bytes) -> Dict[str, Any]:
+        """发送一行请求并读取一行响应，连接失效时重连一次"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._socket is None:
+                        self._connect()
+                    self._socket.sendall(payload)
+                    line = self._reader.readline()
+                    if not line:
+                        raise ConnectionError("知识库守护进程关闭了连接")
+                    return json.loads(line)
+                except (ConnectionError, BrokenPipeError, socket.timeout, OSError):
+                    self._disconnect()
+                    if attempt == 1:
+                        raise
+
+    def batch(self, requests: Iterable[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """
+        在一次往返中执行多个查询
+
+        Args:
+            requests: (查询名, 参数字典)列表
+
+        Returns:
+            List[Any]: 各查询的结果
+
+        Raises:
+            KnowledgeBaseError: 任一查询失败时
+        """
+        requests = [{"op": op, "args": args} for op, args in requests]
+        payload = json.dumps({"requests": requests}, ensure_ascii=False).encode("utf-8") + b"\n"
+        response = self._round_trip(payload)
+        if "error" in response:
+            raise KnowledgeBaseError(response["error"])
+
+        results = []
+        for request, result in zip(requests, response["results"]):
+            if not result.get("ok"):
+                raise KnowledgeBaseError(f"{request['op']}查询失败: {result.get('error')}")
+            results.append(result["result"])
+        return results
+
+    def call(self, op: str, **args) -> Any:
+        """
+        执行单个查询
+
+        Args:
+            op: 查询名
+            **args: 查询参数
+
+        Returns:
+            Any: 查询结果
+        """
+        return self.batch([(op, args)])[0]
+
+    def __getattr__(self, name: str):
+        """把KnowledgeBase的查询方法转发到守护进程"""
+        if name not in QUERY_OPERATIONS:
+            raise AttributeError(name)
+
+        def query(*args, **kwargs):
+            if args:
+                raise TypeError(f"{name}通过守护进程调用时只支持关键字参数")
+            return self.call(name, **kwargs)
+        return query
+
+    def search_syndromes(self, symptoms: List[str], k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """根据症状列表搜索可能的综合征，k为返回数量（None表示全部）"""
+        return self.call("search_syndromes", symptoms=symptoms, k=k)
+
+    def search_syndromes_page(self, symptoms: List[str], k: int = 10, min_score: float = 0.0, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """分页搜索可能的综合征，只返回ID和分数"""
+        return self.call("search_syndromes_page", symptoms=symptoms, k=k, min_score=min_score, cursor=cursor)
+    
+    def get_syndrome_info(self, syndrome_id: str) -> Dict[str, Any]:
+        """获取综合征信息"""
+        return self.call("get_syndrome_info", syndrome_id=syndrome_id)
+
+    def get_treatment_guideline(self, condition_id: str) -> Dict[str, Any]:
+        """获取治疗指南"""
+        return self.call("get_treatment_guideline", condition_id=condition_id)
+
+    def guideline_steps_for(self, condition_id: str, age: Any, upcoming: int = 1) -> Dict[str, Any]:
+        """按患者年龄查询治疗指南中当前到期和即将到来的步骤"""
+        return self.call("guideline_steps_for", condition_id=condition_id, age=age, upcoming=upcoming)
+
+    def semantic_search(self, text: str, k: int = 5) -> List[Dict[str, Any]]:
+        """语义检索相似的综合征和病例"""
+        return self.call("semantic_search", text=text, k=k)
+
+    def similar_cases(self, patient: Any, k: int = 5) -> List[Dict[str, Any]]:
+        """检索临床特征与患者最相似的文献病例"""
+        return self.call("similar_cases", patient=patient, k=k)
+    
+    def next_questions(self, symptoms: List[str], absent_symptoms: Optional[List[str]] = None, k: int = 5) -> List[Dict[str, Any]]:
+        """推荐最能区分当前候选综合征的待查症状"""
+        return self.call("next_questions", symptoms=symptoms, absent_symptoms=absent_symptoms, k=k)
+
+    def genetic_workup(self, syndrome_ids: List[str], pathogenic_only: bool = True) -> List[Dict[str, Any]]:
+        """查找一组可能综合征的候选基因和已知致病变异"""
+        return self.call("genetic_workup", syndrome_ids=syndrome_ids, pathogenic_only=pathogenic_only)
+
+    def normalize_symptoms(self, symptoms: List[str]) -> List[str]:
+        """使用知识库的症状标准化器批量标准化症状"""
+        return self.call("normalize_symptoms", symptoms=symptoms)
+
+    def close(self) -> None:
+        """关闭连接"""
+        with self._lock:
+            self._disconnect()
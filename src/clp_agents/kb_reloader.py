@@ -0,0 +1,248 @@
+"""
+知识库热加载组件，后台检测数据变化并构建新版本，通过一次引用赋值切换版本
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional, Any, Tuple, Dict, List, Iterator
+
+from .knowledge_base import KnowledgeBase
+
+
+class ReloadableKnowledgeBase:
+    """
+    可热加载的知识库
+
+    后台线程定期比较数据源的版本标记，发现变化时在后台构建新版本（预先构建每次会诊都用到的索引），
+    完成后以一次引用赋值发布，其余索引随后在后台线程上构建。从快照首次加载时不预先构建索引，
+    保持快照按需解码、多进程共享内存页的启动方式。current适合单次查询；需要跨await持有同一版本的读取方（如整个会诊）
+    使用lease()租用当前版本，被替换的旧版本在最后一个租约归还后关闭（释放SQLite连接或快照）。
+    数据源可以是知识库目录（存储引擎）或二进制快照文件。
+    """
+    def __init__(
+        self,
+        knowledge_dir: Optional[str] = None,
+        snapshot_path: Optional[str] = None,
+        poll_interval: float = 5.0
+    ):
+        """
+        初始化并加载第一个版本
+
+        Args:
+            knowledge_dir: 知识库目录，未指定快照时使用
+            snapshot_path: 二进制快照文件路径，指定时从快照加载
+            poll_interval: 后台检测间隔（秒）
+        """
+        self.knowledge_dir = knowledge_dir
+        self.snapshot_path = snapshot_path
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self.last_error = None
+
+        self._reload_lock = threading.Lock()  # 只串行化重新加载，读取不加锁
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # 租约计数：版本号 -> 未归还的租约数；已被替换、等待关闭的旧版本
+        self._lease_lock = threading.Lock()
+        self._leases: Dict[int, int] = {}
+        self._retired: List[Tuple[int, KnowledgeBase]] = []
+
+        knowledge_base = self._build(warm=not snapshot_path)
+        # (版本号, 知识库, 数据源版本标记)作为一个整体发布
+        self._state: Tuple[int, KnowledgeBase, Any] = (1, knowledge_base, self._source_version(knowledge_base))
+
+    @property
+    def current(self) -> KnowledgeBase:
+        """当前版本的知识库"""
+        return self._state[1]
+
+    @property
+    def version(self) -> int:
+        """当前版本号"""
+        return self._state[0]
+
+    @contextmanager
+    def lease(self) -> Iterator[KnowledgeBase]:
+        """
+        租用当前版本的知识库，租约期间该版本即使被替换也不会被关闭
+
+        Returns:
+            ContextManager[KnowledgeBase]: 当前版本的知识库
+        """
+        with self._lease_lock:
+            version, knowledge_base, _ = self._state
+            self._leases[version] = self._leases.get(version, 0) + 1
+        try:
+            yield knowledge_base
+        finally:
+            with self._lease_lock:
+                self._leases[version] -= 1
+                if not self._leases[version]:
+                    del self._leases[version]
+            self._close_drained()
+
+    def _close_drained(self) -> None:
+        """关闭已被替换且没有未归还租约的旧版本"""
+        with self._lease_lock:
+            drained = [kb for version, kb in self._retired if version not in self._leases]
+            self._retired = [(version, kb) for version, kb in self._retired if version in self._leases]
+        for knowledge_base in drained:
+            knowledge_base.close()
+
+    def open_writer(self) -> KnowledgeBase:
+        """
+        在数据源的存储引擎上打开一个可写的知识库（已发布的版本不可修改），
+        写入提交后由check_for_changes或后台线程发布新版本，调用方负责关闭
+
+        Returns:
+            KnowledgeBase: 可写的知识库
+
+        Raises:
+            RuntimeError: 数据源是只读快照时
+        """
+        if self.snapshot_path:
+            raise RuntimeError("知识库从只读快照加载，不能写入；请写入知识库目录后重新生成快照")
+        return KnowledgeBase(self.knowledge_dir)
+
+    def _build(self, warm: bool = True) -> KnowledgeBase:
+        """
+        构建新版本知识库，并预先构建每次会诊都用到的索引，避免切换后第一次查询时在请求路径上构建
+
+        Args:
+            warm: 是否预先构建索引
+
+        Returns:
+            KnowledgeBase: 新版本知识库
+        """
+        if self.snapshot_path:
+            knowledge_base = KnowledgeBase.from_snapshot(self.snapshot_path)
+        else:
+            knowledge_base = KnowledgeBase(self.knowledge_dir)
+        if warm:
+            knowledge_base.normalized_symptom_mapping
+            knowledge_base.syndrome_index
+        return knowledge_base
+
+    def _warm_secondary(self, knowledge_base: KnowledgeBase) -> None:
+        """
+        在发布后构建其余索引（语义检索、相似病例、问诊推荐、基因索引、表型匹配），
+        只在重新加载的线程上执行，失败时保留按需构建
+
+        Args:
+            knowledge_base: 刚发布的知识库版本
+        """
+        try:
+            knowledge_base.vector_index
+            knowledge_base.case_index
+            knowledge_base.question_recommender  # 同时构建bayesian_ranker
+            knowledge_base.gene_index
+            knowledge_base.phenotype_matcher
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"预先构建知识库索引失败: {str(e)}")
+
+    def _source_version(self, knowledge_base: KnowledgeBase) -> Any:
+        """
+        获取数据源的版本标记
+
+        Args:
+            knowledge_base: 当前版本知识库（用于查询其存储引擎）
+
+        Returns:
+            Any: 版本标记
+        """
+        if self.snapshot_path:
+            source = _file_version(self.snapshot_path)
+        else:
+            source = knowledge_base.storage.version()
+        return source, _file_version(os.path.join(knowledge_base.knowledge_dir, 'hp.obo'))
+
+    def check_for_changes(self) -> bool:
+        """
+        检查数据源是否变化，变化时重新加载
+
+        Returns:
+            bool: 是否发布了新版本
+        """
+        _, knowledge_base, source_version = self._state
+        try:
+            changed = self._source_version(knowledge_base) != source_version
+        except Exception as e:
+            self.last_error = str(e)
+            return False
+        return self.reload() if changed else False
+
+    def reload(self) -> bool:
+        """
+        构建新版本并发布，发布后再构建其余索引；构建失败时保留当前版本
+
+        Returns:
+            bool: 是否发布了新版本
+        """
+        with self._reload_lock:
+            try:
+                knowledge_base = self._build()
+                source_version = self._source_version(knowledge_base)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"重新加载知识库失败: {str(e)}")
+                return False
+
+            with self._lease_lock:
+                version, previous, _ = self._state
+                self._state = (version + 1, knowledge_base, source_version)
+                self._retired.append((version, previous))
+            self.reloads += 1
+            self._close_drained()
+            # 持有重新加载锁，刚发布的版本在构建期间不会被替换和关闭
+            self._warm_secondary(knowledge_base)
+        return True
+
+    def start(self) -> None:
+        """启动后台检测线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="kb-reloader", daemon=True)
+        self._thread.start()
+
+    def _watch(self) -> None:
+        """后台检测循环"""
+        while not self._stop_event.wait(self.poll_interval):
+            self.check_for_changes()
+
+    def stop(self) -> None:
+        """停止后台检测线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """停止后台检测并关闭当前版本和已被替换的旧版本"""
+        self.stop()
+        with self._lease_lock:
+            retired = [kb for _, kb in self._retired]
+            self._retired = []
+        for knowledge_base in retired:
+            knowledge_base.close()
+        self.current.close()
+
+
+def _file_version(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    获取文件的版本标记（inode、修改时间、大小），文件不存在时返回None
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        Optional[Tuple[int, int, int]]: 版本标记
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,145 @@
+"""
+知识库守护进程：一个进程加载并热加载知识库，多个工作进程通过Unix套接字批量查询
+工作进程数量增加时知识库内存保持不变，数据变化时只重新加载一次
+"""
+
+import os
+import json
+import asyncio
+import argparse
+from collections.abc import Mapping
+from typing import Dict, List, Any
+
+from .kb_reloader import ReloadableKnowledgeBase
+from .kb_client import QUERY_OPERATIONS
+
+# 单行请求的最大长度（字节）
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+
+def _to_json(value: Any) -> Any:
+    """快照中的只读映射等对象转换为可JSON序列化的值"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+class KnowledgeBaseServer:
+    """
+    知识库守护进程
+
+    每个请求处理时固定使用当时的知识库版本，批量请求中的全部查询看到同一版本；
+    查询在事件循环中直接执行（都是毫秒级的内存查询），保证同一版本上的索引不会被并发构建。
+    """
+    def __init__(self, knowledge_source: ReloadableKnowledgeBase, socket_path: str):
+        """
+        初始化守护进程
+
+        Args:
+            knowledge_source: 可热加载的知识库
+            socket_path: 监听的Unix套接字路径
+        """
+        self.knowledge_source = knowledge_source
+        self.socket_path = socket_path
+        self.requests = 0
+        self._server = None
+
+    def execute(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        在同一知识库版本上执行一批查询
+
+        Args:
+            requests: 查询列表，每项包含op和args
+
+        Returns:
+            List[Dict[str, Any]]: 各查询的结果，失败的查询只影响自身
+        """
+        results = []
+        with self.knowledge_source.lease() as knowledge_base:
+            for request in requests:
+                op = request.get("op")
+                try:
+                    if op not in QUERY_OPERATIONS:
+                        raise ValueError(f"不支持的查询: {op}")
+                    args = request.get("args") or {}
+                    if op == "normalize_symptoms":
+                        result = knowledge_base.normalizer.normalize_all(args["symptoms"])
+                    else:
+                        result = getattr(knowledge_base, op)(**args)
+                    results.append({"ok": True, "result": result})
+                except Exception as e:
+                    results.append({"ok": False, "error": f"{type(e).__name__}: {str(e)}"})
+        self.requests += len(requests)
+        return results
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理一个连接上的请求，每行一个批量请求"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = {"results": self.execute(json.loads(line)["requests"])}
+                except Exception as e:
+                    response = {"error": f"无效的请求: {str(e)}"}
+                writer.write(json.dumps(response, ensure_ascii=False, default=_to_json).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> None:
+        """开始监听（套接字文件已存在时先删除）"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path, limit=MAX_REQUEST_BYTES)
+        if self.knowledge_source.poll_interval > 0:
+            self.knowledge_source.start()
+
+    async def serve_forever(self) -> None:
+        """启动并持续服务"""
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """停止监听、关闭知识库并删除套接字文件"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self.knowledge_source.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def main() -> None:
+    """命令行入口：启动知识库守护进程"""
+    parser = argparse.ArgumentParser(description="启动知识库守护进程")
+    parser.add_argument("--socket", default=os.environ.get("CLP_KB_SOCKET", "/tmp/clp_kb.sock"), help="Unix套接字路径")
+    parser.add_argument("--knowledge-dir", default=None, help="知识库目录，默认为data/knowledge")
+    parser.add_argument("--snapshot", default=os.environ.get("CLP_KB_SNAPSHOT"), help="二进制快照文件路径")
+    parser.add_argument("--reload-interval", type=float, default=float(os.environ.get("CLP_KB_RELOAD_INTERVAL", "5")), help="热加载检测间隔（秒），0表示不检测")
+    args = parser.parse_args()
+
+    knowledge_source = ReloadableKnowledgeBase(
+        knowledge_dir=args.knowledge_dir,
+        snapshot_path=args.snapshot if args.snapshot and os.path.exists(args.snapshot) else None,
+        poll_interval=args.reload_interval
+    )
+    server = KnowledgeBaseServer(knowledge_source, args.socket)
+    print(f"知识库守护进程已启动: {args.socket}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        knowledge_source.close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+知识库二进制快照组件，将知识库编译为可内存映射的紧凑格式，用于快速启动和多进程共享
+
+文件布局（小端序）：
+    头部：魔数、版本号、段数量，以及每个段的(偏移, 长度)
+    meta: 元数据JSON（HPO映射、各类数量）
+    string_offsets/string_data: 字符串表，第i个字符串为string_data[offsets[i]:offsets[i+1]]
+    syndrome_ids/syndrome_order: 综合征ID在字符串表中的序号（录入顺序）及按ID排序的排列
+    symptom_ids: 标准症状在字符串表中的序号（按字符串排序，即关联矩阵的行顺序）
+    indptr/indices/symptom_counts: 症状-综合征关联矩阵（CSR）
+    syndrome_record_offsets: 各综合征记录在records中的偏移
+    guideline_ids/guideline_order/guideline_record_offsets: 治疗指南的ID、排序排列和记录偏移
+    records: 记录区，每条记录为UTF-8编码的JSON，访问时才解码
+"""
+
+import os
+import mmap
+import json
+import struct
+import argparse
+from collections.abc import Mapping, Sequence
+from typing import Dict, List, Optional, Any, Iterator
+
+import numpy as np
+
+from .syndrome_index import SyndromeIndex
+
+MAGIC = b"CLPKBSN1"
+VERSION = 1
+_HEADER = struct.Struct("<8sII")
+_SECTION = struct.Struct("<QQ")
+
+# 段名称及其数据类型（None表示原始字节）
+SECTIONS = (
+    ("meta", None),
+    ("string_offsets", np.uint64),
+    ("string_data", None),
+    ("syndrome_ids", np.uint32),
+    ("syndrome_order", np.uint32),
+    ("symptom_ids", np.uint32),
+    ("indptr", np.int64),
+    ("indices", np.int32),
+    ("symptom_counts", np.int32),
+    ("syndrome_record_offsets", np.uint64),
+    ("guideline_ids", np.uint32),
+    ("guideline_order", np.uint32),
+    ("guideline_record_offsets", np.uint64),
+    ("records", None)
+)
+
+
+def write_snapshot(
+    path: str,
+    syndrome_data: Dict[str, Dict[str, Any]],
+    symptom_mapping: Dict[str, List[str]],
+    treatment_guidelines: Dict[str, Dict[str, Any]],
+    meta: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    编译并写入快照文件；先写临时文件再原子替换，正在映射旧文件的进程不受影响
+
+    Args:
+        path: 快照文件路径
+        syndrome_data: 综合征数据
+        symptom_mapping: 标准化后的症状映射，标准症状 -> 综合征ID列表
+        treatment_guidelines: 治疗指南数据
+        meta: 附加元数据（需可JSON序列化）
+    """
+    symptom_mapping = {symptom: symptom_mapping[symptom] for symptom in sorted(symptom_mapping)}
+    index = SyndromeIndex.build(syndrome_data, symptom_mapping)
+
+    syndrome_ids = list(syndrome_data.keys())
+    symptoms = list(symptom_mapping.keys())
+    guideline_ids = list(treatment_guidelines.keys())
+    strings = syndrome_ids + symptoms + guideline_ids
+    encoded = [s.encode("utf-8") for s in strings]
+
+    syndrome_start, symptom_start = 0, len(syndrome_ids)
+    guideline_start = symptom_start + len(symptoms)
+
+    # 记录区：先综合征后治疗指南
+    records = []
+    syndrome_offsets = [0]
+    for syndrome_id in syndrome_ids:
+        records.append(json.dumps(syndrome_data[syndrome_id], ensure_ascii=False).encode("utf-8"))
+        syndrome_offsets.append(syndrome_offsets[-1] + len(records[-1]))
+    guideline_offsets = [syndrome_offsets[-1]]
+    for condition_id in guideline_ids:
+        records.append(json.dumps(treatment_guidelines[condition_id], ensure_ascii=False).encode("utf-8"))
+        guideline_offsets.append(guideline_offsets[-1] + len(records[-1]))
+
+    meta = dict(meta or {}, syndromes=len(syndrome_ids), symptoms=len(symptoms), guidelines=len(guideline_ids))
+    sections = {
+        "meta": json.dumps(meta, ensure_ascii=False).encode("utf-8"),
+        "string_offsets": np.concatenate(([0], np.cumsum([len(b) for b in encoded]))).astype(np.uint64),
+        "string_data": b"".join(encoded),
+        "syndrome_ids": np.arange(syndrome_start, symptom_start, dtype=np.uint32),
+        "syndrome_order": np.array(sorted(range(len(syndrome_ids)), key=syndrome_ids.__getitem__), dtype=np.uint32),
+        "symptom_ids": np.arange(symptom_start, guideline_start, dtype=np.uint32),
+        "indptr": index.indptr.astype(np.int64),
+        "indices": index.indices.astype(np.int32),
+        "symptom_counts": index.symptom_counts.astype(np.int32),
+        "syndrome_record_offsets": np.array(syndrome_offsets, dtype=np.uint64),
+        "guideline_ids": np.arange(guideline_start, len(strings), dtype=np.uint32),
+        "guideline_order": np.array(sorted(range(len(guideline_ids)), key=guideline_ids.__getitem__), dtype=np.uint32),
+        "guideline_record_offsets": np.array(guideline_offsets, dtype=np.uint64),
+        "records": b"".join(records)
+    }
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        offset = _HEADER.size + _SECTION.size * len(SECTIONS)
+        table = []
+        for name, _ in SECTIONS:
+            data = sections[name]
+            data = data if isinstance(data, bytes) else data.tobytes()
+            offset += -offset % 8  # 每段按8字节对齐
+            table.append((offset, len(data)))
+            offset += len(data)
+
+        f.write(_HEADER.pack(MAGIC, VERSION, len(SECTIONS)))
+        for entry in table:
+            f.write(_SECTION.pack(*entry))
+        for (name, _), (start, _) in zip(SECTIONS, table):
+            data = sections[name]
+            f.write(b"\0" * (start - f.tell()))
+            f.write(data if isinstance(data, bytes) else data.tobytes())
+    os.replace(tmp_path, path)
+
+
+class KnowledgeSnapshot:
+    """
+    只读的知识库快照，通过mmap映射文件，数组直接引用映射内存，记录在访问时才解码
+    """
+    def __init__(self, path: str):
+        """
+        打开快照文件
+
+        Args:
+            path: 快照文件路径
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or count != len(SECTIONS):
+            self._mm.close()
+            raise ValueError(f"不是有效的知识库快照文件: {path}")
+
+        self._sections = {}
+        for i, (name, dtype) in enumerate(SECTIONS):
+            offset, length = _SECTION.unpack_from(self._mm, _HEADER.size + i * _SECTION.size)
+            if dtype is None:
+                self._sections[name] = (offset, length)
+            else:
+                self._sections[name] = np.frombuffer(self._mm, dtype=dtype, count=length // np.dtype(dtype).itemsize, offset=offset)
+
+        self.meta = json.loads(self._raw("meta"))
+        self._string_offsets = self._sections["string_offsets"]
+        self._string_base = self._sections["string_data"][0]
+        self._records_base = self._sections["records"][0]
+
+        self.syndrome_ids = SnapshotStrings(self, self._sections["syndrome_ids"])
+        self.symptoms = SnapshotStrings(self, self._sections["symptom_ids"])
+        self.syndromes = SnapshotRecords(
+            self, self.syndrome_ids, self._sections["syndrome_order"], self._sections["syndrome_record_offsets"]
+        )
+        self.guidelines = SnapshotRecords(
+            self, SnapshotStrings(self, self._sections["guideline_ids"]),
+            self._sections["guideline_order"], self._sections["guideline_record_offsets"]
+        )
+        self.symptom_mapping = SnapshotSymptomMapping(self)
+
+    def _raw(self, name: str) -> bytes:
+        """读取原始字节段"""
+        offset, length = self._sections[name]
+        return self._mm[offset:offset + length]
+
+    def string(self, string_id: int) -> str:
+        """
+        解码字符串表中的字符串
+
+        Args:
+            string_id: 字符串序号
+
+        Returns:
+            str: 字符串
+        """
+        start = self._string_base + int(self._string_offsets[string_id])
+        end = self._string_base + int(self._string_offsets[string_id + 1])
+        return self._mm[start:end].decode("utf-8")
+
+    def record(self, start: int, end: int) -> Any:
+        """
+        解码记录区中的一条记录
+
+        Args:
+            start: 记录起始偏移
+            end: 记录结束偏移
+
+        Returns:
+            Any: 解码后的记录
+        """
+        return json.loads(self._mm[self._records_base + start:self._records_base + end])
+
+    def symptom_row(self, symptom: str) -> Optional[int]:
+        """
+        二分查找标准症状所在的行
+
+        Args:
+            symptom: 标准症状名称
+
+        Returns:
+            Optional[int]: 行号，不存在时返回None
+        """
+        return _bisect(self.symptoms, None, symptom)
+
+    def build_index(self) -> SyndromeIndex:
+        """
+        用快照中的CSR数组构建关联矩阵，不复制数据
+
+        Returns:
+            SyndromeIndex: 关联矩阵
+        """
+        return SyndromeIndex(
+            self.syndrome_ids,
+            self.symptoms,
+            self._sections["indptr"],
+            self._sections["indices"],
+            self._sections["symptom_counts"],
+            symptom_pos=_SymptomPositions(self)
+        )
+
+    def close(self) -> None:
+        """关闭内存映射；仍有数组引用映射内存时，映射在这些数组释放后由垃圾回收关闭"""
+        self._sections = {}
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
+
+
+def _bisect(keys: "SnapshotStrings", order: Optional[np.ndarray], key: str) -> Optional[int]:
+    """
+    在按字符串排序的键中二分查找
+
+    Args:
+        keys: 键序列
+        order: 排序排列（keys[order[i]]递增），None表示keys本身有序
+        key: 要查找的键
+
+    Returns:
+        Optional[int]: 键在keys中的位置，不存在时返回None
+    """
+    lo, hi = 0, len(keys)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        pos = mid if order is None else int(order[mid])
+        value = keys[pos]
+        if value == key:
+            return pos
+        if value < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return None
+
+
+class SnapshotStrings(Sequence):
+    """快照中的字符串序列，按需解码"""
+    def __init__(self, snapshot: KnowledgeSnapshot, string_ids: np.ndarray):
+        self._snapshot = snapshot
+        self._string_ids = string_ids
+
+    def __len__(self) -> int:
+        return len(self._string_ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._snapshot.string(int(s)) for s in self._string_ids[i]]
+        return self._snapshot.string(int(self._string_ids[i]))
+
+
+class SnapshotRecords(Mapping):
+    """快照中的记录集合（ID -> 记录），按ID二分查找，访问时解码"""
+    def __init__(self, snapshot: KnowledgeSnapshot, keys: SnapshotStrings, order: np.ndarray, offsets: np.ndarray):
+        self._snapshot = snapshot
+        self._keys = keys
+        self._order = order
+        self._offsets = offsets
+
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        pos = _bisect(self._keys, self._order, key)
+        if pos is None:
+            raise KeyError(key)
+        return self._snapshot.record(int(self._offsets[pos]), int(self._offsets[pos + 1]))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class SnapshotSymptomMapping(Mapping):
+    """快照中的标准症状映射（症状 -> 综合征ID列表），由关联矩阵的行还原"""
+    def __init__(self, snapshot: KnowledgeSnapshot):
+        self._snapshot = snapshot
+
+    def __getitem__(self, symptom: str) -> List[str]:
+        row = self._snapshot.symptom_row(symptom)
+        if row is None:
+            raise KeyError(symptom)
+        indptr = self._snapshot._sections["indptr"]
+        columns = self._snapshot._sections["indices"][indptr[row]:indptr[row + 1]]
+        return [self._snapshot.syndrome_ids[int(c)] for c in columns]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.symptoms)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.symptoms)
+
+
+class _SymptomPositions(Mapping):
+    """关联矩阵使用的症状 -> 行号映射"""
+    def __init__(self, snapshot: KnowledgeSnapshot):
+        self._snapshot = snapshot
+
+    def __getitem__(self, symptom: str) -> int:
+        row = self._snapshot.symptom_row(symptom)
+        if row is None:
+            raise KeyError(symptom)
+        return row
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.symptoms)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.symptoms)
+
+
+def main() -> None:
+    """命令行入口：将知识库目录编译为快照文件"""
+    from .knowledge_base import KnowledgeBase
+
+    parser = argparse.ArgumentParser(description="编译知识库二进制快照")
+    parser.add_argument("output", help="快照文件路径")
+    parser.add_argument("--knowledge-dir", default=None, help="知识库目录，默认为data/knowledge")
+    args = parser.parse_args()
+
+    knowledge_base = KnowledgeBase(args.knowledge_dir)
+    knowledge_base.save_snapshot(args.output)
+    knowledge_base.close()
+    print(f"知识库快照已写入: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,27 +4,64 @@
 
 import os
 import json
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Iterable
 import asyncio
 
+from .syndrome_index import SyndromeIndex
+from .phenotype_ontology import PhenotypeOntology, PhenotypeMatcher
+from .symptom_normalizer import SymptomNormalizer
+from .knowledge_store import KnowledgeStore, COLLECTION_FILES, DEFAULT_KNOWLEDGE_DIR, create_knowledge_store
+from .bulk_import import iter_records, SYNDROME, GUIDELINE, GENE_LINK
+from .kb_snapshot import KnowledgeSnapshot, write_snapshot
+from .vector_index import HashingEmbedder, VectorIndex
+from .guideline_timeline import GuidelineTimeline, parse_age_months
+from .gene_index import GeneIndex
+from .bayes_ranker import BayesianRanker
+from .question_recommender import QuestionRecommender
+from .case_index import CaseIndex, is_labeled
+from .record_loader import read_records, CASE_SCHEMA
+
+# 公开病例数据，用于语义检索相似病例
+DEFAULT_CASES_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'CLP_cases.json')
+
 class KnowledgeBase:
     """
     知识库基类，提供医学知识支持
     """
-    def __init__(self, knowledge_dir: str = None):
+    def __init__(self, knowledge_dir: str = None, storage: Optional[KnowledgeStore] = None, cases_file: Optional[str] = None):
         """
         初始化知识库
         
         Args:
             knowledge_dir: 知识库文件目录
+            storage: 存储引擎，默认使用知识库目录下的SQLite数据库（knowledge.db）
+            cases_file: 病例数据文件，默认为项目根目录下的CLP_cases.json
         """
-        self.knowledge_dir = knowledge_dir or os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'knowledge')
+        self.knowledge_dir = knowledge_dir or DEFAULT_KNOWLEDGE_DIR
         self.syndrome_data = {}
         self.symptom_mapping = {}
         self.treatment_guidelines = {}
+        self._syndrome_index = None  # 症状-综合征关联矩阵，数据变更后重建
+        self._normalized_mapping = None  # 按标准症状名称合并后的症状映射，数据变更后重建
+        self.normalizer = SymptomNormalizer()  # 症状标准化器，知识库中的症状会登记为标准症状
+        self.hpo_mapping = {}
+        self._phenotype_ontology = None  # 人类表型本体，知识库目录中存在hp.obo时加载
+        self._phenotype_matcher = None  # 表型相似度打分器，数据变更后重建
+        self.snapshot = None  # 从二进制快照打开时为只读快照
+        self.cases_file = cases_file or DEFAULT_CASES_FILE
+        self._vector_index = None  # 综合征描述和病例的向量索引，数据变更后重建
+        self._vector_documents = {}
+        self._embedder = None
+        self._guideline_timelines = {}  # 疾病ID -> 治疗指南时间线区间树，按需构建，指南变更后清空
+        self.clinvar_variants = {}  # 本地缓存的ClinVar变异摘要，变异ID -> 摘要
+        self._gene_index = None  # 基因-综合征-变异交叉索引，数据变更后重建
+        self._bayesian_ranker = None  # 贝叶斯鉴别诊断排序器，数据变更后重建
+        self._question_recommender = None  # 问诊推荐器，数据变更后重建
+        self._case_index = None  # 相似病例MinHash LSH索引，数据变更后重建
         
         # 确保知识库目录存在
         os.makedirs(self.knowledge_dir, exist_ok=True)
+        self.storage = storage or create_knowledge_store(self.knowledge_dir)
         
         # 加载知识库数据
         self._load_knowledge()
@@ -34,17 +71,236 @@ class KnowledgeBase:
         self._load_syndrome_data()
         self._load_symptom_mapping()
         self._load_treatment_guidelines()
+        self._load_hpo_mapping()
+        self.clinvar_variants = self._load_collection("clinvar_variants", "ClinVar变异缓存")
+        self.normalizer.add_terms(self.symptom_mapping.keys())
+        self._syndrome_index = None
+        self._normalized_mapping = None
+        self._phenotype_ontology = None
+        self._phenotype_matcher = None
+        self._vector_index = None
+        self._guideline_timelines = {}
+        self._gene_index = None
+        self._bayesian_ranker = None
+        self._question_recommender = None
+        self._case_index = None
+    
+    @property
+    def phenotype_matcher(self) -> Optional[PhenotypeMatcher]:
+        """表型相似度打分器，知识库目录中没有hp.obo时为None"""
+        if self._phenotype_matcher is None:
+            obo_file = os.path.join(self.knowledge_dir, 'hp.obo')
+            if not os.path.exists(obo_file):
+                return None
+            if self._phenotype_ontology is None:
+                self._phenotype_ontology = PhenotypeOntology(obo_file, self.hpo_mapping)
+            self._phenotype_matcher = PhenotypeMatcher(self._phenotype_ontology, self.syndrome_data)
+        return self._phenotype_matcher
+    
+    @property
+    def vector_index(self) -> VectorIndex:
+        """综合征描述和病例临床特征的向量索引，首次使用时构建"""
+        if self._vector_index is None:
+            documents = {}
+            texts = []
+            for syndrome_id, info in self.syndrome_data.items():
+                documents[syndrome_id] = ("syndrome", info)
+                texts.append(" ".join([info.get("name", ""), info.get("description", "")] + info.get("symptoms", [])))
+            for case in self._load_cases():
+                documents[f"case:{case['case_id']}"] = ("case", case)
+                texts.append(" ".join(case.get("clinical_features", []) + [case.get("diagnosis", "")]))
+            
+            self._embedder = HashingEmbedder(normalizer=self.normalizer)
+            self._vector_documents = documents
+            self._vector_index = VectorIndex(list(documents.keys()), self._embedder.embed_batch(texts))
+        return self._vector_index
+    
+    def _load_cases(self) -> List[Dict[str, Any]]:
+        """流式加载病例数据，跳过不符合格式的记录，文件不存在或无法解析时返回空列表"""
+        if not os.path.exists(self.cases_file):
+            return []
+        errors = []
+        try:
+            cases = list(read_records(self.cases_file, CASE_SCHEMA, errors))
+        except Exception as e:
+            print(f"加载病例数据失败: {str(e)}")
+            return []
+        for error in errors:
+            print(f"跳过无效的病例记录: {str(error)}")
+        return [case for case in cases if case["case_id"]]
+    
+    @property
+    def gene_index(self) -> GeneIndex:
+        """基因-综合征-变异交叉索引，首次使用时构建"""
+        if self._gene_index is None:
+            self._gene_index = GeneIndex(self.syndrome_data, self.clinvar_variants)
+        return self._gene_index
+    
+    @property
+    def bayesian_ranker(self) -> BayesianRanker:
+        """贝叶斯鉴别诊断排序器（先验和似然表），首次使用时编译"""
+        if self._bayesian_ranker is None:
+            self._bayesian_ranker = BayesianRanker.build(
+                self.syndrome_index,
+                self.syndrome_data,
+                lambda symptom: self.normalizer.normalize(symptom) or symptom
+            )
+        return self._bayesian_ranker
+    
+    @property
+    def question_recommender(self) -> QuestionRecommender:
+        """问诊推荐器（含病例症状共现统计），首次使用时构建"""
+        if self._question_recommender is None:
+            self._question_recommender = QuestionRecommender(
+                self.bayesian_ranker,
+                [self.normalizer.normalize_all(case.get("clinical_features", [])) for case in self._load_cases()]
+            )
+        return self._question_recommender
+    
+    @property
+    def case_index(self) -> CaseIndex:
+        """文献病例的MinHash LSH相似病例索引（只包含有诊断的病例），首次使用时构建"""
+        if self._case_index is None:
+            self._case_index = CaseIndex([case for case in self._load_cases() if is_labeled(case)], self.normalizer)
+        return self._case_index
+    
+    @property
+    def syndrome_index(self) -> SyndromeIndex:
+        """症状-综合征关联矩阵，首次使用时构建"""
+        if self._syndrome_index is None:
+            self._syndrome_index = SyndromeIndex.build(self.syndrome_data, self.normalized_symptom_mapping)
+        return self._syndrome_index
+    
+    @property
+    def normalized_symptom_mapping(self) -> Dict[str, List[str]]:
+        """按标准症状名称合并后的症状映射（如"小下颌"并入"下颌发育不全"），首次使用时构建"""
+        if self._normalized_mapping is None:
+            self._normalized_mapping = self._build_normalized_mapping(self.symptom_mapping)
+        return self._normalized_mapping
+    
+    def _build_normalized_mapping(self, symptom_mapping: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        把症状映射的键标准化，合并同义症状的综合征列表
+        
+        Args:
+            symptom_mapping: 症状映射，症状 -> 综合征ID列表
+            
+        Returns:
+            Dict[str, List[str]]: 标准症状名称 -> 综合征ID列表
+        """
+        mapping = {}
+        seen = {}
+        for symptom, syndrome_ids in symptom_mapping.items():
+            canonical = self.normalizer.normalize(symptom) or symptom
+            merged = mapping.setdefault(canonical, [])
+            merged_ids = seen.setdefault(canonical, set())
+            for syndrome_id in syndrome_ids:
+                if syndrome_id not in merged_ids:
+                    merged_ids.add(syndrome_id)
+                    merged.append(syndrome_id)
+        return mapping
+    
+    def _load_collection(self, collection: str, label: str) -> Dict[str, Any]:
+        """
+        从存储引擎读取一个数据集合；存储中没有数据而目录中有旧版JSON文件时，导入该文件
+        
+        Args:
+            collection: 集合名称
+            label: 用于错误信息的数据名称
+            
+        Returns:
+            Dict[str, Any]: 集合数据，读取失败时为空字典
+        """
+        try:
+            data = self.storage.load(collection)
+            legacy_file = os.path.join(self.knowledge_dir, COLLECTION_FILES[collection])
+            if not data and os.path.exists(legacy_file):
+                with open(legacy_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.storage.put_many(collection, data.items())
+            return data
+        except Exception as e:
+            print(f"加载{label}失败: {str(e)}")
+            return {}
+    
+    @classmethod
+    def from_snapshot(cls, snapshot_path: str) -> 'KnowledgeBase':
+        """
+        从二进制快照打开只读知识库
+        
+        快照通过内存映射打开，不解析JSON也不写任何文件，多个进程打开同一快照时共享物理内存；
+        综合征和治疗指南记录在访问时才解码。
+        
+        Args:
+            snapshot_path: 快照文件路径（由save_snapshot生成）
+            
+        Returns:
+            KnowledgeBase: 只读知识库
+        """
+        snapshot = KnowledgeSnapshot(snapshot_path)
+        knowledge_base = cls.__new__(cls)
+        knowledge_base.knowledge_dir = os.path.dirname(os.path.abspath(snapshot_path))
+        knowledge_base.storage = None
+        knowledge_base.snapshot = snapshot
+        knowledge_base.syndrome_data = snapshot.syndromes
+        knowledge_base.symptom_mapping = snapshot.symptom_mapping
+        knowledge_base.treatment_guidelines = snapshot.guidelines
+        knowledge_base.hpo_mapping = snapshot.meta.get("hpo_mapping", {})
+        knowledge_base.clinvar_variants = snapshot.meta.get("clinvar_variants", {})
+        knowledge_base.normalizer = SymptomNormalizer()
+        knowledge_base.normalizer.add_terms(snapshot.symptom_mapping.keys())
+        knowledge_base._normalized_mapping = snapshot.symptom_mapping
+        knowledge_base._syndrome_index = snapshot.build_index()
+        knowledge_base._phenotype_ontology = None
+        knowledge_base._phenotype_matcher = None
+        knowledge_base.cases_file = DEFAULT_CASES_FILE
+        knowledge_base._vector_index = None
+        knowledge_base._vector_documents = {}
+        knowledge_base._embedder = None
+        knowledge_base._guideline_timelines = {}
+        knowledge_base._gene_index = None
+        knowledge_base._bayesian_ranker = None
+        knowledge_base._question_recommender = None
+        knowledge_base._case_index = None
+        return knowledge_base
+    
+    def save_snapshot(self, snapshot_path: Optional[str] = None) -> str:
+        """
+        将当前知识库编译为二进制快照
+        
+        Args:
+            snapshot_path: 快照文件路径，默认为知识库目录下的knowledge.snapshot
+            
+        Returns:
+            str: 快照文件路径
+        """
+        snapshot_path = snapshot_path or os.path.join(self.knowledge_dir, 'knowledge.snapshot')
+        write_snapshot(
+            snapshot_path,
+            dict(self.syndrome_data),
+            dict(self.normalized_symptom_mapping),
+            dict(self.treatment_guidelines),
+            meta={"hpo_mapping": dict(self.hpo_mapping), "clinvar_variants": dict(self.clinvar_variants)}
+        )
+        return snapshot_path
+    
+    def _ensure_writable(self) -> None:
+        """从快照打开的知识库不允许修改"""
+        if self.storage is None:
+            raise RuntimeError("知识库从只读快照打开，不能修改")
+    
+    def close(self) -> None:
+        """关闭存储引擎或快照"""
+        if self.storage is not None:
+            self.storage.close()
+        if self.snapshot is not None:
+            self._syndrome_index = None
+            self.snapshot.close()
     
     def _load_syndrome_data(self) -> None:
         """加载综合征数据"""
-        syndrome_file = os.path.join(self.knowledge_dir, 'syndromes.json')
-        if os.path.exists(syndrome_file):
-            try:
-                with open(syndrome_file, 'r', encoding='utf-8') as f:
-                    self.syndrome_data = json.load(f)
-            except Exception as e:
-                print(f"加载综合征数据失败: {str(e)}")
-        else:
+        self.syndrome_data = self._load_collection("syndromes", "综合征数据")
+        if not self.syndrome_data:
             # 创建默认综合征数据
             self.syndrome_data = {
                 "van_der_woude_syndrome": {
@@ -80,14 +336,8 @@ class KnowledgeBase:
     
     def _load_symptom_mapping(self) -> None:
         """加载症状映射数据"""
-        mapping_file = os.path.join(self.knowledge_dir, 'symptom_mapping.json')
-        if os.path.exists(mapping_file):
-            try:
-                with open(mapping_file, 'r', encoding='utf-8') as f:
-                    self.symptom_mapping = json.load(f)
-            except Exception as e:
-                print(f"加载症状映射数据失败: {str(e)}")
-        else:
+        self.symptom_mapping = self._load_collection("symptom_mapping", "症状映射数据")
+        if not self.symptom_mapping:
             # 创建默认症状映射
             self.symptom_mapping = {
                 "唇裂": ["van_der_woude_syndrome", "stickler_syndrome"],
@@ -106,14 +356,8 @@ class KnowledgeBase:
     
     def _load_treatment_guidelines(self) -> None:
         """加载治疗指南数据"""
-        guidelines_file = os.path.join(self.knowledge_dir, 'treatment_guidelines.json')
-        if os.path.exists(guidelines_file):
-            try:
-                with open(guidelines_file, 'r', encoding='utf-8') as f:
-                    self.treatment_guidelines = json.load(f)
-            except Exception as e:
-                print(f"加载治疗指南数据失败: {str(e)}")
-        else:
+        self.treatment_guidelines = self._load_collection("treatment_guidelines", "治疗指南数据")
+        if not self.treatment_guidelines:
             # 创建默认治疗指南
             self.treatment_guidelines = {
                 "non_syndromic_cleft_lip": {
@@ -152,30 +396,56 @@ class KnowledgeBase:
             # 保存默认数据
             self._save_treatment_guidelines()
     
+    def _load_hpo_mapping(self) -> None:
+        """加载症状到HPO术语的映射数据"""
+        self.hpo_mapping = self._load_collection("hpo_mapping", "HPO映射数据")
+        if not self.hpo_mapping:
+            # 创建默认HPO映射（英文症状可直接按HPO术语名称和同义词匹配）
+            self.hpo_mapping = {
+                "唇裂": "HP:0410030",
+                "单侧唇裂": "HP:0100333",
+                "双侧唇裂": "HP:0100336",
+                "腭裂": "HP:0000175",
+                "唇腭裂": "HP:0000202",
+                "下唇凹陷": "HP:0000196",
+                "缺牙": "HP:0009804",
+                "下颌发育不全": "HP:0000347",
+                "小下颌": "HP:0000347",
+                "颧骨发育不全": "HP:0000272",
+                "耳廓畸形": "HP:0000377",
+                "眼睑下垂": "HP:0000508",
+                "近视": "HP:0000545",
+                "视网膜脱离": "HP:0000541",
+                "关节疼痛": "HP:0002829"
+            }
+            # 保存默认数据
+            self._save_hpo_mapping()
+    
     def _save_syndrome_data(self) -> None:
         """保存综合征数据"""
-        syndrome_file = os.path.join(self.knowledge_dir, 'syndromes.json')
         try:
-            with open(syndrome_file, 'w', encoding='utf-8') as f:
-                json.dump(self.syndrome_data, f, ensure_ascii=False, indent=2)
+            self.storage.put_many("syndromes", self.syndrome_data.items())
         except Exception as e:
             print(f"保存综合征数据失败: {str(e)}")
     
     def _save_symptom_mapping(self) -> None:
         """保存症状映射数据"""
-        mapping_file = os.path.join(self.knowledge_dir, 'symptom_mapping.json')
         try:
-            with open(mapping_file, 'w', encoding='utf-8') as f:
-                json.dump(self.symptom_mapping, f, ensure_ascii=False, indent=2)
+            self.storage.put_many("symptom_mapping", self.symptom_mapping.items())
         except Exception as e:
             print(f"保存症状映射数据失败: {str(e)}")
     
+    def _save_hpo_mapping(self) -> None:
+        """保存HPO映射数据"""
+        try:
+            self.storage.put_many("hpo_mapping", self.hpo_mapping.items())
+        except Exception as e:
+            print(f"保存HPO映射数据失败: {str(e)}")
+    
     def _save_treatment_guidelines(self) -> None:
         """保存治疗指南数据"""
-        guidelines_file = os.path.join(self.knowledge_dir, 'treatment_guidelines.json')
         try:
-            with open(guidelines_file, 'w', encoding='utf-8') as f:
-                json.dump(self.treatment_guidelines, f, ensure_ascii=False, indent=2)
+            self.storage.put_many("treatment_guidelines", self.treatment_guidelines.items())
         except Exception as e:
             print(f"保存治疗指南数据失败: {str(e)}")
     
@@ -196,12 +466,13 @@ class KnowledgeBase:
         根据症状获取可能的综合征
         
         Args:
-            symptom: 症状名称
+            symptom: 症状名称（自由文本，会先标准化）
             
         Returns:
             List[str]: 可能的综合征ID列表
         """
-        return self.symptom_mapping.get(symptom, [])
+        canonical = self.normalizer.normalize(symptom) or symptom
+        return self.normalized_symptom_mapping.get(canonical, [])
     
     def get_treatment_guideline(self, condition_id: str) -> Dict[str, Any]:
         """
@@ -215,6 +486,36 @@ class KnowledgeBase:
         """
         return self.treatment_guidelines.get(condition_id, {})
     
+    def guideline_steps_for(self, condition_id: str, age: Any, upcoming: int = 1) -> Dict[str, Any]:
+        """
+        按患者年龄查询治疗指南中当前到期和即将到来的步骤
+        
+        Args:
+            condition_id: 疾病或综合征ID
+            age: 患者年龄，如"8个月"、"4 years"、"newborn"，或月龄数字
+            upcoming: 返回的后续时间点个数
+            
+        Returns:
+            Dict[str, Any]: age_months（解析出的月龄，无法解析时为None）、due（覆盖该年龄的步骤）、
+                upcoming（之后最近的步骤）和unparsed（年龄写法无法解析、不能按年龄定位的步骤，需要人工判断）；
+                没有该指南时步骤列表都为空，年龄无法解析时due和upcoming为空
+        """
+        age_months = parse_age_months(age)
+        result = {"age_months": age_months, "due": [], "upcoming": [], "unparsed": []}
+        timeline = self._guideline_timelines.get(condition_id)
+        if timeline is None:
+            guideline = self.treatment_guidelines.get(condition_id)
+            if not guideline:
+                return result
+            timeline = GuidelineTimeline(guideline.get("timeline", []))
+            self._guideline_timelines[condition_id] = timeline
+        
+        result["unparsed"] = list(timeline.unparsed)
+        if age_months is not None:
+            result["due"] = timeline.due(age_months)
+            result["upcoming"] = timeline.upcoming(age_months, upcoming)
+        return result
+    
     def add_syndrome(self, syndrome_id: str, syndrome_info: Dict[str, Any]) -> None:
         """
         添加综合征信息
@@ -223,18 +524,80 @@ class KnowledgeBase:
             syndrome_id: 综合征ID
             syndrome_info: 综合征信息
         """
-        self.syndrome_data[syndrome_id] = syndrome_info
+        self.add_syndromes({syndrome_id: syndrome_info})
+    
+    def add_syndromes(self, syndromes: Dict[str, Dict[str, Any]]) -> None:
+        """
+        批量添加综合征信息，在一个事务中写入综合征和变化的症状映射条目
+        
+        存储写入成功后才更新内存数据并重建索引，写入失败时知识库保持原状。
+        
+        Args:
+            syndromes: 综合征ID -> 综合征信息
+        """
+        self._ensure_writable()
+        with self.storage.transaction():
+            changed_mapping = self._write_symptom_mapping(syndromes)
+            self.storage.put_many("syndromes", syndromes.items())
+        
+        self.syndrome_data.update(syndromes)
+        self._apply_symptom_mapping(self.symptom_mapping, changed_mapping)
+        self._syndrome_index = None
+        self._normalized_mapping = None
+        self._phenotype_matcher = None
+        self._vector_index = None
+        self._gene_index = None
+        self._bayesian_ranker = None
+        self._question_recommender = None
+        self._case_index = None
+    
+    def _write_symptom_mapping(self, syndromes: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+        """
+        在存储中更新新综合征涉及的症状映射条目，须在写入综合征之前、同一存储事务内调用
+        
+        以存储中的条目为准而不是内存中的映射：其他进程可能已向同一症状写入了综合征，
+        事务持有写锁，读取和写回之间不会被其他写入者覆盖。已存在的综合征重新导入时，
+        从其不再包含的症状条目中移除该综合征，条目为空时删除。
+        
+        Args:
+            syndromes: 综合征ID -> 综合征信息
+            
+        Returns:
+            Dict[str, List[str]]: 变化的症状映射条目，已删除的条目为空列表
+        """
+        previous = self.storage.get_many("syndromes", syndromes.keys())
+        stale = {}
+        for syndrome_id, info in previous.items():
+            for symptom in set(info.get("symptoms", [])) - set(syndromes[syndrome_id].get("symptoms", [])):
+                stale.setdefault(symptom, set()).add(syndrome_id)
         
-        # 更新症状映射
-        for symptom in syndrome_info.get("symptoms", []):
-            if symptom not in self.symptom_mapping:
-                self.symptom_mapping[symptom] = []
-            if syndrome_id not in self.symptom_mapping[symptom]:
-                self.symptom_mapping[symptom].append(syndrome_id)
+        symptoms = {symptom for info in syndromes.values() for symptom in info.get("symptoms", [])}
+        stored = self.storage.get_many("symptom_mapping", symptoms | stale.keys())
+        changed_mapping = {
+            symptom: [syndrome_id for syndrome_id in stored.get(symptom, []) if syndrome_id not in removed]
+            for symptom, removed in stale.items()
+        }
+        for syndrome_id, info in syndromes.items():
+            for symptom in info.get("symptoms", []):
+                if symptom not in changed_mapping:
+                    changed_mapping[symptom] = list(stored.get(symptom, []))
+                if syndrome_id not in changed_mapping[symptom]:
+                    changed_mapping[symptom].append(syndrome_id)
         
-        # 保存数据
-        self._save_syndrome_data()
-        self._save_symptom_mapping()
+        self.storage.put_many("symptom_mapping", [(symptom, ids) for symptom, ids in changed_mapping.items() if ids])
+        for symptom, syndrome_ids in changed_mapping.items():
+            if not syndrome_ids and symptom in stored:
+                self.storage.delete("symptom_mapping", symptom)
+        return changed_mapping
+    
+    def _apply_symptom_mapping(self, symptom_mapping: Dict[str, List[str]], changed_mapping: Dict[str, List[str]]) -> None:
+        """把_write_symptom_mapping返回的变化条目应用到内存中的症状映射，并在提交后登记新症状"""
+        for symptom, syndrome_ids in changed_mapping.items():
+            if syndrome_ids:
+                symptom_mapping[symptom] = syndrome_ids
+            else:
+                symptom_mapping.pop(symptom, None)
+        self.normalizer.add_terms(symptom for symptom, syndrome_ids in changed_mapping.items() if syndrome_ids)
     
     def add_treatment_guideline(self, condition_id: str, guideline: Dict[str, Any]) -> None:
         """
@@ -244,49 +607,354 @@ class KnowledgeBase:
             condition_id: 疾病或综合征ID
             guideline: 治疗指南
         """
+        self._ensure_writable()
+        self.storage.put("treatment_guidelines", condition_id, guideline)
         self.treatment_guidelines[condition_id] = guideline
-        self._save_treatment_guidelines()
+        self._guideline_timelines.pop(condition_id, None)
+    
+    def cache_clinvar_variants(self, variants: Iterable[Dict[str, Any]]) -> int:
+        """
+        缓存ClinVar变异摘要（如APIIntegration.search_gene_variant的结果，由CLPAgentSystem.refresh_variant_cache拉取），
+        之后的遗传学检查不再需要联网
+        
+        Args:
+            variants: 变异摘要列表，每项需包含id
+            
+        Returns:
+            int: 缓存的变异数
+        """
+        self._ensure_writable()
+        variants = {str(variant["id"]): variant for variant in variants if variant.get("id")}
+        self.storage.put_many("clinvar_variants", variants.items())
+        self.clinvar_variants.update(variants)
+        self._gene_index = None
+        self._bayesian_ranker = None
+        self._question_recommender = None
+        self._case_index = None
+        return len(variants)
     
-    def search_syndromes(self, symptoms: List[str]) -> List[Dict[str, Any]]:
+    def genetic_workup(self, syndrome_ids: List[str], pathogenic_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        查找一组可能综合征的候选基因和已知致病变异
+        
+        Args:
+            syndrome_ids: 综合征ID列表
+            pathogenic_only: 是否只返回致病/可能致病变异
+            
+        Returns:
+            List[Dict[str, Any]]: 候选基因列表，每项包含gene、syndromes和variants
+        """
+        return self.gene_index.candidate_genes(syndrome_ids, pathogenic_only)
+    
+    def bulk_load(self, stream: Iterable[str], fmt: Optional[str] = None, record_type: Optional[str] = None) -> Dict[str, int]:
+        """
+        从NDJSON/CSV数据流批量导入综合征、治疗指南和基因关联
+        
+        导入期间不写存储也不维护索引：先在内存中汇总全部记录，在一个存储事务中写入并合并症状映射，
+        提交后一次性重建各索引并整体替换内存数据；任何记录解析失败（包括基因关联指向不存在的综合征）时
+        知识库保持原状。
+        
+        记录格式：
+            syndrome: id, name, description, symptoms, genes, inheritance, prevalence, references
+            guideline: condition_id, name, timeline（CSV中每行一个age、treatment）, follow_up, references
+            gene_link: syndrome_id, gene
+        CSV中的列表字段用分号或竖线分隔。
+        
+        Args:
+            stream: 文本行的可迭代对象（如打开的文件）
+            fmt: "ndjson"或"csv"，None表示自动判断
+            record_type: 记录中没有type字段时使用的记录类型
+            
+        Returns:
+            Dict[str, int]: 各类型导入的记录数
+            
+        Raises:
+            ValueError: 记录缺少必填字段，或基因关联的syndrome_id既不在本次导入中也不在知识库中
+        """
+        self._ensure_writable()
+        counts = {SYNDROME: 0, GUIDELINE: 0, GENE_LINK: 0}
+        syndromes = {}
+        guidelines = {}
+        gene_links = []
+        for kind, record in iter_records(stream, fmt, record_type):
+            counts[kind] += 1
+            if kind == SYNDROME:
+                syndromes[self._require(record, "id", kind)] = record
+            elif kind == GUIDELINE:
+                # CSV中同一指南的多行合并为一条，时间点按出现顺序追加
+                merged = guidelines.setdefault(self._require(record, "condition_id", kind), {"timeline": []})
+                timeline = record.pop("timeline", [])
+                merged.update(record)
+                merged["timeline"].extend(timeline)
+            else:
+                gene_links.append((self._require(record, "syndrome_id", kind), self._require(record, "gene", kind)))
+        
+        # 指向未知综合征的基因关联（多为ID拼写错误）在写入前整体报错，不静默跳过
+        unknown = sorted({
+            syndrome_id for syndrome_id, _ in gene_links
+            if syndrome_id not in syndromes and syndrome_id not in self.syndrome_data
+        })
+        if unknown:
+            raise ValueError(f"{GENE_LINK}记录引用了不存在的综合征: {', '.join(unknown)}")
+        
+        # 基因关联写入对应综合征（复制后修改，不影响正在使用的数据）
+        for syndrome_id, gene in gene_links:
+            if syndrome_id not in syndromes:
+                syndromes[syndrome_id] = dict(self.syndrome_data[syndrome_id])
+            info = syndromes[syndrome_id]
+            if gene not in info.get("genes", []):
+                info["genes"] = info.get("genes", []) + [gene]
+        
+        # 症状映射在事务内按存储中的最新条目一次性合并
+        with self.storage.transaction():
+            changed_mapping = self._write_symptom_mapping(syndromes)
+            self.storage.put_many("syndromes", syndromes.items())
+            self.storage.put_many("treatment_guidelines", guidelines.items())
+        
+        # 提交成功后才登记新症状和重建索引
+        syndrome_data = dict(self.syndrome_data)
+        syndrome_data.update(syndromes)
+        symptom_mapping = dict(self.symptom_mapping)
+        self._apply_symptom_mapping(symptom_mapping, changed_mapping)
+        treatment_guidelines = dict(self.treatment_guidelines)
+        treatment_guidelines.update(guidelines)
+        normalized_mapping = self._build_normalized_mapping(symptom_mapping)
+        syndrome_index = SyndromeIndex.build(syndrome_data, normalized_mapping)
+        
+        # 发布新数据和索引
+        self.syndrome_data = syndrome_data
+        self.symptom_mapping = symptom_mapping
+        self.treatment_guidelines = treatment_guidelines
+        self._normalized_mapping = normalized_mapping
+        self._syndrome_index = syndrome_index
+        self._phenotype_matcher = None
+        self._vector_index = None
+        self._guideline_timelines = {}
+        self._gene_index = None
+        self._bayesian_ranker = None
+        self._question_recommender = None
+        self._case_index = None
+        return counts
+    
+    @staticmethod
+    def _require(record: Dict[str, Any], field: str, kind: str) -> str:
+        """取出记录的必填字段，缺失时抛出ValueError"""
+        value = record.pop(field, None)
+        if not value:
+            raise ValueError(f"{kind}记录缺少{field}字段: {record}")
+        return value
+    
+    def search_syndromes(self, symptoms: List[str], k: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         根据症状列表搜索可能的综合征
         
         Args:
             symptoms: 症状列表
+            k: 返回数量，None表示全部匹配的综合征（只需要前几项时应传入k，避免为全部结果组装综合征信息）
             
         Returns:
             List[Dict[str, Any]]: 可能的综合征列表，按匹配度排序
         """
-        # 计算每个综合征的匹配度
-        syndrome_scores = {}
-        for symptom in symptoms:
-            syndrome_ids = self.get_syndromes_by_symptom(symptom)
-            for syndrome_id in syndrome_ids:
-                if syndrome_id not in syndrome_scores:
-                    syndrome_scores[syndrome_id] = 0
-                syndrome_scores[syndrome_id] += 1
+        index = self.syndrome_index
+        symptoms = self.normalizer.normalize_all(symptoms)
+        return self._build_search_results(index.top_k(index.match_counts(symptoms), k))
+    
+    def search_syndromes_page(
+        self,
+        symptoms: List[str],
+        k: int = 10,
+        min_score: float = 0.0,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        分页搜索可能的综合征，只返回ID和分数，需要展示的综合征再通过get_syndrome_info获取完整信息
+        
+        Args:
+            symptoms: 症状列表
+            k: 每页数量
+            min_score: 匹配度百分比下限
+            cursor: 上一页返回的next_cursor，None表示第一页
+            
+        Returns:
+            Dict[str, Any]: hits为本页结果（id、score即匹配度百分比、matched_symptoms、total_symptoms），
+                next_cursor为下一页游标，没有更多结果时为None
+            
+        Raises:
+            ValueError: 游标格式无效时
+        """
+        index = self.syndrome_index
+        after = None
+        if cursor:
+            # 游标为上一页最后一项的"匹配度:综合征ID"，数据变更后该综合征不存在时从同分数的第一项继续
+            try:
+                score, syndrome_id = cursor.split(":", 1)
+                after = (float(score), index.syndrome_pos.get(syndrome_id, -1))
+            except ValueError:
+                raise ValueError(f"无效的分页游标: {cursor}")
+        
+        # 多取一项用于判断是否还有下一页
+        matches = index.select(index.match_counts(self.normalizer.normalize_all(symptoms)), k + 1, min_score, after)
+        hits = [
+            {"id": syndrome_id, "score": percentage, "matched_symptoms": matched, "total_symptoms": total}
+            for syndrome_id, matched, total, percentage in matches[:k]
+        ]
+        next_cursor = f"{hits[-1]['score']!r}:{hits[-1]['id']}" if len(matches) > k and hits else None
+        return {"hits": hits, "next_cursor": next_cursor}
+    
+    def search_syndromes_batch(self, symptom_lists: List[List[str]], k: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """
+        批量搜索多位患者可能的综合征，所有患者在一次矩阵运算中完成打分
+        
+        Args:
+            symptom_lists: 每位患者的症状列表
+            k: 每位患者返回的综合征数量，None表示全部
+            
+        Returns:
+            List[List[Dict[str, Any]]]: 每位患者可能的综合征列表，按匹配度排序
+        """
+        index = self.syndrome_index
+        counts = index.match_counts_batch([self.normalizer.normalize_all(symptoms) for symptoms in symptom_lists])
+        return [self._build_search_results(index.top_k(row, k)) for row in counts]
+    
+    def rank_syndromes(self, symptoms: List[str], absent_symptoms: Optional[List[str]] = None, k: Optional[int] = 10) -> List[Dict[str, Any]]:
+        """
+        按贝叶斯后验概率对综合征做鉴别诊断排序
+        
+        先验来自患病率（prevalence），似然来自症状出现频率（symptom_frequencies，未标注时取默认频率）；
+        综合征列出但患者未提及的症状会降低该综合征的后验。
+        
+        Args:
+            symptoms: 已观察到的症状
+            absent_symptoms: 明确排除的症状
+            k: 返回数量，None表示全部
+            
+        Returns:
+            List[Dict[str, Any]]: 综合征列表，按后验概率降序，posterior为在知识库收录综合征范围内归一化的后验概率
+        """
+        ranked = self.bayesian_ranker.top_k(
+            self.normalizer.normalize_all(symptoms),
+            self.normalizer.normalize_all(absent_symptoms or []),
+            k
+        )
+        return [
+            {
+                "id": syndrome_id,
+                "info": self.get_syndrome_info(syndrome_id),
+                "posterior": posterior,
+                "log_score": log_score
+            }
+            for syndrome_id, posterior, log_score in ranked
+        ]
+    
+    def next_questions(self, symptoms: List[str], absent_symptoms: Optional[List[str]] = None, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        推荐最能区分当前候选综合征的待查症状（期望信息增益最高）
+        
+        Args:
+            symptoms: 已观察到的症状
+            absent_symptoms: 已排除的症状
+            k: 返回数量
+            
+        Returns:
+            List[Dict[str, Any]]: 每项包含symptom、information_gain（比特）、probability（预计存在的概率）
+                和case_support（病例中与已观察症状的共现次数），按信息增益降序
+        """
+        return self.question_recommender.recommend(
+            self.normalizer.normalize_all(symptoms),
+            self.normalizer.normalize_all(absent_symptoms or []),
+            k
+        )
+    
+    def similar_cases(self, patient: Any, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        检索临床特征与患者最相似的有诊断的文献病例（MinHash LSH召回，精确Jaccard相似度排序）
+        
+        Args:
+            patient: 症状列表，或包含symptoms字段的患者数据
+            k: 返回数量
+            
+        Returns:
+            List[Dict[str, Any]]: 每项包含case_id、diagnosis、similarity（Jaccard相似度）、
+                shared_features（共同特征）和info（病例记录），按相似度降序
+        """
+        symptoms = patient.get("symptoms", []) if isinstance(patient, dict) else patient
+        return [
+            {
+                "case_id": match["case"]["case_id"],
+                "diagnosis": str(match["case"].get("diagnosis", "")).strip(),
+                "similarity": match["similarity"],
+                "shared_features": match["shared_features"],
+                "info": match["case"]
+            }
+            for match in self.case_index.query(symptoms, k)
+        ]
+    
+    def search_syndromes_by_phenotype(self, symptoms: List[str], k: int = 10) -> List[Dict[str, Any]]:
+        """
+        基于HPO本体语义相似度（Resnik/BMA）搜索可能的综合征，
+        可以匹配"双侧唇裂"与"唇裂"这类上下位症状；没有本体文件时退回精确匹配搜索
+        
+        Args:
+            symptoms: 症状列表（中文症状、英文HPO术语名称或HPO ID）
+            k: 返回的综合征数量
+            
+        Returns:
+            List[Dict[str, Any]]: 可能的综合征列表，按相似度排序，similarity字段为BMA相似度
+        """
+        matcher = self.phenotype_matcher
+        if matcher is None:
+            return self.search_syndromes(symptoms, k)
         
-        # 获取综合征详细信息并按匹配度排序
         results = []
-        for syndrome_id, score in syndrome_scores.items():
-            syndrome_info = self.get_syndrome_info(syndrome_id)
-            if syndrome_info:
-                # 计算匹配度百分比
-                total_symptoms = len(syndrome_info.get("symptoms", []))
-                if total_symptoms > 0:
-                    match_percentage = (score / total_symptoms) * 100
-                else:
-                    match_percentage = 0
-                
-                results.append({
-                    "id": syndrome_id,
-                    "info": syndrome_info,
-                    "matched_symptoms": score,
-                    "total_symptoms": total_symptoms,
-                    "match_percentage": match_percentage
-                })
-        
-        # 按匹配度百分比降序排序
-        results.sort(key=lambda x: x["match_percentage"], reverse=True)
+        for syndrome_id, similarity in matcher.top_k(self.normalizer.normalize_all(symptoms), k):
+            results.append({
+                "id": syndrome_id,
+                "info": self.get_syndrome_info(syndrome_id),
+                "similarity": similarity
+            })
+        return results
+    
+    def semantic_search(self, text: str, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        语义检索与自由文本（如病史、家族史）相似的综合征和病例
         
+        Args:
+            text: 自由文本
+            k: 返回数量
+            
+        Returns:
+            List[Dict[str, Any]]: 检索结果，包含id、type（syndrome或case）、score（余弦相似度）、info，
+                以及文本中提到（未被否定）且该综合征或病例也具有的标准症状matched_concepts，按相似度降序
+        """
+        index = self.vector_index
+        concepts = set(self.normalizer.extract(text))
+        results = []
+        for doc_id, score in index.search(self._embedder.embed(text), k):
+            if score <= 0:
+                continue
+            doc_type, info = self._vector_documents[doc_id]
+            features = info.get("symptoms", []) if doc_type == "syndrome" else info.get("clinical_features", [])
+            matched = [concept for concept in self.normalizer.normalize_all(features) if concept in concepts]
+            results.append({"id": doc_id, "type": doc_type, "score": score, "info": info, "matched_concepts": matched})
         return results
+    
+    def _build_search_results(self, matches: List[Tuple[str, int, int, float]]) -> List[Dict[str, Any]]:
+        """
+        将关联矩阵的匹配结果转换为搜索结果
+        
+        Args:
+            matches: (综合征ID, 匹配症状数, 症状总数, 匹配度百分比)列表
+            
+        Returns:
+            List[Dict[str, Any]]: 搜索结果列表
+        """
+        return [
+            {
+                "id": syndrome_id,
+                "info": self.get_syndrome_info(syndrome_id),
+                "matched_symptoms": matched,
+                "total_symptoms": total,
+                "match_percentage": percentage
+            }
+            for syndrome_id, matched, total, percentage in matches
+        ]
@@ -0,0 +1,325 @@
+"""
+知识库存储引擎，提供按条目读写、批量事务写入的持久化接口
+默认使用WAL模式的SQLite，另保留兼容旧版本的JSON文件存储
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Iterable, Tuple
+
+# 默认知识库目录（项目根目录下的data/knowledge）
+DEFAULT_KNOWLEDGE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'knowledge')
+
+# 各数据集合对应的旧版JSON文件名
+COLLECTION_FILES = {
+    "syndromes": "syndromes.json",
+    "symptom_mapping": "symptom_mapping.json",
+    "treatment_guidelines": "treatment_guidelines.json",
+    "hpo_mapping": "hpo_mapping.json",
+    "clinvar_variants": "clinvar_variants.json"
+}
+
+
+class KnowledgeStore(ABC):
+    """
+    知识库存储引擎基类
+
+    数据按集合（如syndromes、symptom_mapping）组织，每个集合是键到JSON值的映射。
+    transaction()内的写入要么全部生效，要么全部回滚；事务外的写入立即提交。
+    子类必须实现全部抽象方法，缺少任何一个时在实例化时就会报错。
+    """
+    @abstractmethod
+    def load(self, collection: str) -> Dict[str, Any]:
+        """
+        读取整个集合
+
+        Args:
+            collection: 集合名称
+
+        Returns:
+            Dict[str, Any]: 键 -> 值
+        """
+
+    @abstractmethod
+    def get_many(self, collection: str, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        读取集合中的指定条目；在transaction()内调用时读到的是当前已提交的最新数据，
+        可在同一事务中据此合并后写回（读-改-写期间其他写入者被阻塞）
+
+        Args:
+            collection: 集合名称
+            keys: 键
+
+        Returns:
+            Dict[str, Any]: 存在的键 -> 值
+        """
+
+    @abstractmethod
+    def put_many(self, collection: str, items: Iterable[Tuple[str, Any]]) -> None:
+        """
+        批量写入条目，已存在的键会被覆盖
+
+        Args:
+            collection: 集合名称
+            items: (键, 值)序列
+        """
+
+    def put(self, collection: str, key: str, value: Any) -> None:
+        """
+        写入单个条目
+
+        Args:
+            collection: 集合名称
+            key: 键
+            value: 值（可JSON序列化）
+        """
+        self.put_many(collection, [(key, value)])
+
+    @abstractmethod
+    def delete(self, collection: str, key: str) -> None:
+        """
+        删除单个条目
+
+        Args:
+            collection: 集合名称
+            key: 键
+        """
+
+    @abstractmethod
+    def transaction(self):
+        """
+        批量事务（上下文管理器），可嵌套，只有最外层事务结束时才提交
+
+        Returns:
+            ContextManager[None]: 事务上下文
+        """
+
+    @abstractmethod
+    def version(self) -> Any:
+        """
+        获取数据版本标记，其他写入者修改数据后该标记会变化，用于检测是否需要重新加载
+
+        Returns:
+            Any: 可比较的版本标记
+        """
+
+    def close(self) -> None:
+        """关闭存储"""
+
+
+class SQLiteKnowledgeStore(KnowledgeStore):
+    """
+    基于SQLite的存储引擎
+
+    使用WAL日志模式，读操作不阻塞写操作；多个进程同时写入时由SQLite的锁和忙等待超时串行化。
+    每个条目单独存储为一行，单条更新只写入变化的行。
+    """
+    def __init__(self, db_path: str, busy_timeout: float = 5.0):
+        """
+        初始化SQLite存储
+
+        Args:
+            db_path: 数据库文件路径
+            busy_timeout: 等待其他写入者释放锁的超时时间（秒）
+        """
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._depth = 0
+
+        # 手动管理事务（isolation_level=None），连接可在线程间共享，访问由锁串行化
+        self._conn = sqlite3.connect(db_path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "collection TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (collection, key)) WITHOUT ROWID"
+        )
+
+    def load(self, collection: str) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM entries WHERE collection = ?", (collection,)
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def get_many(self, collection: str, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        rows = []
+        with self._lock:
+            # 分批查询，避免超过SQLite的参数个数上限
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows.extend(self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE collection = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [collection] + chunk
+                ).fetchall())
+        return {key: json.loads(value) for key, value in rows}
+
+    def put_many(self, collection: str, items: Iterable[Tuple[str, Any]]) -> None:
+        rows = [(collection, key, json.dumps(value, ensure_ascii=False)) for key, value in items]
+        with self.transaction():
+            self._conn.executemany("INSERT OR REPLACE INTO entries (collection, key, value) VALUES (?, ?, ?)", rows)
+
+    def delete(self, collection: str, key: str) -> None:
+        with self.transaction():
+            self._conn.execute("DELETE FROM entries WHERE collection = ? AND key = ?", (collection, key))
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self._lock:
+            if self._depth == 0:
+                # 立即获取写锁，避免事务中途因锁升级失败
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            if self._depth == 1:
+                # 提交成功后才退出事务；提交失败（如SQLITE_BUSY）时回滚，连接不会停留在未结束的事务中
+                try:
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._depth -= 1
+                    if self._conn.in_transaction:
+                        self._conn.execute("ROLLBACK")
+                    raise
+            self._depth -= 1
+
+    def version(self) -> Any:
+        # data_version只在其他连接（包括其他进程）提交后变化，本连接自身的写入已同步到内存，无需重新加载
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JSONKnowledgeStore(KnowledgeStore):
+    """
+    基于JSON文件的存储引擎（兼容旧版本的文件布局），每个集合一个文件
+
+    写入时整体重写文件，通过临时文件加原子替换保证文件不会写坏；
+    事务内的多次写入合并为事务结束时的一次写文件。适合数据量小、只有单个写入者的场景。
+    """
+    def __init__(self, knowledge_dir: str):
+        """
+        初始化JSON文件存储
+
+        Args:
+            knowledge_dir: 知识库文件目录
+        """
+        self.knowledge_dir = knowledge_dir
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self._snapshot: Dict[str, Dict[str, Any]] = {}
+        self._dirty = set()
+
+    def _path(self, collection: str) -> str:
+        """集合对应的文件路径"""
+        return os.path.join(self.knowledge_dir, COLLECTION_FILES.get(collection, f"{collection}.json"))
+
+    def _collection(self, collection: str) -> Dict[str, Any]:
+        """获取集合的内存副本，首次访问时从文件读取"""
+        if collection not in self._data:
+            path = self._path(collection)
+            data = {}
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            self._data[collection] = data
+        return self._data[collection]
+
+    def load(self, collection: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._collection(collection))
+
+    def get_many(self, collection: str, keys: Iterable[str]) -> Dict[str, Any]:
+        with self._lock:
+            data = self._collection(collection)
+            return {key: data[key] for key in keys if key in data}
+
+    def put_many(self, collection: str, items: Iterable[Tuple[str, Any]]) -> None:
+        with self.transaction():
+            self._touch(collection).update(items)
+
+    def delete(self, collection: str, key: str) -> None:
+        with self.transaction():
+            self._touch(collection).pop(key, None)
+
+    def _touch(self, collection: str) -> Dict[str, Any]:
+        """标记集合在当前事务中被修改，首次修改时保存回滚副本"""
+        data = self._collection(collection)
+        if collection not in self._dirty:
+            self._snapshot[collection] = dict(data)
+            self._dirty.add(collection)
+        return data
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self._lock:
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    for collection in self._dirty:
+                        self._data[collection] = self._snapshot[collection]
+                    self._dirty.clear()
+                    self._snapshot.clear()
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._flush()
+
+    def version(self) -> Any:
+        stats = []
+        for filename in sorted(COLLECTION_FILES.values()):
+            try:
+                stat = os.stat(os.path.join(self.knowledge_dir, filename))
+                stats.append((filename, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stats.append((filename, None, None))
+        return tuple(stats)
+
+    def _flush(self) -> None:
+        """将修改过的集合原子地写回文件"""
+        try:
+            for collection in self._dirty:
+                path = self._path(collection)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._data[collection], f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, path)
+        finally:
+            self._dirty.clear()
+            self._snapshot.clear()
+
+
+def create_knowledge_store(knowledge_dir: str, engine: str = "sqlite") -> KnowledgeStore:
+    """
+    创建知识库存储引擎
+
+    Args:
+        knowledge_dir: 知识库文件目录
+        engine: 存储引擎，"sqlite"或"json"
+
+    Returns:
+        KnowledgeStore: 存储引擎
+    """
+    if engine == "sqlite":
+        return SQLiteKnowledgeStore(os.path.join(knowledge_dir, "knowledge.db"))
+    if engine == "json":
+        return JSONKnowledgeStore(knowledge_dir)
+    raise ValueError(f"未知的知识库存储引擎: {engine}")
@@ -0,0 +1,208 @@
+"""
+语言模型客户端，调用兼容OpenAI接口的聊天补全服务
+"""
+
+import os
+import time
+import asyncio
+from typing import Dict, List, Optional, Any
+import aiohttp
+
+from .cassette import Cassette
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, LLMUnavailableError
+from . import telemetry
+
+class LLMClient:
+    """
+    聊天补全API客户端，所有智能体通过该客户端调用语言模型
+    """
+    DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: float = 60.0,
+        max_retries: int = 2,
+        retry_backoff: float = 0.5,
+        cassette: Optional[Cassette] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        初始化语言模型客户端
+
+        Args:
+            api_key: API密钥（可选）
+            base_url: API基础地址，默认读取OPENAI_BASE_URL环境变量
+            timeout: 单次请求超时时间（秒）
+            max_retries: 429、5xx和超时时的最大重试次数
+            retry_backoff: 重试的基础退避时间（秒），按指数增长
+            cassette: 录制/回放cassette（可选）
+            circuit_breaker: 熔断器（可选），打开时直接抛出CircuitOpenError
+        """
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.base_url = (base_url or os.environ.get("OPENAI_BASE_URL") or self.DEFAULT_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.cassette = cassette
+        self.circuit_breaker = circuit_breaker
+        self.session = None
+
+    async def ensure_session(self):
+        """确保会话已创建"""
+        if not self.session:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+    async def close(self):
+        """关闭会话"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        **kwargs: Any
+    ) -> str:
+        """
+        调用聊天补全接口
+
+        Args:
+            messages: 消息历史
+            model: 模型名称
+            temperature: 生成文本的随机性参数
+            **kwargs: 其他请求参数，如max_tokens
+
+        Returns:
+            str: 语言模型的回复
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            **kwargs
+        }
+
+        data = await self.complete(payload)
+        return data["choices"][0]["message"]["content"]
+
+    async def complete(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        发送聊天补全请求，配置cassette时经由cassette录制或回放，配置熔断器时统计调用结果
+
+        Args:
+            payload: 请求体
+
+        Returns:
+            Dict[str, Any]: 接口返回的完整响应
+
+        Raises:
+            LLMUnavailableError: 服务不可用（包括熔断器打开时的CircuitOpenError），只有这类错误计入熔断统计
+        """
+        if self.circuit_breaker and not self.circuit_breaker.allow_request():
+            raise CircuitOpenError("语言模型服务熔断中，请求已被拒绝")
+
+        stats = {"retries": 0}
+        start = time.perf_counter()
+
+        try:
+            if self.cassette:
+                data = await self.cassette.call("llm", payload, lambda: self._send(payload, stats))
+                cache_hit = self.cassette.mode == Cassette.REPLAY
+            else:
+                data = await self._send(payload, stats)
+                cache_hit = False
+        except asyncio.CancelledError:
+            # 调用方取消请求不代表服务异常
+            if self.circuit_breaker:
+                self.circuit_breaker.release()
+            self._record_call(payload, None, start, stats, False, "cancelled")
+            raise
+        except BaseException as e:
+            # 只有服务不可用计为失败；请求本身的错误（如400、401、404）不反映服务状态
+            if self.circuit_breaker:
+                if isinstance(e, LLMUnavailableError):
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.release()
+            self._record_call(payload, None, start, stats, False, f"{type(e).__name__}: {str(e)[:200]}")
+            raise
+
+        if self.circuit_breaker:
+            self.circuit_breaker.record_success(time.perf_counter() - start)
+
+        self._record_call(payload, data.get("usage"), start, stats, cache_hit)
+        return data
+
+    @staticmethod
+    def _record_call(
+        payload: Dict[str, Any],
+        usage: Optional[Dict[str, Any]],
+        start: float,
+        stats: Dict[str, int],
+        cache_hit: bool,
+        error: Optional[str] = None
+    ) -> None:
+        """将一次调用（包括失败的调用及其重试次数）记录到调用轨迹"""
+        telemetry.record_llm_call(
+            payload.get("model", ""),
+            usage,
+            time.perf_counter() - start,
+            retries=stats["retries"],
+            cache_hit=cache_hit,
+            error=error
+        )
+
+    async def _send(self, payload: Dict[str, Any], stats: Dict[str, int]) -> Dict[str, Any]:
+        """
+        发送HTTP请求，429、5xx和超时按指数退避重试
+
+        Args:
+            payload: 请求体
+            stats: 调用统计，重试次数写入retries
+
+        Returns:
+            Dict[str, Any]: 接口返回的完整响应
+
+        Raises:
+            LLMUnavailableError: 超时、连接失败，或429、5xx在重试后仍未恢复
+            RuntimeError: 接口返回其他错误状态（请求本身有误，不重试）
+        """
+        await self.ensure_session()
+
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                async with self.session.post(f"{self.base_url}/chat/completions", json=payload, headers=headers) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    
+                    text = await response.text()
+                    if response.status != 429 and response.status < 500:
+                        raise RuntimeError(f"语言模型API返回错误 {response.status}: {text[:200]}")
+                    error = LLMUnavailableError(f"语言模型API返回错误 {response.status}: {text[:200]}")
+                    retry_after = response.headers.get("Retry-After")
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                error = LLMUnavailableError(f"语言模型API请求失败: {type(e).__name__}: {str(e)}")
+                error.__cause__ = e
+            
+            if attempt >= self.max_retries:
+                raise error
+            
+            delay = self.retry_backoff * (2 ** attempt)
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            attempt += 1
+            stats["retries"] = attempt
+            await asyncio.sleep(delay)
@@ -0,0 +1,380 @@
+"""
+模拟语言模型服务，提供兼容OpenAI接口的聊天补全端点，用于压力测试和调优
+可配置响应延迟分布、429限流、超时和截断输出
+
+用法: python -m clp_agents.mock_llm_server --port 8089 --config mock_llm.json
+然后设置 OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from typing import Dict, List, Optional, Any
+from aiohttp import web
+
+# 各智能体角色的模拟回复，内容覆盖各智能体解析函数使用的关键词
+ROLE_RESPONSES = {
+    "唇腭裂专科医生": """
+        ## 唇腭裂分类
+        单侧完全性唇腭裂，严重程度为中度。
+
+        ## 治疗方案
+        1. 3-6个月进行唇裂修复手术
+        2. 9-18个月进行腭裂修复手术
+        3. 术后进行语言治疗和康复
+        """,
+    "颅面外科专家": """
+        ## 颅面畸形分析
+        下颌发育不全伴颧骨发育不全，严重程度为中度。
+
+        ## 治疗方案
+        1. 下颌牵引成骨，建议2-4岁进行
+        2. 颧骨重建，建议6-8岁进行
+        3. 需要正畸科、语言治疗和心理支持等多学科协作
+        """,
+    "遗传学专家": """
+        ## 遗传异常分析
+        临床表现提示IRF6基因突变可能，遗传模式为常染色体显性遗传。
+
+        ## 检测建议
+        1. IRF6基因测序
+        2. 全外显子组测序(WES)
+
+        ## 家族风险
+        高风险，子代再发风险约50%，建议进行遗传咨询。
+        """,
+    "耳科专家": """
+        ## 耳部异常分析
+        耳廓畸形，伴传导性听力损失，程度为轻度。
+
+        ## 治疗方案
+        1. 6个月内完成听力筛查
+        2. 6-10岁进行耳廓再造
+        3. 必要时佩戴骨导助听器并进行听力康复训练
+        """,
+    "眼科专家": """
+        ## 眼部异常分析
+        高度近视，存在视网膜脱离风险。
+
+        ## 治疗方案
+        1. 配戴眼镜矫正屈光不正
+        2. 每6个月进行一次眼底检查
+        3. 出现视网膜裂孔时及时激光治疗
+        """
+}
+
+# 智能体管理器的招募分析回复（JSON格式）
+RECRUITMENT_RESPONSE = {
+    "syndrome_type": "syndromic",
+    "confidence": "high",
+    "possible_syndromes": [
+        {"name": "Van der Woude syndrome", "confidence": "high"},
+        {"name": "Treacher Collins syndrome", "confidence": "medium"},
+        {"name": "Stickler syndrome", "confidence": "low"}
+    ],
+    "activated_agents": ["唇腭裂专科医生", "遗传学专家"],
+    "reasoning": "模拟服务返回的招募结果"
+}
+
+# 智能体管理器的整合回复
+INTEGRATION_RESPONSE = """
+        # 最终诊断报告
+
+        ## 诊断结果
+        - **类型**: 综合征性唇腭裂
+        - **具体综合征**: Van der Woude综合征
+        - **置信度**: 高
+
+        ## 治疗建议
+        1. 3-6个月进行唇裂修复，9-18个月进行腭裂修复
+        2. 遗传咨询和IRF6基因检测
+        """
+
+DEFAULT_RESPONSE = "这是模拟语言模型服务的回复。"
+
+
+class MockLLMConfig:
+    """
+    模拟服务配置
+    """
+    def __init__(
+        self,
+        latency: Optional[Dict[str, Any]] = None,
+        rate_limit_rate: float = 0.0,
+        server_error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_seconds: float = 300.0,
+        truncate_rate: float = 0.0,
+        stream_chunk_size: int = 8,
+        stream_chunk_delay: float = 0.02,
+        seed: Optional[int] = None
+    ):
+        """
+        初始化模拟服务配置
+
+        Args:
+            latency: 响应延迟分布，如{"type": "lognormal", "median": 0.8, "sigma": 0.5}，
+                支持fixed(value)、uniform(low, high)、exponential(mean)、lognormal(median, sigma)
+            rate_limit_rate: 返回429的概率
+            server_error_rate: 返回500的概率
+            timeout_rate: 挂起请求（模拟超时）的概率
+            timeout_seconds: 模拟超时时挂起的时间（秒）
+            truncate_rate: 截断输出（finish_reason为length）的概率
+            stream_chunk_size: 流式输出每个分块的字符数
+            stream_chunk_delay: 流式输出分块之间的间隔（秒）
+            seed: 随机数种子，便于复现
+        """
+        self.latency = latency or {"type": "fixed", "value": 0.0}
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.truncate_rate = truncate_rate
+        self.stream_chunk_size = stream_chunk_size
+        self.stream_chunk_delay = stream_chunk_delay
+        self.seed = seed
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MockLLMConfig':
+        """
+        从字典创建配置
+
+        Args:
+            data: 配置字典
+
+        Returns:
+            MockLLMConfig: 配置实例
+        """
+        return cls(**data)
+
+
+class MockLLMServer:
+    """
+    模拟聊天补全服务
+    """
+    def __init__(self, config: Optional[MockLLMConfig] = None):
+        """
+        初始化模拟服务
+
+        Args:
+            config: 模拟服务配置
+        """
+        self.config = config or MockLLMConfig()
+        self.random = random.Random(self.config.seed)
+        self.stats = {
+            "requests": 0,
+            "success": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "timeouts": 0,
+            "truncated": 0,
+            "streamed": 0
+        }
+
+    def create_app(self) -> web.Application:
+        """
+        创建aiohttp应用
+
+        Returns:
+            web.Application: aiohttp应用
+        """
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.handle_chat_completion)
+        app.router.add_post("/chat/completions", self.handle_chat_completion)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    def sample_latency(self) -> float:
+        """
+        按配置的分布采样响应延迟
+
+        Returns:
+            float: 延迟时间（秒）
+        """
+        latency = self.config.latency
+        latency_type = latency.get("type", "fixed")
+
+        if latency_type == "fixed":
+            return latency.get("value", 0.0)
+        elif latency_type == "uniform":
+            return self.random.uniform(latency.get("low", 0.0), latency.get("high", 1.0))
+        elif latency_type == "exponential":
+            return self.random.expovariate(1.0 / latency.get("mean", 1.0))
+        elif latency_type == "lognormal":
+            median = latency.get("median", 1.0)
+            return self.random.lognormvariate(0.0, latency.get("sigma", 0.5)) * median
+        else:
+            raise ValueError(f"不支持的延迟分布: {latency_type}")
+
+    def build_content(self, messages: List[Dict[str, str]]) -> str:
+        """
+        根据消息内容识别智能体角色并生成对应的回复
+
+        Args:
+            messages: 消息历史
+
+        Returns:
+            str: 回复内容
+        """
+        last_user = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+
+        if "activated_agents" in last_user:
+            return json.dumps(RECRUITMENT_RESPONSE, ensure_ascii=False, indent=2)
+        if "整合以下各专科智能体" in last_user:
+            return INTEGRATION_RESPONSE
+
+        system = next((m["content"] for m in messages if m.get("role") == "system"), "")
+        for role, response in ROLE_RESPONSES.items():
+            if role in system:
+                return response
+
+        return DEFAULT_RESPONSE
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """粗略估算文本的token数"""
+        return max(1, len(text) // 2)
+
+    async def handle_chat_completion(self, request: web.Request) -> web.StreamResponse:
+        """
+        处理聊天补全请求
+
+        Args:
+            request: HTTP请求
+
+        Returns:
+            web.StreamResponse: HTTP响应
+        """
+        self.stats["requests"] += 1
+        payload = await request.json()
+        messages = payload.get("messages", [])
+
+        await asyncio.sleep(self.sample_latency())
+
+        roll = self.random.random()
+        if roll < self.config.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                status=429,
+                headers={"Retry-After": "1"}
+            )
+        roll -= self.config.rate_limit_rate
+
+        if roll < self.config.server_error_rate:
+            self.stats["server_errors"] += 1
+            return web.json_response({"error": {"message": "Internal error", "type": "server_error"}}, status=500)
+        roll -= self.config.server_error_rate
+
+        if roll < self.config.timeout_rate:
+            self.stats["timeouts"] += 1
+            await asyncio.sleep(self.config.timeout_seconds)
+        roll -= self.config.timeout_rate
+
+        content = self.build_content(messages)
+        finish_reason = "stop"
+        if roll < self.config.truncate_rate:
+            self.stats["truncated"] += 1
+            content = content[:self.random.randint(1, max(1, len(content) // 2))]
+            finish_reason = "length"
+
+        self.stats["success"] += 1
+        model = payload.get("model", "mock-model")
+        prompt_tokens = sum(self.estimate_tokens(m.get("content", "")) for m in messages)
+
+        if payload.get("stream"):
+            self.stats["streamed"] += 1
+            return await self._stream_response(request, model, content, finish_reason)
+
+        return web.json_response({
+            "id": f"chatcmpl-mock-{self.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": self.estimate_tokens(content),
+                "total_tokens": prompt_tokens + self.estimate_tokens(content)
+            }
+        })
+
+    async def _stream_response(self, request: web.Request, model: str, content: str, finish_reason: str) -> web.StreamResponse:
+        """
+        以SSE格式分块返回回复
+
+        Args:
+            request: HTTP请求
+            model: 模型名称
+            content: 回复内容
+            finish_reason: 结束原因
+
+        Returns:
+            web.StreamResponse: 流式HTTP响应
+        """
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        chunk_id = f"chatcmpl-mock-{self.stats['requests']}"
+        size = self.config.stream_chunk_size
+        pieces = [content[i:i + size] for i in range(0, len(content), size)]
+
+        for index, piece in enumerate(pieces):
+            delta = {"content": piece}
+            if index == 0:
+                delta["role"] = "assistant"
+            await self._write_event(response, chunk_id, model, delta, None)
+            await asyncio.sleep(self.config.stream_chunk_delay)
+
+        await self._write_event(response, chunk_id, model, {}, finish_reason)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    @staticmethod
+    async def _write_event(response: web.StreamResponse, chunk_id: str, model: str, delta: Dict[str, Any], finish_reason: Optional[str]) -> None:
+        """写出一个SSE分块"""
+        chunk = {
+            "id": chunk_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        """返回请求统计"""
+        return web.json_response(self.stats)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="模拟语言模型服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8089, help="监听端口")
+    parser.add_argument("--config", help="JSON格式的配置文件")
+    parser.add_argument("--seed", type=int, help="随机数种子")
+    args = parser.parse_args(argv)
+
+    config_data = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config_data = json.load(f)
+    if args.seed is not None:
+        config_data["seed"] = args.seed
+
+    server = MockLLMServer(MockLLMConfig.from_dict(config_data))
+    print(f"模拟语言模型服务已启动: http://{args.host}:{args.port}/v1")
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -44,6 +44,12 @@ class OtologyAgent(Agent):
             "symptom": "耳部异常"
         })
         
+        # 声明相关的患者字段和症状类别（外耳科只关注耳部、听力及相关颅面信息，不需要眼部和喂养信息）
+        self.set_context_profile(
+            fields=["age", "gender", "symptoms", "medical_history", "exam_results", "syndrome_type", "possible_syndromes", "similar_cases"],
+            symptom_categories=["orofacial", "craniofacial", "auditory"]
+        )
+        
         # 添加系统提示
         self.add_message("system", self._get_system_prompt())
     
@@ -109,13 +115,14 @@ class OtologyAgent(Agent):
         Returns:
             str: 分析提示
         """
-        age = patient_data.get("age", "未知")
-        gender = patient_data.get("gender", "未知")
-        symptoms = patient_data.get("symptoms", [])
+        context = self.build_patient_context(patient_data)
+        age = context.get("age", "未知")
+        gender = context.get("gender", "未知")
+        symptoms = context.get("symptoms", [])
         symptoms_str = ", ".join(symptoms)
-        medical_history = patient_data.get("medical_history", "无")
-        syndrome_type = patient_data.get("syndrome_type", "unknown")
-        possible_syndromes = patient_data.get("possible_syndromes", [])
+        medical_history = context.get("medical_history", "无")
+        syndrome_type = context.get("syndrome_type", "unknown")
+        possible_syndromes = context.get("possible_syndromes", [])
         
         syndromes_str = ""
         if possible_syndromes:
@@ -0,0 +1,167 @@
+"""
+患者上下文构建组件，按专科裁剪发送给智能体的患者信息
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Tuple
+
+# 患者字段及其在提示中的显示名称（按提示中的显示顺序排列）
+FIELD_LABELS = {
+    "age": "年龄",
+    "gender": "性别",
+    "symptoms": "症状",
+    "medical_history": "病史",
+    "family_history": "家族史",
+    "feeding_history": "喂养史",
+    "exam_results": "检查结果",
+    "imaging_reports": "影像报告",
+    "syndrome_type": "综合征类型",
+    "possible_syndromes": "可能的综合征",
+    "candidate_genes": "候选基因",
+    "similar_cases": "相似文献病例"
+}
+
+# 症状类别及其关键词（中英文，英文关键词按小写匹配）
+SYMPTOM_CATEGORIES = {
+    "orofacial": ["唇", "腭", "牙", "口", "悬雍垂", "cleft", "lip", "palat", "tooth", "teeth", "dental", "oral", "uvula"],
+    "craniofacial": ["颌", "颧", "颅", "面", "鼻", "mandib", "maxill", "crani", "facial", "micrognath", "pierre-robin", "zygom", "nasal"],
+    "ocular": ["眼", "视", "睑", "角膜", "晶状体", "白内障", "eye", "ocular", "vision", "myopia", "retina", "coloboma", "cataract", "hypertelorism"],
+    "auditory": ["耳", "听", "ear", "hearing", "auricle", "otitis"],
+    "musculoskeletal": ["关节", "骨", "指", "趾", "joint", "skelet", "digit", "finger", "toe", "dactyly"],
+    "feeding": ["喂养", "吞咽", "吸吮", "feeding", "swallow"],
+    "airway": ["呼吸", "气道", "airway", "apnea", "respirat"],
+    "neurodevelopmental": ["智力", "发育迟缓", "癫痫", "小头", "intellectual", "epilep", "developmental delay", "microcephal"],
+    "cardiac": ["心", "cardiac", "heart", "septal", "fallot"]
+}
+
+# 未命中任何类别的症状归入该类别
+OTHER_CATEGORY = "other"
+
+# 默认发送的患者字段（未声明时发送FIELD_LABELS中登记的全部字段，ID、原始症状等内部字段不发送）
+DEFAULT_CONTEXT_FIELDS = list(FIELD_LABELS.keys())
+
+# 症状分类结果缓存的最大条目数（症状是自由文本，长期运行的服务中需要限制缓存大小）
+CATEGORY_CACHE_SIZE = 4096
+
+
+def classify_symptom(symptom: str) -> List[str]:
+    """
+    根据关键词判断症状所属的类别
+
+    Args:
+        symptom: 症状文本
+
+    Returns:
+        List[str]: 症状所属的类别列表，未命中时为["other"]
+    """
+    return list(_classify(symptom))
+
+
+@lru_cache(maxsize=CATEGORY_CACHE_SIZE)
+def _classify(symptom: str) -> Tuple[str, ...]:
+    """按关键词分类症状，结果按症状文本缓存（缓存不可变的元组，调用方拿到的是副本）"""
+    text = symptom.lower()
+    return tuple(
+        category for category, keywords in SYMPTOM_CATEGORIES.items()
+        if any(keyword in text for keyword in keywords)
+    ) or (OTHER_CATEGORY,)
+
+
+def filter_symptoms(symptoms: List[str], symptom_categories: Optional[List[str]] = None) -> List[str]:
+    """
+    只保留属于指定类别的症状
+
+    Args:
+        symptoms: 症状列表
+        symptom_categories: 需要保留的症状类别，为None时保留全部症状
+
+    Returns:
+        List[str]: 过滤后的症状列表
+    """
+    if symptom_categories is None:
+        return list(symptoms)
+
+    wanted = set(symptom_categories)
+    return [symptom for symptom in symptoms if wanted.intersection(classify_symptom(symptom))]
+
+
+def build_patient_context(
+    patient_data: Dict[str, Any],
+    fields: Optional[List[str]] = None,
+    symptom_categories: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    构建裁剪后的患者上下文
+
+    Args:
+        patient_data: 患者数据字典
+        fields: 需要发送的患者字段，为None时发送FIELD_LABELS中登记的全部字段（DEFAULT_CONTEXT_FIELDS），
+                未登记的字段只有显式列出时才发送
+        symptom_categories: 需要发送的症状类别，为None时发送全部症状
+
+    Returns:
+        Dict[str, Any]: 只包含相关字段和症状的患者上下文
+    """
+    fields = DEFAULT_CONTEXT_FIELDS if fields is None else fields
+
+    context = {}
+    for field in fields:
+        value = patient_data.get(field)
+        if value in (None, "", [], {}):
+            continue
+        if field == "symptoms":
+            value = filter_symptoms(value, symptom_categories)
+            if not value:
+                continue
+        context[field] = value
+
+    return context
+
+
+def format_patient_context(context: Dict[str, Any]) -> str:
+    """
+    将患者上下文格式化为提示文本，只输出存在的字段
+
+    Args:
+        context: 患者上下文字典
+
+    Returns:
+        str: 每个字段一行的提示文本
+    """
+    lines = []
+    for field, label in FIELD_LABELS.items():
+        if field not in context:
+            continue
+        value = context[field]
+
+        if field == "possible_syndromes":
+            value = "; ".join(
+                f"{syndrome.get('name', '')}（置信度：{syndrome.get('confidence', '未知')}）"
+                for syndrome in value
+            )
+        elif field == "similar_cases":
+            value = "; ".join(
+                f"{case.get('diagnosis', '')}（{case.get('case_id', '')}，相似度：{case.get('similarity', 0)}，"
+                f"共同特征：{'、'.join(case.get('shared_features', []))}）"
+                for case in value
+            )
+        elif field == "candidate_genes":
+            value = "; ".join(
+                f"{candidate.get('gene', '')}（{'、'.join(candidate.get('syndromes', []))}"
+                + (f"；已知致病变异：{'、'.join(candidate['variants'][:3])}" if candidate.get("variants") else "")
+                + "）"
+                for candidate in value
+            )
+        elif isinstance(value, dict):
+            value = "; ".join(f"{key}: {item}" for key, item in value.items())
+        elif isinstance(value, list):
+            value = ", ".join(str(item) for item in value)
+
+        lines.append(f"- {label}：{value}")
+
+    # 保留未在FIELD_LABELS中登记的额外字段
+    for field, value in context.items():
+        if field not in FIELD_LABELS:
+            lines.append(f"- {field}：{value}")
+
+    return "\n".join(lines)
@@ -0,0 +1,259 @@
+"""
+合成患者生成组件，按知识库综合征和文献病例的特征分布生成可复现的模拟患者，用于规模测试和压力测试
+"""
+
+import sys
+import json
+import random
+import argparse
+from collections import Counter
+from typing import Dict, List, Optional, Any, Iterator, TextIO
+
+from .bayes_ranker import parse_prevalence, parse_frequency, DEFAULT_FEATURE_FREQUENCY
+
+# 非综合征性唇腭裂的表型及其相对比例
+NONSYNDROMIC_PHENOTYPES = [
+    (["单侧唇裂"], 0.2),
+    (["双侧唇裂"], 0.05),
+    (["腭裂"], 0.3),
+    (["唇裂", "腭裂"], 0.2),
+    (["单侧唇裂", "腭裂"], 0.2),
+    (["双侧唇裂", "腭裂"], 0.05)
+]
+
+# 唇腭裂患者中综合征性的比例
+SYNDROMIC_RATE = 0.3
+
+# 男性比例（唇腭裂男性多见）
+MALE_RATE = 0.6
+
+# 患者就诊月龄的平均值（指数分布，婴儿期最多）
+MEAN_AGE_MONTHS = 18
+
+# 病史模板，{findings}为主要症状
+MEDICAL_HISTORY_TEMPLATES = [
+    "足月顺产，无其他异常",
+    "足月顺产，出生后发现{findings}",
+    "早产（{weeks}周），出生后发现{findings}",
+    "剖宫产，孕期超声发现{findings}",
+    "足月顺产，喂养困难，出生后发现{findings}"
+]
+
+# 家族史中的亲属
+RELATIVES = ["父亲", "母亲", "哥哥", "姐姐", "祖父", "外祖母"]
+
+
+def format_age(months: int, rng: random.Random) -> str:
+    """
+    将月龄格式化为病历中常见的写法
+
+    Args:
+        months: 月龄
+        rng: 随机数生成器
+
+    Returns:
+        str: 如"新生儿"、"4个月"、"2岁"、"1岁3个月"或"3 years"
+    """
+    if months == 0:
+        return rng.choice(["新生儿", "新生儿", "newborn"])
+    if months < 12:
+        return f"{months}个月"
+    years, rest = divmod(months, 12)
+    style = rng.random()
+    if style < 0.1:
+        return f"{years} years"
+    if rest and style < 0.6:
+        return f"{years}岁{rest}个月"
+    return f"{years}岁"
+
+
+class PatientGenerator:
+    """
+    合成患者生成器
+
+    综合征按患病率加权抽样，症状按各症状的出现频率（未标注时取默认频率）独立抽样；
+    另按文献病例中临床特征的出现次数抽取少量伴随特征。同一种子生成的患者序列完全相同。
+    """
+    def __init__(
+        self,
+        syndrome_data: Dict[str, Dict[str, Any]],
+        cases: Optional[List[Dict[str, Any]]] = None,
+        seed: int = 0,
+        syndromic_rate: float = SYNDROMIC_RATE,
+        normalize: Optional[Any] = None
+    ):
+        """
+        初始化生成器
+
+        Args:
+            syndrome_data: 综合征数据
+            cases: 文献病例（提供伴随特征的分布）
+            seed: 随机种子
+            syndromic_rate: 综合征性患者的比例
+            normalize: 病例特征的标准化函数，返回None时保留原文
+        """
+        self.rng = random.Random(seed)
+        self.syndromic_rate = syndromic_rate if syndrome_data else 0.0
+
+        self.syndrome_ids = list(syndrome_data.keys())
+        prevalences = [parse_prevalence(syndrome_data[s].get("prevalence")) for s in self.syndrome_ids]
+        known = sorted(p for p in prevalences if p is not None)
+        default = known[len(known) // 2] if known else 1.0
+        self.syndrome_weights = [p if p is not None else default for p in prevalences]
+
+        # 每个综合征的(症状, 出现频率)列表
+        self.syndrome_features = {}
+        for syndrome_id, info in syndrome_data.items():
+            frequencies = info.get("symptom_frequencies", {})
+            self.syndrome_features[syndrome_id] = [
+                (symptom, parse_frequency(frequencies.get(symptom)) or DEFAULT_FEATURE_FREQUENCY)
+                for symptom in info.get("symptoms", [])
+            ]
+        self.syndrome_data = syndrome_data
+
+        counts = Counter(
+            (normalize(feature) if normalize else None) or feature.strip()
+            for case in cases or [] for feature in case.get("clinical_features", [])
+        )
+        self.case_features = list(counts.keys())
+        self.case_weights = list(counts.values())
+        self.phenotypes = [phenotype for phenotype, _ in NONSYNDROMIC_PHENOTYPES]
+        self.phenotype_weights = [weight for _, weight in NONSYNDROMIC_PHENOTYPES]
+
+    @classmethod
+    def from_knowledge_base(cls, knowledge_base: Any, seed: int = 0, **kwargs: Any) -> 'PatientGenerator':
+        """
+        使用知识库的综合征数据和病例文件创建生成器
+
+        Args:
+            knowledge_base: 知识库
+            seed: 随机种子
+            **kwargs: 其他构造参数
+
+        Returns:
+            PatientGenerator: 生成器
+        """
+        return cls(
+            knowledge_base.syndrome_data,
+            knowledge_base._load_cases(),
+            seed=seed,
+            normalize=knowledge_base.normalizer.normalize,
+            **kwargs
+        )
+
+    def _history(self, symptoms: List[str], syndrome_id: Optional[str]) -> Dict[str, str]:
+        """生成病史和家族史"""
+        rng = self.rng
+        findings = "、".join(symptoms[:2])
+        medical_history = rng.choice(MEDICAL_HISTORY_TEMPLATES).format(findings=findings, weeks=rng.randint(30, 36))
+
+        inheritance = str(self.syndrome_data.get(syndrome_id, {}).get("inheritance", "")) if syndrome_id else ""
+        dominant = "显性" in inheritance or "dominant" in inheritance.lower()
+        if dominant and rng.random() < 0.5:
+            family_history = f"{rng.choice(RELATIVES)}有{rng.choice(symptoms)}"
+        elif rng.random() < 0.1:
+            family_history = f"{rng.choice(RELATIVES)}有唇裂"
+        else:
+            family_history = "无家族史"
+        return {"medical_history": medical_history, "family_history": family_history}
+
+    def patient(self, index: int = 0) -> Dict[str, Any]:
+        """
+        生成一位患者
+
+        Args:
+            index: 患者序号（用于生成姓名）
+
+        Returns:
+            Dict[str, Any]: 患者数据，包含name、age、gender、symptoms、medical_history、family_history，
+                以及生成时使用的综合征true_syndrome（非综合征性为None）
+        """
+        rng = self.rng
+        syndrome_id = None
+        if rng.random() < self.syndromic_rate:
+            syndrome_id = rng.choices(self.syndrome_ids, self.syndrome_weights)[0]
+            features = self.syndrome_features[syndrome_id]
+            symptoms = [symptom for symptom, frequency in features if rng.random() < frequency]
+            # 至少保留两个症状，否则无法体现综合征
+            for symptom, _ in rng.sample(features, min(2, len(features))):
+                if symptom not in symptoms:
+                    symptoms.append(symptom)
+        else:
+            symptoms = list(rng.choices(self.phenotypes, self.phenotype_weights)[0])
+
+        if self.case_features and rng.random() < 0.3:
+            for feature in rng.choices(self.case_features, self.case_weights, k=rng.randint(1, 2)):
+                if feature not in symptoms:
+                    symptoms.append(feature)
+        rng.shuffle(symptoms)
+
+        months = min(int(rng.expovariate(1 / MEAN_AGE_MONTHS)), 216)
+        return {
+            "name": f"合成患者{index:07d}",
+            "age": format_age(months, rng),
+            "gender": "男" if rng.random() < MALE_RATE else "女",
+            "symptoms": symptoms,
+            **self._history(symptoms, syndrome_id),
+            "true_syndrome": syndrome_id
+        }
+
+    def generate(self, count: int, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        逐个生成患者
+
+        Args:
+            count: 患者数量
+            start: 起始序号
+
+        Yields:
+            Dict[str, Any]: 患者数据
+        """
+        for index in range(start, start + count):
+            yield self.patient(index)
+
+
+def write_ndjson(patients: Iterator[Dict[str, Any]], stream: TextIO) -> int:
+    """
+    以NDJSON格式写出患者
+
+    Args:
+        patients: 患者
+        stream: 输出文本流
+
+    Returns:
+        int: 写出的患者数
+    """
+    count = 0
+    for patient in patients:
+        stream.write(json.dumps(patient, ensure_ascii=False))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def main() -> None:
+    """命令行入口：生成合成患者并输出为NDJSON"""
+    from .knowledge_base import KnowledgeBase
+
+    parser = argparse.ArgumentParser(description="生成合成患者（NDJSON）")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="患者数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--syndromic-rate", type=float, default=SYNDROMIC_RATE, help="综合征性患者的比例")
+    parser.add_argument("--knowledge-dir", default=None, help="知识库目录，默认为data/knowledge")
+    parser.add_argument("--output", default="-", help="输出文件路径，-表示标准输出")
+    args = parser.parse_args()
+
+    knowledge_base = KnowledgeBase(args.knowledge_dir)
+    generator = PatientGenerator.from_knowledge_base(knowledge_base, args.seed, syndromic_rate=args.syndromic_rate)
+    knowledge_base.close()
+
+    if args.output == "-":
+        write_ndjson(generator.generate(args.count), sys.stdout)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            count = write_ndjson(generator.generate(args.count), f)
+        print(f"已生成{count}位患者: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
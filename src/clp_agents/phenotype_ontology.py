@@ -0,0 +1,316 @@
+"""
+人类表型本体（HPO）组件，提供祖先闭包、信息量（IC）和基于Resnik/BMA的表型语义相似度打分
+"""
+
+from typing import Dict, List, Optional, Any, Tuple, Iterable
+
+import numpy as np
+
+
+class PhenotypeOntology:
+    """
+    人类表型本体，从本地OBO文件（如hp.obo）加载
+
+    加载后把每个术语的全部祖先（含自身）预先展开为CSR数组，便于向量化计算
+    """
+    def __init__(self, obo_file: str, symptom_mapping: Optional[Dict[str, str]] = None):
+        """
+        初始化表型本体
+
+        Args:
+            obo_file: OBO格式的本体文件路径
+            symptom_mapping: 症状文本 -> HPO术语ID的映射（用于中文症状）
+        """
+        self.term_ids: List[str] = []
+        self.names: List[str] = []
+        self.term_pos: Dict[str, int] = {}
+        self.symptom_mapping = dict(symptom_mapping or {})
+        self._name_lookup: Dict[str, int] = {}
+
+        parents = self._parse_obo(obo_file)
+        self.ancestor_indptr, self.ancestor_indices = self._build_ancestor_closure(parents)
+
+    def _parse_obo(self, obo_file: str) -> List[List[str]]:
+        """
+        解析OBO文件
+
+        Args:
+            obo_file: OBO文件路径
+
+        Returns:
+            List[List[str]]: 各术语的直接父术语ID列表
+        """
+        raw_parents: Dict[str, List[str]] = {}
+        alt_ids: Dict[str, str] = {}
+        synonyms: Dict[str, List[str]] = {}
+
+        term = None
+        with open(obo_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    if term and not term.get("obsolete"):
+                        self._add_term(term, raw_parents, alt_ids, synonyms)
+                    term = {"parents": [], "alt_ids": [], "synonyms": []} if line == "[Term]" else None
+                    continue
+                if term is None or ":" not in line:
+                    continue
+
+                key, value = line.split(":", 1)
+                value = value.strip()
+                if key == "id":
+                    term["id"] = value
+                elif key == "name":
+                    term["name"] = value
+                elif key == "is_a":
+                    term["parents"].append(value.split("!")[0].strip())
+                elif key == "alt_id":
+                    term["alt_ids"].append(value)
+                elif key == "synonym" and value.startswith('"'):
+                    term["synonyms"].append(value[1:value.index('"', 1)])
+                elif key == "is_obsolete" and value == "true":
+                    term["obsolete"] = True
+
+        if term and not term.get("obsolete"):
+            self._add_term(term, raw_parents, alt_ids, synonyms)
+
+        for alt_id, term_id in alt_ids.items():
+            self.term_pos.setdefault(alt_id, self.term_pos[term_id])
+        for term_id, names in synonyms.items():
+            for name in names:
+                self._name_lookup.setdefault(name.lower(), self.term_pos[term_id])
+
+        return [
+            [parent for parent in raw_parents[term_id] if parent in self.term_pos]
+            for term_id in self.term_ids
+        ]
+
+    def _add_term(self, term: Dict[str, Any], raw_parents: Dict[str, List[str]], alt_ids: Dict[str, str], synonyms: Dict[str, List[str]]) -> None:
+        """登记一个术语"""
+        term_id = term["id"]
+        self.term_pos[term_id] = len(self.term_ids)
+        self.term_ids.append(term_id)
+        self.names.append(term.get("name", term_id))
+        self._name_lookup[term.get("name", term_id).lower()] = self.term_pos[term_id]
+        raw_parents[term_id] = term["parents"]
+        for alt_id in term["alt_ids"]:
+            alt_ids[alt_id] = term_id
+        synonyms[term_id] = term["synonyms"]
+
+    def _build_ancestor_closure(self, parents: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算每个术语的祖先闭包（含自身）
+
+        Args:
+            parents: 各术语的直接父术语ID列表
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: CSR格式的(indptr, indices)
+        """
+        closures: List[Optional[frozenset]] = [None] * len(self.term_ids)
+
+        for start in range(len(self.term_ids)):
+            # 迭代式深度优先，避免深层本体触发递归深度限制
+            stack = [start]
+            while stack:
+                node = stack[-1]
+                if closures[node] is not None:
+                    stack.pop()
+                    continue
+                pending = [self.term_pos[p] for p in parents[node] if closures[self.term_pos[p]] is None]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                closure = {node}
+                for p in parents[node]:
+                    closure.update(closures[self.term_pos[p]])
+                closures[node] = frozenset(closure)
+                stack.pop()
+
+        indptr = np.zeros(len(self.term_ids) + 1, dtype=np.int64)
+        indices = []
+        for i, closure in enumerate(closures):
+            indices.extend(sorted(closure))
+            indptr[i + 1] = len(indices)
+
+        return indptr, np.array(indices, dtype=np.int32)
+
+    @property
+    def num_terms(self) -> int:
+        """术语数量"""
+        return len(self.term_ids)
+
+    def ancestors(self, term_index: int) -> np.ndarray:
+        """
+        获取术语的全部祖先（含自身）
+
+        Args:
+            term_index: 术语序号
+
+        Returns:
+            np.ndarray: 祖先术语序号数组
+        """
+        return self.ancestor_indices[self.ancestor_indptr[term_index]:self.ancestor_indptr[term_index + 1]]
+
+    def resolve(self, symptom: str) -> Optional[int]:
+        """
+        将症状文本解析为术语序号，依次尝试症状映射、HPO ID和术语名称/同义词
+
+        Args:
+            symptom: 症状文本或HPO ID
+
+        Returns:
+            Optional[int]: 术语序号，无法解析时返回None
+        """
+        term_id = self.symptom_mapping.get(symptom, symptom)
+        if term_id in self.term_pos:
+            return self.term_pos[term_id]
+        return self._name_lookup.get(symptom.strip().lower())
+
+    def resolve_all(self, symptoms: Iterable[str]) -> List[int]:
+        """
+        批量解析症状，忽略无法解析和重复的症状
+
+        Args:
+            symptoms: 症状列表
+
+        Returns:
+            List[int]: 术语序号列表
+        """
+        resolved = []
+        for symptom in symptoms:
+            term_index = self.resolve(symptom)
+            if term_index is not None and term_index not in resolved:
+                resolved.append(term_index)
+        return resolved
+
+
+class PhenotypeMatcher:
+    """
+    基于信息量的综合征表型相似度打分
+
+    信息量由综合征注释频率计算：IC(t) = -log(注释了t或其后代的综合征数 / 综合征总数)。
+    术语相似度采用Resnik（最具信息量共同祖先的IC），患者与综合征的相似度采用BMA（双向最佳匹配平均）。
+    """
+    def __init__(self, ontology: PhenotypeOntology, syndrome_data: Dict[str, Dict[str, Any]]):
+        """
+        初始化打分器，预先计算信息量和综合征注释数组
+
+        Args:
+            ontology: 表型本体
+            syndrome_data: 综合征数据，综合征ID -> 综合征信息
+        """
+        self.ontology = ontology
+        self.syndrome_ids = list(syndrome_data.keys())
+
+        annotations = [ontology.resolve_all(info.get("symptoms", [])) for info in syndrome_data.values()]
+        self.ic = self._compute_information_content(annotations)
+
+        # 综合征 -> 注释术语的CSR数组；只保留有注释的综合征参与打分
+        self.annotated = np.array([i for i, terms in enumerate(annotations) if terms], dtype=np.int64)
+        lengths = np.array([len(annotations[i]) for i in self.annotated], dtype=np.int64)
+        self.annotation_indptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        self.annotation_lengths = lengths
+        annotation_terms = np.array([t for i in self.annotated for t in annotations[i]], dtype=np.int64)
+        self.annotation_terms = annotation_terms
+
+        # 倒排索引：祖先术语 -> 以其为祖先的注释位置；IC为0的祖先（如根节点）对相似度没有贡献，不予保存
+        closure_lengths = ontology.ancestor_indptr[annotation_terms + 1] - ontology.ancestor_indptr[annotation_terms]
+        owners = np.repeat(np.arange(len(annotation_terms)), closure_lengths)
+        ancestors = (
+            np.concatenate([ontology.ancestors(t) for t in annotation_terms])
+            if len(annotation_terms) else np.empty(0, dtype=np.int32)
+        )
+        informative = self.ic[ancestors] > 0
+        ancestors, owners = ancestors[informative], owners[informative]
+        order = np.argsort(ancestors, kind="stable")
+        self.descendant_positions = owners[order].astype(np.int32)
+        self.descendant_indptr = np.concatenate(
+            ([0], np.cumsum(np.bincount(ancestors, minlength=ontology.num_terms)))
+        ).astype(np.int64)
+
+    def _compute_information_content(self, annotations: List[List[int]]) -> np.ndarray:
+        """
+        计算每个术语的信息量
+
+        Args:
+            annotations: 各综合征的注释术语序号
+
+        Returns:
+            np.ndarray: 各术语的信息量（float32）
+        """
+        counts = np.zeros(self.ontology.num_terms, dtype=np.int64)
+        for terms in annotations:
+            if not terms:
+                continue
+            closure = np.unique(np.concatenate([self.ontology.ancestors(t) for t in terms]))
+            counts[closure] += 1
+
+        total = max(1, sum(1 for terms in annotations if terms))
+        # 没有注释的术语按出现1次处理，取最大信息量
+        return (-np.log(np.maximum(counts, 1) / total)).astype(np.float32)
+
+    def _term_similarity(self, patient_terms: List[int]) -> np.ndarray:
+        """
+        计算每个患者术语与每个注释位置的Resnik相似度
+
+        Args:
+            patient_terms: 患者术语序号
+
+        Returns:
+            np.ndarray: 形状为(患者术语数, 注释总数)的相似度矩阵
+        """
+        similarity = np.zeros((len(patient_terms), len(self.annotation_terms)), dtype=np.float32)
+        for row, term in enumerate(patient_terms):
+            ancestors = self.ontology.ancestors(term)
+            # 按IC升序依次写入祖先的全部后代注释，后写入的IC更大，最终保留最具信息量的共同祖先
+            for ancestor in ancestors[np.argsort(self.ic[ancestors], kind="stable")]:
+                start, end = self.descendant_indptr[ancestor], self.descendant_indptr[ancestor + 1]
+                if start < end:
+                    similarity[row, self.descendant_positions[start:end]] = self.ic[ancestor]
+        return similarity
+
+    def score(self, symptoms: Iterable[str]) -> np.ndarray:
+        """
+        计算患者与全部综合征的BMA相似度
+
+        Args:
+            symptoms: 患者症状列表（症状文本或HPO ID）
+
+        Returns:
+            np.ndarray: 各综合征的相似度，未注释的综合征为0
+        """
+        scores = np.zeros(len(self.syndrome_ids), dtype=np.float32)
+        patient_terms = self.ontology.resolve_all(symptoms)
+        if not patient_terms or len(self.annotated) == 0:
+            return scores
+
+        similarity = self._term_similarity(patient_terms)
+        starts = self.annotation_indptr[:-1]
+
+        # 患者 -> 综合征：每个患者术语在综合征注释中的最佳匹配，再对患者术语求平均
+        patient_best = np.maximum.reduceat(similarity, starts, axis=1).mean(axis=0)
+        # 综合征 -> 患者：每个注释术语在患者术语中的最佳匹配，再对注释术语求平均
+        syndrome_best = np.add.reduceat(similarity.max(axis=0), starts) / self.annotation_lengths
+
+        scores[self.annotated] = 0.5 * (patient_best + syndrome_best)
+        return scores
+
+    def top_k(self, symptoms: Iterable[str], k: int = 10) -> List[Tuple[str, float]]:
+        """
+        获取相似度最高的k个综合征
+
+        Args:
+            symptoms: 患者症状列表
+            k: 返回数量
+
+        Returns:
+            List[Tuple[str, float]]: (综合征ID, 相似度)列表，按相似度降序
+        """
+        scores = self.score(symptoms)
+        candidates = np.flatnonzero(scores > 0)
+        if 0 < k < len(candidates):
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        order = np.lexsort((candidates, -scores[candidates]))[:k]
+        return [(self.syndrome_ids[i], float(scores[i])) for i in candidates[order]]
+
@@ -0,0 +1,138 @@
+"""
+下一步问诊推荐组件：计算每个未观察症状对候选综合征的期望信息增益，推荐最能区分候选综合征的检查或问题
+"""
+
+from typing import Dict, List, Any, Iterable
+
+import numpy as np
+
+from .bayes_ranker import BayesianRanker, BACKGROUND_FREQUENCY
+
+
+def _entropy(probabilities: np.ndarray, axis: int = 0) -> np.ndarray:
+    """按列（或指定轴）计算香农熵（比特），0概率项记为0"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(probabilities > 0, probabilities * np.log2(probabilities), 0.0)
+    return -terms.sum(axis=axis)
+
+
+class QuestionRecommender:
+    """
+    基于期望信息增益的问诊推荐
+
+    候选综合征的当前后验来自贝叶斯排序器。对每个未观察的症状s，回答"有"的概率为
+    Σ P(D) P(s|D)，回答后的后验分别正比于P(D) P(s|D)和P(D) (1 - P(s|D))，
+    信息增益为当前熵减去两种回答下熵的期望。候选综合征×候选症状的频率表一次取出为稠密矩阵，
+    所有症状的增益在一次矩阵运算中得到。
+    另外用病例数据预先统计症状共现次数，作为推荐问题与已观察症状在真实病例中一同出现的佐证。
+    """
+    def __init__(self, ranker: BayesianRanker, case_features: Iterable[Iterable[str]] = ()):
+        """
+        初始化推荐器
+
+        Args:
+            ranker: 贝叶斯鉴别诊断排序器
+            case_features: 每个病例的临床特征（关联矩阵中的症状名称），用于统计共现次数
+        """
+        self.ranker = ranker
+        index = ranker.index
+
+        # 按列（综合征）重排关联矩阵非零元，得到综合征 -> 症状行及其出现频率
+        order = np.argsort(index.indices, kind="stable")
+        self.column_indptr = np.concatenate(([0], np.cumsum(np.bincount(index.indices, minlength=index.num_syndromes))))
+        self.column_rows = np.searchsorted(index.indptr, order, side="right") - 1
+        self.column_frequencies = (BACKGROUND_FREQUENCY * np.exp(ranker.present_llr[order])).astype(np.float32)
+
+        # 病例中出现的症状及其共现次数矩阵
+        case_rows = [index.symptom_rows(features) for features in case_features]
+        self.case_symptoms = np.unique(np.concatenate(case_rows)) if case_rows else np.empty(0, dtype=np.int64)
+        incidence = np.zeros((len(case_rows), len(self.case_symptoms)), dtype=np.int32)
+        for case, rows in enumerate(case_rows):
+            incidence[case, np.searchsorted(self.case_symptoms, rows)] = 1
+        self.cooccurrence = incidence.T @ incidence
+        self.case_pos = {int(row): i for i, row in enumerate(self.case_symptoms)}
+
+    def _case_support(self, observed_rows: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """
+        统计候选症状与已观察症状在病例中的共现次数之和
+
+        Args:
+            observed_rows: 已观察症状的行号
+            rows: 候选症状的行号
+
+        Returns:
+            np.ndarray: 各候选症状的共现次数
+        """
+        support = np.zeros(len(rows), dtype=np.int64)
+        observed = [self.case_pos[row] for row in observed_rows.tolist() if row in self.case_pos]
+        if observed:
+            for i, row in enumerate(rows.tolist()):
+                if row in self.case_pos:
+                    support[i] = self.cooccurrence[observed, self.case_pos[row]].sum()
+        return support
+
+    def recommend(
+        self,
+        symptoms: Iterable[str],
+        absent_symptoms: Iterable[str] = (),
+        k: int = 5,
+        candidates: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        推荐信息增益最高的k个待查症状
+
+        Args:
+            symptoms: 已观察到的症状（关联矩阵中的症状名称）
+            absent_symptoms: 已排除的症状
+            k: 返回数量
+            candidates: 参与计算的后验最高的候选综合征数
+
+        Returns:
+            List[Dict[str, Any]]: 每项包含symptom、information_gain（比特）、probability（回答"有"的概率）
+                和case_support（与已观察症状在病例中的共现次数），按信息增益降序
+        """
+        index = self.ranker.index
+        symptoms, absent_symptoms = list(symptoms), list(absent_symptoms)
+        scores = self.ranker.log_scores(symptoms, absent_symptoms)
+        if len(scores) < 2 or k <= 0:
+            return []
+
+        columns = np.argpartition(-scores, candidates - 1)[:candidates] if candidates < len(scores) else np.arange(len(scores))
+        prior = np.exp(scores[columns] - scores[columns].max())
+        prior /= prior.sum()
+
+        # 候选综合征列出的全部症状（去掉已回答的）组成候选问题
+        starts, ends = self.column_indptr[columns], self.column_indptr[columns + 1]
+        lengths = ends - starts
+        owners = np.repeat(np.arange(len(columns)), lengths)
+        positions = np.repeat(starts, lengths) + np.arange(int(lengths.sum())) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        answered = np.concatenate((index.symptom_rows(symptoms), index.symptom_rows(absent_symptoms)))
+        keep = ~np.isin(self.column_rows[positions], answered)
+        owners, positions = owners[keep], positions[keep]
+        rows, row_pos = np.unique(self.column_rows[positions], return_inverse=True)
+        if not len(rows):
+            return []
+
+        frequencies = np.full((len(columns), len(rows)), BACKGROUND_FREQUENCY, dtype=np.float64)
+        frequencies[owners, row_pos] = self.column_frequencies[positions]
+
+        # 两种回答的概率和回答后的后验熵
+        joint_yes = prior[:, None] * frequencies
+        joint_no = prior[:, None] - joint_yes
+        p_yes = joint_yes.sum(axis=0)
+        p_no = 1.0 - p_yes
+        expected = p_yes * _entropy(joint_yes / p_yes) + p_no * _entropy(joint_no / np.maximum(p_no, 1e-12))
+        gains = _entropy(prior) - expected
+
+        top = np.argpartition(-gains, k - 1)[:k] if k < len(gains) else np.arange(len(gains))
+        top = top[np.lexsort((top, -gains[top]))]
+        support = self._case_support(index.symptom_rows(symptoms), rows[top])
+        return [
+            {
+                "symptom": index.symptoms[rows[i]],
+                "information_gain": float(gains[i]),
+                "probability": float(p_yes[i]),
+                "case_support": int(count)
+            }
+            for i, count in zip(top, support)
+        ]
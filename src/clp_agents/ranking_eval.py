@@ -0,0 +1,295 @@
+"""
+诊断排序离线评估组件，用CLP_cases.json中的病例诊断作为标准答案评估综合征排序器
+指标（top-k准确率、MRR）在整个病例集上向量化计算，同时统计单次查询耗时和批量吞吐量，
+合成扩容模式下可以在不同规模的知识库上同时跟踪排序质量和吞吐量
+"""
+
+import re
+import time
+import random
+import tempfile
+import argparse
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+import numpy as np
+
+from .knowledge_base import KnowledgeBase
+from .case_index import UNLABELED_DIAGNOSES
+from .symptom_normalizer import clean_symptom_text
+
+# 排序器：(知识库, 多位患者的症状列表, k) -> 每位患者按可能性降序的综合征ID列表
+Ranker = Callable[[KnowledgeBase, List[List[str]], int], List[List[str]]]
+
+# 内置排序器
+RANKERS: Dict[str, Ranker] = {
+    "search": lambda kb, queries, k: [
+        [result["id"] for result in results] for results in kb.search_syndromes_batch(queries, k)
+    ],
+    "bayes": lambda kb, queries, k: [
+        [result["id"] for result in kb.rank_syndromes(symptoms, k=k)] for symptoms in queries
+    ],
+    "phenotype": lambda kb, queries, k: [
+        [result["id"] for result in kb.search_syndromes_by_phenotype(symptoms, k)] for symptoms in queries
+    ]
+}
+
+# 评估的top-k
+DEFAULT_KS = (1, 3, 10)
+
+# 比较诊断名称时去掉的通用词
+_GENERIC_WORDS = re.compile(r"综合征|综合症|syndrome|sequence|序列征")
+_NON_WORD = re.compile(r"[^0-9a-z一-鿿]+")
+
+
+def diagnosis_key(text: str) -> str:
+    """
+    诊断名称的比较键：清洗、去掉"综合征"等通用词和标点
+
+    Args:
+        text: 诊断名称或综合征ID
+
+    Returns:
+        str: 比较键，如"Van der Woude syndrome"和van_der_woude_syndrome都得到"van der woude"
+    """
+    text = _GENERIC_WORDS.sub(" ", clean_symptom_text(text.replace("_", " ")))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def build_label_index(syndrome_data: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    """
+    由综合征ID、名称和别名建立诊断比较键到综合征ID的映射
+
+    Args:
+        syndrome_data: 综合征数据
+
+    Returns:
+        Dict[str, str]: 比较键 -> 综合征ID
+    """
+    labels = {}
+    for syndrome_id, info in syndrome_data.items():
+        for name in [syndrome_id, info.get("name", "")] + list(info.get("aliases", [])):
+            key = diagnosis_key(name)
+            if key:
+                labels.setdefault(key, syndrome_id)
+    return labels
+
+
+def ranking_metrics(rankings: List[List[str]], truth: List[Optional[str]], ks: Tuple[int, ...] = DEFAULT_KS) -> Dict[str, float]:
+    """
+    计算top-k准确率和MRR（排序结果编码为整数矩阵后整体比较）
+
+    Args:
+        rankings: 每个病例的排序结果
+        truth: 每个病例的标准答案综合征ID，None表示知识库中没有该诊断（计为未命中）
+
+    Returns:
+        Dict[str, float]: top{k}准确率和mrr，没有病例时全部为0
+    """
+    if not rankings:
+        return dict({f"top{k}": 0.0 for k in ks}, mrr=0.0)
+
+    codes: Dict[str, int] = {}
+    width = max(max((len(ranking) for ranking in rankings), default=0), 1)
+    matrix = np.full((len(rankings), width), -1, dtype=np.int64)
+    for i, ranking in enumerate(rankings):
+        matrix[i, :len(ranking)] = [codes.setdefault(syndrome_id, len(codes)) for syndrome_id in ranking]
+    # 标准答案不在任何排序结果中时编码为-2，不会与填充值-1相等
+    target = np.array([codes.get(syndrome_id, -2) if syndrome_id is not None else -2 for syndrome_id in truth], dtype=np.int64)
+
+    hits = matrix == target[:, None]
+    found = hits.any(axis=1)
+    rank = hits.argmax(axis=1)  # 0起始的名次（仅found为True时有效）
+    metrics = {f"top{k}": round(float(np.mean(found & (rank < k))), 4) for k in ks}
+    metrics["mrr"] = round(float(np.mean(np.where(found, 1.0 / (rank + 1), 0.0))), 4)
+    return metrics
+
+
+def labeled_cases(knowledge_base: KnowledgeBase) -> Tuple[List[List[str]], List[Optional[str]], List[str]]:
+    """
+    整理知识库病例文件中有诊断的病例
+
+    Args:
+        knowledge_base: 知识库
+
+    Returns:
+        Tuple[List[List[str]], List[Optional[str]], List[str]]: (各病例临床特征, 标准答案综合征ID, 原始诊断)，
+            诊断不在知识库中时标准答案为None
+    """
+    labels = build_label_index(knowledge_base.syndrome_data)
+    queries, truth, diagnoses = [], [], []
+    for case in knowledge_base._load_cases():
+        diagnosis = str(case.get("diagnosis", "")).strip()
+        if diagnosis in UNLABELED_DIAGNOSES or not case.get("clinical_features"):
+            continue
+        queries.append(case["clinical_features"])
+        truth.append(labels.get(diagnosis_key(diagnosis)))
+        diagnoses.append(diagnosis)
+    return queries, truth, diagnoses
+
+
+def evaluate_ranker(
+    knowledge_base: KnowledgeBase,
+    ranker: Ranker,
+    queries: List[List[str]],
+    truth: List[Optional[str]],
+    k: int = max(DEFAULT_KS),
+    per_query_latency: bool = True
+) -> Dict[str, Any]:
+    """
+    评估一个排序器
+
+    预热后对全部病例做一次批量排序得到指标和吞吐量，再（可选）逐个查询统计单次查询耗时分位数。
+
+    Args:
+        knowledge_base: 知识库
+        ranker: 排序器
+        queries: 各病例的症状
+        truth: 标准答案综合征ID
+        k: 每个病例取前k个结果
+        per_query_latency: 是否逐个查询统计耗时
+
+    Returns:
+        Dict[str, Any]: 病例数、知识库覆盖率、top-k准确率和MRR（全部有诊断的病例）、
+            covered（只计知识库收录诊断的病例）、批量吞吐量和单次查询耗时分位数（毫秒）
+    """
+    # 预热：构建索引和症状标准化缓存的时间不计入
+    ranker(knowledge_base, queries, k)
+
+    start = time.perf_counter()
+    rankings = ranker(knowledge_base, queries, k)
+    batch_time = time.perf_counter() - start
+
+    covered = [i for i, syndrome_id in enumerate(truth) if syndrome_id is not None]
+    result = {
+        "cases": len(queries),
+        "coverage": round(len(covered) / len(queries), 4) if queries else 0.0,
+        **ranking_metrics(rankings, truth),
+        "covered": ranking_metrics([rankings[i] for i in covered], [truth[i] for i in covered]),
+        "queries_per_second": round(len(queries) / batch_time, 1) if batch_time > 0 else 0.0
+    }
+
+    if per_query_latency and queries:
+        latencies = []
+        for symptoms in queries:
+            start = time.perf_counter()
+            ranker(knowledge_base, [symptoms], k)
+            latencies.append(time.perf_counter() - start)
+        p50, p95, p99 = (np.percentile(latencies, [50, 95, 99]) * 1000).tolist()
+        result.update(latency_p50_ms=round(p50, 4), latency_p95_ms=round(p95, 4), latency_p99_ms=round(p99, 4))
+    return result
+
+
+def synthetic_scale_up(
+    knowledge_base: KnowledgeBase,
+    syndromes: int,
+    cases: int,
+    seed: int = 0,
+    keep: float = 0.6,
+    noise: int = 1
+) -> Tuple[List[List[str]], List[str]]:
+    """
+    向知识库添加合成综合征，并从中抽样带标准答案的合成病例
+
+    合成综合征的症状从已有症状和合成症状组成的词表中按Zipf分布抽取（常见症状被大量综合征共享）；
+    每个合成病例保留所属综合征的部分症状，并混入少量随机症状作为噪声。
+
+    Args:
+        knowledge_base: 可写的知识库（会被修改，通常是临时目录中的副本）
+        syndromes: 合成综合征数量
+        cases: 合成病例数量
+        seed: 随机种子
+        keep: 病例保留所属综合征症状的比例
+        noise: 每个病例混入的随机症状数
+
+    Returns:
+        Tuple[List[List[str]], List[str]]: (病例症状, 标准答案综合征ID)
+    """
+    rng = random.Random(seed)
+    vocabulary = list(knowledge_base.symptom_mapping.keys()) + [f"合成症状{i}" for i in range(max(syndromes // 2, 50))]
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    weights = (weights / weights.sum()).tolist()
+
+    synthetic = {}
+    for i in range(syndromes):
+        symptoms = sorted(set(rng.choices(vocabulary, weights, k=rng.randint(4, 12))))
+        synthetic[f"synthetic_{i}"] = {"name": f"合成综合征{i}", "symptoms": symptoms, "prevalence": "1/100000"}
+    knowledge_base.add_syndromes(synthetic)
+
+    ids = list(synthetic.keys())
+    queries, truth = [], []
+    for _ in range(cases):
+        syndrome_id = rng.choice(ids)
+        symptoms = synthetic[syndrome_id]["symptoms"]
+        sample = rng.sample(symptoms, max(1, round(len(symptoms) * keep)))
+        queries.append(sample + rng.sample(vocabulary, noise))
+        truth.append(syndrome_id)
+    return queries, truth
+
+
+def run_evaluation(
+    rankers: List[str],
+    scales: Optional[List[int]] = None,
+    synthetic_cases: int = 1000,
+    knowledge_dir: Optional[str] = None,
+    per_query_latency: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    评估多个排序器；给出scales时在每个规模的合成扩容知识库上再评估一次
+
+    Args:
+        rankers: 排序器名称（RANKERS中的键）
+        scales: 合成综合征数量列表
+        synthetic_cases: 每个规模的合成病例数量
+        knowledge_dir: 知识库目录，None表示默认目录
+        per_query_latency: 是否统计单次查询耗时
+
+    Returns:
+        List[Dict[str, Any]]: 每个(规模, 排序器)一项结果，dataset为cases（真实病例）或synthetic
+    """
+    knowledge_base = KnowledgeBase(knowledge_dir)
+    results = []
+    try:
+        queries, truth, _ = labeled_cases(knowledge_base)
+        for name in rankers:
+            result = evaluate_ranker(knowledge_base, RANKERS[name], queries, truth, per_query_latency=per_query_latency)
+            results.append(dict(result, ranker=name, dataset="cases", syndromes=len(knowledge_base.syndrome_data)))
+
+        for scale in scales or []:
+            # 在临时目录中复制当前知识库后扩容，不修改原知识库；评估结束后连同数据库文件一起删除
+            with tempfile.TemporaryDirectory(prefix="clp_eval_") as scaled_dir:
+                scaled = KnowledgeBase(scaled_dir)
+                try:
+                    scaled.add_syndromes(dict(knowledge_base.syndrome_data))
+                    synthetic_queries, synthetic_truth = synthetic_scale_up(scaled, scale, synthetic_cases)
+                    for name in rankers:
+                        result = evaluate_ranker(scaled, RANKERS[name], synthetic_queries, synthetic_truth, per_query_latency=per_query_latency)
+                        results.append(dict(result, ranker=name, dataset="synthetic", syndromes=len(scaled.syndrome_data)))
+                finally:
+                    scaled.close()
+    finally:
+        knowledge_base.close()
+    return results
+
+
+def main() -> None:
+    """命令行入口：评估排序器并输出对比表"""
+    parser = argparse.ArgumentParser(description="用病例诊断评估综合征排序器")
+    parser.add_argument("--rankers", nargs="+", default=list(RANKERS.keys()), choices=list(RANKERS.keys()), help="评估的排序器")
+    parser.add_argument("--scale", nargs="*", type=int, default=[], help="合成扩容的综合征数量，如 1000 10000")
+    parser.add_argument("--synthetic-cases", type=int, default=1000, help="每个规模的合成病例数量")
+    parser.add_argument("--knowledge-dir", default=None, help="知识库目录，默认为data/knowledge")
+    parser.add_argument("--no-latency", action="store_true", help="不逐个查询统计耗时")
+    args = parser.parse_args()
+
+    results = run_evaluation(args.rankers, args.scale, args.synthetic_cases, args.knowledge_dir, not args.no_latency)
+    print(f"{'数据集':<10}{'综合征数':>8}{'排序器':>10}{'病例数':>8}{'覆盖率':>8}{'Top1':>8}{'Top3':>8}{'Top10':>8}{'MRR':>8}{'QPS':>10}{'P50(ms)':>10}{'P95(ms)':>10}")
+    for result in results:
+        print(
+            f"{result['dataset']:<10}{result['syndromes']:>8}{result['ranker']:>10}{result['cases']:>8}{result['coverage']:>8.2%}"
+            f"{result['top1']:>8.2%}{result['top3']:>8.2%}{result['top10']:>8.2%}{result['mrr']:>8.3f}"
+            f"{result['queries_per_second']:>10}{result.get('latency_p50_ms', 0):>10.3f}{result.get('latency_p95_ms', 0):>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""
+记录文件流式加载组件，逐条解析病例、考题等JSON记录文件，并提供列式缓存用于快速重复加载
+
+支持的输入格式：JSON数组、NDJSON、首尾相接或以逗号分隔的多个JSON对象（如CLP_exams.json），
+解析时只在内存中保留当前记录附近的缓冲区。
+"""
+
+import os
+import json
+import argparse
+from typing import Dict, List, Optional, Any, Iterable, Iterator, Tuple, Union, TextIO
+
+import numpy as np
+
+# 病例文件（CLP_cases.json）的记录格式：字段 -> 类型
+CASE_SCHEMA = {"case_id": str, "clinical_features": list, "diagnosis": str}
+
+# 考题文件（CLP_exams.json）的记录格式
+EXAM_SCHEMA = {"question": str, "option": dict, "answer": str}
+
+# 顶层记录之间允许出现的分隔字符
+_SEPARATORS = " \t\r\n,\ufeff"
+
+# 字符串中未转义的双引号会导致的解析错误
+_QUOTE_ERRORS = ("Expecting ',' delimiter", "Expecting ':' delimiter")
+
+# 列式缓存中表示字段缺失的编码
+_MISSING = -1
+
+
+class RecordError(ValueError):
+    """记录文件格式错误或记录不符合格式要求，包含出错位置"""
+    def __init__(self, message: str, offset: int, line: int, column: Optional[int] = None):
+        """
+        Args:
+            message: 错误描述
+            offset: 出错位置的字符偏移
+            line: 出错位置的行号（从1开始）
+            column: 出错位置的列号（从1开始），未知时为None
+        """
+        location = f"第{line}行" + (f"第{column}列" if column is not None else "") + f"（偏移{offset}）"
+        super().__init__(f"{location}: {message}")
+        self.message = message
+        self.offset = offset
+        self.line = line
+        self.column = column
+
+
+def iter_json_values(
+    stream: TextIO,
+    chunk_size: int = 65536,
+    max_record_chars: int = 16 * 1024 * 1024,
+    repair_quotes: bool = False
+) -> Iterator[Tuple[int, int, Any]]:
+    """
+    从文本流中逐个解析顶层JSON值
+
+    值之间的空白和逗号被忽略；顶层的"["和"]"视为分隔符，因此JSON数组会逐个产出其中的元素。
+    缓冲区读到的内容不足以解析出下一个值时继续读取，已解析的部分会被丢弃。
+
+    repair_quotes只用于已知含有未转义双引号的文件（CLP_exams.json，如题干中的"出生时发现上腭裂开"）：
+    缺少分隔符的错误被当作字符串中的引号转义后重新解析。这一修复会把真正缺少逗号的数据拼进字符串，
+    因此默认关闭，格式错误按原始出错位置报告。
+
+    Args:
+        stream: 文本流（如打开的文件）
+        chunk_size: 每次读取的字符数
+        max_record_chars: 单个值的最大长度，超过时视为格式错误（避免错误数据读入整个文件）
+        repair_quotes: 是否尝试转义字符串中未转义的双引号
+
+    Yields:
+        Tuple[int, int, Any]: (字符偏移, 行号, 值)
+
+    Raises:
+        RecordError: JSON格式错误时
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    base = 0  # buffer[0]的字符偏移
+    pos = 0  # 当前解析位置（buffer内）
+    line = 1  # pos所在行号
+    line_start = 0  # pos所在行的起始字符偏移
+    counted = 0  # 行号已统计到的buffer位置
+    repaired = 0  # 当前值中补充的转义字符数
+    first_error = None  # 当前值第一次修复前的原始错误，修复后仍无法解析时报告该错误
+    in_array = False
+    eof = False
+
+    def read_more() -> bool:
+        nonlocal buffer, base, pos, counted, eof
+        if eof:
+            return False
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        # 丢弃已解析的部分
+        if pos:
+            buffer, base, counted, pos = buffer[pos:], base + pos, counted - pos, 0
+        buffer += chunk
+        return True
+
+    def advance(to: int) -> None:
+        nonlocal line, line_start, counted
+        newline = buffer.rfind("\n", counted, to)
+        if newline >= 0:
+            line += buffer.count("\n", counted, to)
+            line_start = base + newline + 1
+        counted = to
+
+    while True:
+        # 跳过分隔符
+        while True:
+            while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+                pos += 1
+            if pos < len(buffer) and not in_array and buffer[pos] == "[":
+                in_array = True
+                pos += 1
+                continue
+            if pos < len(buffer) and in_array and buffer[pos] == "]":
+                in_array = False
+                pos += 1
+                continue
+            if pos < len(buffer):
+                break
+            advance(pos)
+            if not read_more():
+                return
+        advance(pos)
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            # 缓冲区末尾的数字等标量可能被截断，读到更多内容后重新解析
+            if end == len(buffer) and not isinstance(value, (dict, list)) and read_more():
+                continue
+        except json.JSONDecodeError as e:
+            if repair_quotes and e.pos < len(buffer) and e.msg in _QUOTE_ERRORS:
+                quote = len(buffer[:e.pos].rstrip()) - 1
+                if quote > pos and buffer[quote] == '"' and buffer[quote - 1] != "\\":
+                    # 未转义的双引号提前结束了字符串，转义后重新解析
+                    if first_error is None:
+                        advance(e.pos)
+                        offset = base + e.pos
+                        first_error = RecordError(e.msg, offset, line, offset - line_start + 1)
+                    buffer = buffer[:quote] + "\\" + buffer[quote:]
+                    base -= 1
+                    repaired += 1
+                    continue
+            if len(buffer) - pos < max_record_chars and read_more():
+                continue
+            if first_error is not None:
+                raise first_error from None
+            advance(e.pos)
+            offset = base + e.pos
+            raise RecordError(e.msg, offset, line, offset - line_start + 1) from None
+
+        yield base + pos + repaired, line, value
+        pos = end
+        repaired = 0
+        first_error = None
+
+
+def validate_record(record: Any, schema: Dict[str, Any]) -> List[str]:
+    """
+    检查记录是否符合格式要求
+
+    Args:
+        record: 记录
+        schema: 必需字段 -> 类型（或类型元组）
+
+    Returns:
+        List[str]: 问题列表，符合要求时为空
+    """
+    if not isinstance(record, dict):
+        return [f"记录不是JSON对象（{type(record).__name__}）"]
+    problems = []
+    for field, expected in schema.items():
+        if field not in record:
+            problems.append(f"缺少字段{field}")
+        elif not isinstance(record[field], expected):
+            problems.append(f"字段{field}的类型为{type(record[field]).__name__}")
+    return problems
+
+
+def read_records(
+    source: Union[str, TextIO],
+    schema: Optional[Dict[str, Any]] = None,
+    errors: Optional[List[RecordError]] = None,
+    repair_quotes: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """
+    逐条读取记录文件
+
+    Args:
+        source: 文件路径或文本流
+        schema: 记录格式要求，None表示只要求记录是JSON对象
+        errors: 不符合格式要求的记录收集到该列表中并跳过；None表示遇到时抛出异常
+        repair_quotes: 是否尝试转义字符串中未转义的双引号（见iter_json_values）
+
+    Yields:
+        Dict[str, Any]: 记录
+
+    Raises:
+        RecordError: JSON格式错误，或errors为None时记录不符合格式要求
+    """
+    if isinstance(source, str):
+        with open(source, "r", encoding="utf-8") as stream:
+            yield from read_records(stream, schema, errors, repair_quotes)
+        return
+
+    for offset, line, record in iter_json_values(source, repair_quotes=repair_quotes):
+        problems = validate_record(record, schema or {})
+        if problems:
+            error = RecordError("; ".join(problems), offset, line)
+            if errors is None:
+                raise error
+            errors.append(error)
+            continue
+        yield record
+
+
+def _source_stamp(source_path: str) -> List[int]:
+    """源文件的大小和修改时间，用于判断缓存是否过期"""
+    stat = os.stat(source_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def write_columnar_cache(records: Iterable[Dict[str, Any]], cache_path: str, source_path: Optional[str] = None) -> int:
+    """
+    将记录写入列式缓存：每个字段一列整数编码，相同的值（如考题科目、级别）只在字符串表中存一次
+
+    Args:
+        records: 记录
+        cache_path: 缓存文件路径
+        source_path: 源文件路径，记录其大小和修改时间用于判断缓存是否过期
+
+    Returns:
+        int: 写入的记录数
+    """
+    fields: Dict[str, int] = {}
+    values: Dict[str, int] = {}
+    rows = []
+    for record in records:
+        row = [_MISSING] * len(fields)
+        for field, value in record.items():
+            if field not in fields:
+                fields[field] = len(fields)
+                row.append(_MISSING)
+            encoded = json.dumps(value, ensure_ascii=False)
+            row[fields[field]] = values.setdefault(encoded, len(values))
+        rows.append(row)
+
+    codes = np.full((len(rows), len(fields)), _MISSING, dtype=np.int32)
+    for i, row in enumerate(rows):
+        codes[i, :len(row)] = row
+    encoded_values = [value.encode("utf-8") for value in values]
+    meta = {"fields": list(fields), "source": _source_stamp(source_path) if source_path else None}
+
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+            codes=codes,
+            value_offsets=np.concatenate(([0], np.cumsum([len(b) for b in encoded_values]))).astype(np.int64),
+            value_data=np.frombuffer(b"".join(encoded_values), dtype=np.uint8)
+        )
+    os.replace(tmp_path, cache_path)
+    return len(rows)
+
+
+class ColumnarRecords:
+    """
+    列式缓存中的记录
+
+    打开时只解码字符串表中的不同值，按列访问时直接用整数编码取值；记录字典在访问时才组装。
+    """
+    def __init__(self, cache_path: str):
+        """
+        打开列式缓存
+
+        Args:
+            cache_path: 缓存文件路径
+        """
+        with np.load(cache_path, allow_pickle=False) as data:
+            self.meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+            self.codes = data["codes"]
+            offsets = data["value_offsets"]
+            value_data = data["value_data"].tobytes()
+        self.fields: List[str] = self.meta["fields"]
+        self._values = [
+            json.loads(value_data[offsets[i]:offsets[i + 1]].decode("utf-8"))
+            for i in range(len(offsets) - 1)
+        ]
+
+    def is_fresh(self, source_path: str) -> bool:
+        """
+        缓存是否与源文件一致
+
+        Args:
+            source_path: 源文件路径
+
+        Returns:
+            bool: 源文件大小和修改时间与写入缓存时相同时为True
+        """
+        return os.path.exists(source_path) and self.meta.get("source") == _source_stamp(source_path)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def column(self, field: str) -> List[Any]:
+        """
+        获取一列的值
+
+        Args:
+            field: 字段名
+
+        Returns:
+            List[Any]: 各记录该字段的值，缺失时为None
+        """
+        values = self._values
+        return [values[code] if code != _MISSING else None for code in self.codes[:, self.fields.index(field)].tolist()]
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return {
+            field: self._values[code]
+            for field, code in zip(self.fields, self.codes[index].tolist())
+            if code != _MISSING
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        values = self._values
+        for row in self.codes.tolist():
+            yield {field: values[code] for field, code in zip(self.fields, row) if code != _MISSING}
+
+
+def load_records(
+    source_path: str,
+    schema: Optional[Dict[str, Any]] = None,
+    cache_path: Optional[str] = None,
+    repair_quotes: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    加载记录文件，提供缓存路径时优先读取未过期的列式缓存，否则解析后重写缓存
+
+    不符合格式要求的记录被跳过并打印位置。
+
+    Args:
+        source_path: 记录文件路径
+        schema: 记录格式要求
+        cache_path: 列式缓存文件路径
+        repair_quotes: 是否尝试转义字符串中未转义的双引号（见iter_json_values）
+
+    Returns:
+        List[Dict[str, Any]]: 记录列表
+    """
+    if cache_path and os.path.exists(cache_path):
+        try:
+            cached = ColumnarRecords(cache_path)
+            if cached.is_fresh(source_path):
+                return list(cached)
+        except Exception as e:
+            print(f"读取列式缓存失败: {str(e)}")
+
+    errors: List[RecordError] = []
+    records = list(read_records(source_path, schema, errors, repair_quotes))
+    for error in errors:
+        print(f"跳过{source_path}中的无效记录: {str(error)}")
+
+    if cache_path:
+        try:
+            write_columnar_cache(records, cache_path, source_path)
+        except Exception as e:
+            print(f"写入列式缓存失败: {str(e)}")
+    return records
+
+
+def main() -> None:
+    """命令行入口：校验记录文件并转换为列式缓存"""
+    parser = argparse.ArgumentParser(description="校验记录文件并转换为列式缓存")
+    parser.add_argument("source", help="记录文件路径（JSON数组、NDJSON或首尾相接的JSON对象）")
+    parser.add_argument("cache", help="列式缓存输出路径")
+    parser.add_argument("--schema", choices=["case", "exam"], default=None, help="按病例或考题格式校验记录")
+    parser.add_argument("--repair-quotes", action="store_true", help="转义字符串中未转义的双引号（用于CLP_exams.json）")
+    args = parser.parse_args()
+
+    schema = {"case": CASE_SCHEMA, "exam": EXAM_SCHEMA}.get(args.schema)
+    errors: List[RecordError] = []
+    count = write_columnar_cache(read_records(args.source, schema, errors, args.repair_quotes), args.cache, args.source)
+    for error in errors:
+        print(f"无效记录: {str(error)}")
+    print(f"已写入{count}条记录到{args.cache}（跳过{len(errors)}条）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+"""
+症状标准化组件，将中英文自由文本症状映射为标准症状名称
+先在同义词/缩写字典树中精确查找，找不到时在字典树上做有界编辑距离的模糊匹配，解析结果放入LRU缓存
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Iterable, Tuple
+
+# 标准症状名称及其同义词、缩写（中英文，英文按小写匹配）
+SYMPTOM_SYNONYMS = {
+    "唇裂": ["唇裂畸形", "兔唇", "cleft lip", "cl"],
+    "单侧唇裂": ["左侧唇裂", "右侧唇裂", "unilateral cleft lip", "ucl"],
+    "双侧唇裂": ["bilateral cleft lip", "bcl"],
+    "腭裂": ["腭裂畸形", "cleft palate", "cp"],
+    "唇腭裂": [
+        "唇裂伴腭裂", "唇裂合并腭裂", "cleft lip and palate", "cleft lip and/or palate",
+        "cleft lip with or without cleft palate", "cl/p", "clp"
+    ],
+    "软腭裂": ["cleft soft palate"],
+    "黏膜下腭裂": ["粘膜下腭裂", "submucous cleft palate", "smcp"],
+    "悬雍垂裂": ["腭垂裂", "bifid uvula"],
+    "下唇凹陷": ["下唇窝", "下唇瘘", "下唇瘘管", "lip pits", "lower lip pits"],
+    "缺牙": ["先天缺牙", "牙齿缺失", "hypodontia", "tooth agenesis", "missing teeth"],
+    "下颌发育不全": ["小下颌", "小颌畸形", "下颌后缩", "mandibular hypoplasia", "micrognathia", "retrognathia"],
+    "颧骨发育不全": ["颧骨发育不良", "malar hypoplasia", "zygomatic hypoplasia"],
+    "舌后坠": ["glossoptosis"],
+    "Pierre Robin序列征": ["皮埃尔罗宾序列征", "pierre robin sequence", "prs"],
+    "耳廓畸形": ["耳廓异常", "auricular malformation", "abnormal pinna"],
+    "小耳畸形": ["microtia"],
+    "听力损失": ["听力下降", "耳聋", "hearing loss", "deafness"],
+    "中耳炎": ["otitis media"],
+    "眼睑下垂": ["上睑下垂", "ptosis"],
+    "近视": ["myopia"],
+    "视网膜脱离": ["视网膜剥离", "retinal detachment"],
+    "关节疼痛": ["关节痛", "arthralgia", "joint pain"],
+    "喂养困难": ["喂养障碍", "feeding difficulties"],
+    "发育迟缓": ["developmental delay"],
+    "智力障碍": ["智力低下", "intellectual disability"],
+    "先天性心脏病": ["先心病", "congenital heart disease", "chd"],
+    "颅面畸形": ["颅面异常", "craniofacial anomaly", "craniofacial malformation"],
+    "眼部异常": ["眼异常", "ocular anomaly", "eye abnormality"],
+    "耳部异常": ["耳异常", "ear anomaly", "ear abnormality"]
+}
+
+# 清洗时去除的首尾标点
+_STRIP_CHARS = " .,;:!?。，、；：！？\"'“”‘’()（）[]【】"
+_WHITESPACE = re.compile(r"\s+")
+# 不改变含义的字符（空白、标点、连字符等），中文写法只允许这类差异
+_NON_SEMANTIC = re.compile(r"[\W_]+")
+_CJK = re.compile(r"[\u3400-\u9fff]")
+
+# 否定词及其作用范围的边界：自由文本中否定词之后、到下一个分句标点（或转折词）之前提到的症状视为不存在
+_NEGATION_SCOPE = re.compile(r"无|未见|未|否认|没有|不伴|\b(?:no|not|without|denies|negative for)\b")
+_CLAUSE_BREAK = re.compile(r"[,;.!?。，；！？]|但|\bbut\b")
+
+# 否定标记：含否定的写法（如"无听力损失"、"下颌发育正常"）表示该症状不存在，不能解析为症状本身
+NEGATION_PATTERN = re.compile(r"无|未见|未|否认|没有|不伴|正常|\b(?:no|not|without|absent|denies|normal)\b")
+
+
+def clean_symptom_text(text: str) -> str:
+    """
+    清洗症状文本：全角转半角、转小写、合并空白并去除首尾标点
+
+    Args:
+        text: 原始症状文本
+
+    Returns:
+        str: 清洗后的文本
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    return _WHITESPACE.sub(" ", text).strip(_STRIP_CHARS)
+
+
+def negation_scopes(text: str) -> List[Tuple[int, int]]:
+    """
+    查找清洗后文本中的否定范围：从否定词开始到分句标点或转折词之前
+
+    Args:
+        text: 清洗后的文本
+
+    Returns:
+        List[Tuple[int, int]]: (起始位置, 结束位置)列表
+    """
+    scopes = []
+    for marker in _NEGATION_SCOPE.finditer(text):
+        end = _CLAUSE_BREAK.search(text, marker.end())
+        scopes.append((marker.start(), end.start() if end else len(text)))
+    return scopes
+
+
+def remove_negated(text: str) -> str:
+    """
+    清洗文本并去掉其中的否定范围，如"父亲无下唇凹陷，母亲有唇裂"得到"父亲，母亲有唇裂"
+
+    Args:
+        text: 自由文本
+
+    Returns:
+        str: 清洗后去掉否定内容的文本
+    """
+    text = clean_symptom_text(text)
+    kept, position = [], 0
+    for start, end in negation_scopes(text):
+        if start >= position:
+            kept.append(text[position:start])
+            position = end
+        else:
+            position = max(position, end)
+    kept.append(text[position:])
+    return "".join(kept)
+
+
+def _is_word_char(char: str) -> bool:
+    """是否为英文字母或数字（中文按字切分，不受单词边界限制）"""
+    return char.isascii() and char.isalnum()
+
+
+class _TrieNode:
+    """字典树节点"""
+    __slots__ = ("children", "canonical")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.canonical: Optional[str] = None
+
+
+class SynonymTrie:
+    """
+    同义词字典树，按字符存储清洗后的症状写法，终止节点记录对应的标准症状名称
+    """
+    def __init__(self):
+        """初始化字典树"""
+        self.root = _TrieNode()
+        self.size = 0
+
+    def insert(self, term: str, canonical: str, overwrite: bool = True) -> None:
+        """
+        插入一个写法
+
+        Args:
+            term: 清洗后的症状写法
+            canonical: 标准症状名称
+            overwrite: 写法已存在时是否覆盖
+        """
+        node = self.root
+        for char in term:
+            node = node.children.setdefault(char, _TrieNode())
+        if node.canonical is None:
+            self.size += 1
+        elif not overwrite:
+            return
+        node.canonical = canonical
+
+    def get(self, term: str) -> Optional[str]:
+        """
+        精确查找
+
+        Args:
+            term: 清洗后的症状写法
+
+        Returns:
+            Optional[str]: 标准症状名称，未找到时返回None
+        """
+        node = self.root
+        for char in term:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node.canonical
+
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """
+        在一段文本中查找所有出现的写法（从每个位置出发沿字典树匹配）
+
+        英文写法要求前后不是字母或数字，避免"cl"之类的缩写匹配到单词内部。
+
+        Args:
+            text: 清洗后的文本
+
+        Returns:
+            List[Tuple[int, str]]: (起始位置, 标准症状名称)列表，按出现位置，可能重复
+        """
+        found = []
+        for start in range(len(text)):
+            if start > 0 and _is_word_char(text[start]) and _is_word_char(text[start - 1]):
+                continue
+            node = self.root
+            for end in range(start, len(text)):
+                node = node.children.get(text[end])
+                if node is None:
+                    break
+                if node.canonical is not None and not (
+                    end + 1 < len(text) and _is_word_char(text[end]) and _is_word_char(text[end + 1])
+                ):
+                    found.append((start, node.canonical))
+        return found
+
+    def search(self, term: str, max_distance: int) -> List[Tuple[int, str]]:
+        """
+        查找编辑距离不超过max_distance的全部写法
+
+        沿字典树逐层计算Levenshtein距离矩阵的一行，共享前缀只计算一次，
+        当某一行的最小值已超过上限时剪掉整棵子树。
+
+        Args:
+            term: 清洗后的症状写法
+            max_distance: 最大编辑距离
+
+        Returns:
+            List[Tuple[int, str]]: (编辑距离, 标准症状名称)列表
+        """
+        results = []
+        first_row = list(range(len(term) + 1))
+        stack = [(child, char, first_row) for char, child in self.root.children.items()]
+        while stack:
+            node, char, previous_row = stack.pop()
+            row = [previous_row[0] + 1]
+            for column in range(1, len(term) + 1):
+                row.append(min(
+                    row[column - 1] + 1,
+                    previous_row[column] + 1,
+                    previous_row[column - 1] + (term[column - 1] != char)
+                ))
+
+            if node.canonical is not None and row[-1] <= max_distance:
+                results.append((row[-1], node.canonical))
+            if min(row) <= max_distance:
+                stack.extend((child, next_char, row) for next_char, child in node.children.items())
+        return results
+
+
+class SymptomNormalizer:
+    """
+    症状标准化器
+
+    精确匹配同义词和缩写；含否定标记的写法不再解析。中文写法只忽略空白和标点差异，
+    不做模糊匹配（一个汉字的差异就可能改变含义，如"双侧唇腭裂"与"双侧唇裂"）；
+    英文写法未命中时按文本长度给出编辑距离预算做模糊匹配，只有唯一的最近标准症状时才采用。
+    """
+    def __init__(
+        self,
+        synonyms: Optional[Dict[str, List[str]]] = None,
+        max_distance: int = 2,
+        cache_size: int = 4096
+    ):
+        """
+        初始化症状标准化器
+
+        Args:
+            synonyms: 标准症状名称 -> 同义词列表，默认使用SYMPTOM_SYNONYMS
+            max_distance: 模糊匹配允许的最大编辑距离
+            cache_size: LRU缓存容量
+        """
+        self.max_distance = max_distance
+        self.trie = SynonymTrie()
+        self._resolve = lru_cache(maxsize=cache_size)(self._resolve_uncached)
+
+        for canonical, names in (SYMPTOM_SYNONYMS if synonyms is None else synonyms).items():
+            self.add_synonyms(canonical, names)
+
+    def add_synonyms(self, canonical: str, names: Iterable[str] = ()) -> None:
+        """
+        登记标准症状及其同义词
+
+        Args:
+            canonical: 标准症状名称
+            names: 同义词、缩写列表
+        """
+        self.trie.insert(clean_symptom_text(canonical), canonical)
+        for name in names:
+            self.trie.insert(clean_symptom_text(name), canonical)
+        self._resolve.cache_clear()
+
+    def add_terms(self, terms: Iterable[str]) -> None:
+        """
+        把词表中的症状登记为标准症状，已作为同义词存在的写法保持原有映射
+
+        Args:
+            terms: 症状列表，如知识库症状映射的键
+        """
+        for term in terms:
+            self.trie.insert(clean_symptom_text(term), term, overwrite=False)
+        self._resolve.cache_clear()
+
+    def _resolve_uncached(self, text: str) -> Optional[str]:
+        """解析单个症状（不经过缓存）"""
+        key = clean_symptom_text(text)
+        if not key:
+            return None
+
+        canonical = self.trie.get(key)
+        if canonical is not None:
+            return canonical
+        if NEGATION_PATTERN.search(key):
+            return None
+
+        if _CJK.search(key):
+            # 中文写法只允许空白、标点等不改变含义的差异
+            return self.trie.get(_NON_SEMANTIC.sub("", key))
+
+        # 短英文缩写只做精确匹配，长文本最多允许max_distance处差异
+        budget = min(self.max_distance, len(key) // 3)
+        if budget == 0:
+            return None
+        matches = self.trie.search(key, budget)
+        if not matches:
+            return None
+        best = min(distance for distance, _ in matches)
+        candidates = {canonical for distance, canonical in matches if distance == best}
+        return candidates.pop() if len(candidates) == 1 else None
+
+    def normalize(self, symptom: str) -> Optional[str]:
+        """
+        将症状文本解析为标准症状名称
+
+        Args:
+            symptom: 症状文本
+
+        Returns:
+            Optional[str]: 标准症状名称，无法解析时返回None
+        """
+        return self._resolve(symptom)
+
+    def normalize_all(self, symptoms: Iterable[str]) -> List[str]:
+        """
+        批量标准化症状，无法解析的症状保留原文（去除首尾空白），结果去重并保持顺序
+
+        Args:
+            symptoms: 症状列表
+
+        Returns:
+            List[str]: 标准化后的症状列表
+        """
+        normalized = []
+        for symptom in symptoms:
+            canonical = self._resolve(symptom) or symptom.strip()
+            if canonical and canonical not in normalized:
+                normalized.append(canonical)
+        return normalized
+
+    def extract(self, text: str, include_negated: bool = False) -> List[str]:
+        """
+        从自由文本（如病史、家族史）中提取提到的标准症状
+
+        默认跳过否定范围内的症状（如"父亲无下唇凹陷"、"否认先心病"），否定范围从否定词开始到分句结束。
+
+        Args:
+            text: 自由文本
+            include_negated: 是否保留被否定的症状
+
+        Returns:
+            List[str]: 标准症状名称列表，去重并保持出现顺序
+        """
+        text = clean_symptom_text(text)
+        scopes = [] if include_negated else negation_scopes(text)
+        return list(dict.fromkeys(
+            canonical for start, canonical in self.trie.find_all(text)
+            if not any(scope_start <= start < scope_end for scope_start, scope_end in scopes)
+        ))
+
+    def cache_info(self):
+        """获取LRU缓存统计"""
+        return self._resolve.cache_info()
+
+
+# 进程级默认标准化器
+default_normalizer = SymptomNormalizer()
+
+
+def normalize_symptom(symptom: str) -> Optional[str]:
+    """
+    使用默认标准化器解析单个症状
+
+    Args:
+        symptom: 症状文本
+
+    Returns:
+        Optional[str]: 标准症状名称，无法解析时返回None
+    """
+    return default_normalizer.normalize(symptom)
+
+
+def normalize_symptoms(symptoms: Iterable[str]) -> List[str]:
+    """
+    使用默认标准化器批量标准化症状
+
+    Args:
+        symptoms: 症状列表
+
+    Returns:
+        List[str]: 标准化后的症状列表
+    """
+    return default_normalizer.normalize_all(symptoms)
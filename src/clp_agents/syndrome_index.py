@@ -0,0 +1,230 @@
+"""
+症状-综合征稀疏关联矩阵，用于大规模综合征目录的向量化匹配打分
+"""
+
+from typing import Dict, List, Optional, Any, Tuple, Iterable, Mapping
+
+import numpy as np
+
+
+class SyndromeIndex:
+    """
+    症状-综合征关联矩阵，按CSR格式存储（行为症状，列为综合征）
+
+    查询时把患者症状视为稀疏的0/1行向量，与关联矩阵相乘得到每个综合征的匹配症状数，
+    再除以预先计算的各综合征症状总数得到匹配度，最后用部分选择取前k个。
+    """
+    def __init__(
+        self,
+        syndrome_ids: List[str],
+        symptoms: List[str],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        symptom_counts: np.ndarray,
+        symptom_pos: Optional[Mapping[str, int]] = None
+    ):
+        """
+        初始化关联矩阵
+
+        Args:
+            syndrome_ids: 综合征ID列表（列）
+            symptoms: 症状列表（行）
+            indptr: CSR行指针，长度为症状数+1
+            indices: CSR列下标（综合征序号）
+            symptom_counts: 各综合征的症状总数
+            symptom_pos: 症状 -> 行号映射，None表示由symptoms构建（快照等场景可传入按需查找的映射）
+        """
+        self.syndrome_ids = syndrome_ids
+        self.symptoms = symptoms
+        self.indptr = indptr
+        self.indices = indices
+        self.symptom_counts = symptom_counts
+        self.symptom_pos = symptom_pos if symptom_pos is not None else {symptom: i for i, symptom in enumerate(symptoms)}
+        self._syndrome_pos = None
+
+    @property
+    def syndrome_pos(self) -> Dict[str, int]:
+        """综合征ID -> 列号，首次使用时构建"""
+        if self._syndrome_pos is None:
+            self._syndrome_pos = {syndrome_id: i for i, syndrome_id in enumerate(self.syndrome_ids)}
+        return self._syndrome_pos
+
+    @classmethod
+    def build(cls, syndrome_data: Dict[str, Dict[str, Any]], symptom_mapping: Dict[str, List[str]]) -> 'SyndromeIndex':
+        """
+        由综合征数据和症状映射构建关联矩阵
+
+        Args:
+            syndrome_data: 综合征数据，综合征ID -> 综合征信息
+            symptom_mapping: 症状映射，症状 -> 综合征ID列表
+
+        Returns:
+            SyndromeIndex: 关联矩阵
+        """
+        syndrome_ids = list(syndrome_data.keys())
+        syndrome_pos = {syndrome_id: i for i, syndrome_id in enumerate(syndrome_ids)}
+
+        symptoms = list(symptom_mapping.keys())
+        rows, columns = [], []
+        for row, symptom in enumerate(symptoms):
+            # 映射中没有详细信息的综合征不参与匹配
+            row_columns = [syndrome_pos[s] for s in symptom_mapping[symptom] if s in syndrome_pos]
+            rows.extend([row] * len(row_columns))
+            columns.extend(row_columns)
+
+        # 按(行, 列)编码后一次性排序去重（同一症状下重复的综合征只计一次），再由各行非零元个数得到行指针
+        width = max(1, len(syndrome_ids))
+        keys = np.unique(np.array(rows, dtype=np.int64) * width + np.array(columns, dtype=np.int64))
+        indptr = np.zeros(len(symptoms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys // width, minlength=len(symptoms)), out=indptr[1:])
+        indices = (keys % width).astype(np.int32)
+
+        symptom_counts = np.array(
+            [len(syndrome_data[syndrome_id].get("symptoms", [])) for syndrome_id in syndrome_ids],
+            dtype=np.int32
+        )
+
+        return cls(syndrome_ids, symptoms, indptr, indices, symptom_counts)
+
+    @property
+    def num_syndromes(self) -> int:
+        """综合征数量"""
+        return len(self.syndrome_ids)
+
+    def symptom_rows(self, symptoms: Iterable[str]) -> np.ndarray:
+        """
+        将症状转换为行号，忽略未知症状和重复症状
+
+        Args:
+            symptoms: 症状列表
+
+        Returns:
+            np.ndarray: 行号数组
+        """
+        rows = {self.symptom_pos[symptom] for symptom in symptoms if symptom in self.symptom_pos}
+        return np.fromiter(sorted(rows), dtype=np.int64, count=len(rows))
+
+    def _gather(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        取出多行的全部非零列
+
+        Args:
+            rows: 行号数组
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (非零列下标, 各非零元素所属的第几个输入行)
+        """
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        owners = np.repeat(np.arange(len(rows)), lengths)
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return self.indices[starts[owners] + offsets], owners
+
+    def match_counts(self, symptoms: Iterable[str]) -> np.ndarray:
+        """
+        计算每个综合征的匹配症状数（症状行向量与关联矩阵相乘）
+
+        Args:
+            symptoms: 症状列表
+
+        Returns:
+            np.ndarray: 各综合征的匹配症状数
+        """
+        columns, _ = self._gather(self.symptom_rows(symptoms))
+        return np.bincount(columns, minlength=self.num_syndromes)
+
+    def match_counts_batch(self, symptom_lists: List[Iterable[str]]) -> np.ndarray:
+        """
+        批量计算多位患者的匹配症状数（患者-症状矩阵与关联矩阵相乘）
+
+        Args:
+            symptom_lists: 每位患者的症状列表
+
+        Returns:
+            np.ndarray: 形状为(患者数, 综合征数)的匹配症状数矩阵
+        """
+        patient_rows = [self.symptom_rows(symptoms) for symptoms in symptom_lists]
+        patients = np.repeat(np.arange(len(patient_rows)), [len(rows) for rows in patient_rows])
+        rows = np.concatenate(patient_rows) if patient_rows else np.empty(0, dtype=np.int64)
+
+        columns, owners = self._gather(rows)
+        flat = patients[owners] * self.num_syndromes + columns
+        counts = np.bincount(flat, minlength=len(patient_rows) * self.num_syndromes)
+        return counts.reshape(len(patient_rows), self.num_syndromes)
+
+    def match_percentages(self, counts: np.ndarray) -> np.ndarray:
+        """
+        将匹配症状数换算为匹配度百分比
+
+        Args:
+            counts: 匹配症状数（一维或二维）
+
+        Returns:
+            np.ndarray: 匹配度百分比，症状总数为0的综合征记为0
+        """
+        totals = self.symptom_counts.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percentages = np.where(totals > 0, counts * 100.0 / totals, 0.0)
+        return percentages
+
+    def top_k(self, counts: np.ndarray, k: Optional[int] = None) -> List[Tuple[str, int, int, float]]:
+        """
+        从匹配结果中选出匹配度最高的k个综合征
+
+        Args:
+            counts: 各综合征的匹配症状数
+            k: 返回数量，None表示返回全部匹配的综合征
+
+        Returns:
+            List[Tuple[str, int, int, float]]: (综合征ID, 匹配症状数, 症状总数, 匹配度百分比)列表，按匹配度降序
+        """
+        return self.select(counts, k)
+
+    def select(
+        self,
+        counts: np.ndarray,
+        k: Optional[int] = None,
+        min_score: float = 0.0,
+        after: Optional[Tuple[float, int]] = None
+    ) -> List[Tuple[str, int, int, float]]:
+        """
+        按(匹配度降序, 综合征录入顺序)选出前k个综合征，可设置匹配度下限并从上一页末尾之后继续
+
+        只对满足条件的候选做部分选择（argpartition），再对选出的k个排序，不对全部候选排序；
+        与第k个匹配度相同的候选全部参与最终排序，保证分页边界上的顺序与完整排序一致。
+
+        Args:
+            counts: 各综合征的匹配症状数
+            k: 返回数量，None表示返回全部
+            min_score: 匹配度百分比下限（包含）
+            after: 上一页最后一项的(匹配度百分比, 列号)，只返回排在其后的综合征
+
+        Returns:
+            List[Tuple[str, int, int, float]]: (综合征ID, 匹配症状数, 症状总数, 匹配度百分比)列表
+        """
+        percentages = self.match_percentages(counts)
+        mask = counts > 0
+        if min_score > 0:
+            mask &= percentages >= min_score
+        if after is not None:
+            score, column = after
+            mask &= (percentages < score) | ((percentages == score) & (np.arange(len(percentages)) > column))
+        candidates = np.flatnonzero(mask)
+
+        if k is not None and 0 < k < len(candidates):
+            scores = percentages[candidates]
+            threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            candidates = candidates[scores >= threshold]
+
+        order = np.lexsort((candidates, -percentages[candidates]))
+        if k is not None:
+            order = order[:max(k, 0)]
+
+        return [
+            (self.syndrome_ids[i], int(counts[i]), int(self.symptom_counts[i]), float(percentages[i]))
+            for i in candidates[order]
+        ]
@@ -0,0 +1,272 @@
+"""
+会诊耗时、token和费用统计组件
+每次会诊生成结构化的调用轨迹，同时汇总到进程级计数器，用于容量规划
+"""
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Iterator
+
+# 各模型每1K token的价格（美元），格式为(输入价格, 输出价格)
+MODEL_PRICES = {
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4": (0.03, 0.06)
+}
+
+_current_trace = contextvars.ContextVar("clp_current_trace", default=None)
+_current_stage = contextvars.ContextVar("clp_current_stage", default=None)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    估算一次调用的费用
+
+    Args:
+        model: 模型名称
+        prompt_tokens: 输入token数
+        completion_tokens: 输出token数
+
+    Returns:
+        float: 费用（美元），未知模型返回0
+    """
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return round((prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000, 8)
+
+
+class ConsultTrace:
+    """
+    单次会诊的调用轨迹，记录各阶段耗时和每次语言模型调用
+    """
+    def __init__(self):
+        """初始化调用轨迹"""
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        self.stages: List[Dict[str, Any]] = []
+        self.calls: List[Dict[str, Any]] = []
+
+    def add_stage(self, name: str, start: float, duration: float, error: bool = False) -> None:
+        """
+        记录一个阶段
+
+        Args:
+            name: 阶段名称
+            start: 阶段开始时间（perf_counter）
+            duration: 阶段耗时（秒）
+            error: 阶段是否因异常结束
+        """
+        self.stages.append({
+            "name": name,
+            "start_offset": round(start - self.started_at, 6),
+            "duration": round(duration, 6),
+            "error": error
+        })
+
+    def add_call(self, call: Dict[str, Any]) -> None:
+        """
+        记录一次语言模型调用
+
+        Args:
+            call: 调用信息
+        """
+        self.calls.append(call)
+
+    def finish(self) -> None:
+        """结束调用轨迹"""
+        self.finished_at = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        将调用轨迹转换为字典表示
+
+        Returns:
+            Dict[str, Any]: 调用轨迹的字典表示，包含各阶段、各调用和汇总
+        """
+        end = self.finished_at or time.perf_counter()
+        return {
+            "wall_time": round(end - self.started_at, 6),
+            "stages": self.stages,
+            "calls": self.calls,
+            "totals": {
+                "llm_calls": len(self.calls),
+                "prompt_tokens": sum(call["prompt_tokens"] for call in self.calls),
+                "completion_tokens": sum(call["completion_tokens"] for call in self.calls),
+                "cost": round(sum(call["cost"] for call in self.calls), 6),
+                "cache_hits": sum(1 for call in self.calls if call["cache_hit"]),
+                "retries": sum(call["retries"] for call in self.calls),
+                "errors": sum(1 for call in self.calls if call.get("error"))
+            }
+        }
+
+
+class ProcessMetrics:
+    """
+    进程级计数器，汇总所有会诊的阶段耗时、token、费用、缓存命中和重试
+    """
+    def __init__(self):
+        """初始化计数器"""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """清空所有计数"""
+        with self._lock:
+            self.consults = 0
+            self.consult_time = 0.0
+            self.stages: Dict[str, Dict[str, float]] = {}
+            self.models: Dict[str, Dict[str, float]] = {}
+
+    def record_stage(self, name: str, duration: float) -> None:
+        """汇总阶段耗时"""
+        # 同类阶段（如specialist:cleft_agent）按冒号前的名称再汇总一份
+        names = [name] + ([name.split(":", 1)[0]] if ":" in name else [])
+        with self._lock:
+            for key in names:
+                stage = self.stages.setdefault(key, {"count": 0, "total_time": 0.0, "max_time": 0.0})
+                stage["count"] += 1
+                stage["total_time"] += duration
+                stage["max_time"] = max(stage["max_time"], duration)
+
+    def record_call(self, call: Dict[str, Any]) -> None:
+        """汇总语言模型调用"""
+        with self._lock:
+            model = self.models.setdefault(call["model"], {
+                "calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "cost": 0.0, "latency": 0.0, "cache_hits": 0, "retries": 0, "errors": 0
+            })
+            model["calls"] += 1
+            model["prompt_tokens"] += call["prompt_tokens"]
+            model["completion_tokens"] += call["completion_tokens"]
+            model["cost"] += call["cost"]
+            model["latency"] += call["latency"]
+            model["cache_hits"] += 1 if call["cache_hit"] else 0
+            model["retries"] += call["retries"]
+            model["errors"] += 1 if call.get("error") else 0
+
+    def record_consult(self, wall_time: float) -> None:
+        """汇总一次会诊"""
+        with self._lock:
+            self.consults += 1
+            self.consult_time += wall_time
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取当前计数的快照
+
+        Returns:
+            Dict[str, Any]: 计数快照，包含会诊数、平均会诊耗时、各阶段和各模型的统计
+        """
+        with self._lock:
+            stages = {}
+            for name, stage in self.stages.items():
+                stages[name] = dict(stage, avg_time=stage["total_time"] / stage["count"])
+            return {
+                "consults": self.consults,
+                "avg_consult_time": self.consult_time / self.consults if self.consults else 0.0,
+                "stages": stages,
+                "models": {name: dict(model) for name, model in self.models.items()}
+            }
+
+
+# 进程级计数器
+process_metrics = ProcessMetrics()
+
+
+def get_current_trace() -> Optional[ConsultTrace]:
+    """
+    获取当前会诊的调用轨迹
+
+    Returns:
+        Optional[ConsultTrace]: 当前调用轨迹，不在会诊中时返回None
+    """
+    return _current_trace.get()
+
+
+@contextmanager
+def consult_trace() -> Iterator[ConsultTrace]:
+    """
+    开始一次会诊的调用轨迹；已在会诊中时复用外层轨迹
+
+    Yields:
+        ConsultTrace: 调用轨迹
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        yield trace
+        return
+
+    trace = ConsultTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+        process_metrics.record_consult(trace.finished_at - trace.started_at)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    记录一个阶段的耗时，阶段内的语言模型调用会标记该阶段名称
+
+    Args:
+        name: 阶段名称，如kb_search、specialist:cleft_agent
+    """
+    token = _current_stage.set(name)
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _current_stage.reset(token)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_stage(name, start, duration, error)
+        process_metrics.record_stage(name, duration)
+
+
+def record_llm_call(
+    model: str,
+    usage: Optional[Dict[str, Any]],
+    latency: float,
+    retries: int = 0,
+    cache_hit: bool = False,
+    error: Optional[str] = None
+) -> None:
+    """
+    记录一次语言模型调用到当前调用轨迹和进程级计数器，失败（重试耗尽、熔断以外的异常）的调用同样记录
+
+    Args:
+        model: 模型名称
+        usage: 接口返回的usage字段
+        latency: 调用耗时（秒）
+        retries: 重试次数
+        cache_hit: 是否命中缓存（包括cassette回放）
+        error: 调用失败时的错误描述，成功时为None
+    """
+    usage = usage or {}
+    prompt_tokens = usage.get("prompt_tokens", 0)
+    completion_tokens = usage.get("completion_tokens", 0)
+    call = {
+        "stage": _current_stage.get(),
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost": estimate_cost(model, prompt_tokens, completion_tokens),
+        "latency": round(latency, 6),
+        "retries": retries,
+        "cache_hit": cache_hit,
+        "error": error
+    }
+
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_call(call)
+    process_metrics.record_call(call)
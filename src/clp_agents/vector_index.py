@@ -0,0 +1,185 @@
+"""
+本地向量检索组件：哈希n-gram文本向量和基于NumPy的向量索引
+文本向量不依赖外部模型；索引在数据量小时暴力检索，数据量大时使用IVF（倒排聚类）只检索最近的几个簇
+"""
+
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple, Iterable
+
+import numpy as np
+
+from .symptom_normalizer import SymptomNormalizer, remove_negated, default_normalizer
+
+_TOKEN = re.compile(r"[\u4e00-\u9fff]+|[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """
+    哈希n-gram文本向量
+
+    中文取单字和双字，英文取单词和词内三字符片段，另外把文本中提到的标准症状作为概念特征，
+    使"父亲有下唇凹陷"与"lip pits"这类中英文写法落到相同的特征上。
+    否定范围内的内容（如"父亲无下唇凹陷"中的"无下唇凹陷"）不产生任何特征。
+    特征经CRC32哈希到固定维度（带符号以抵消冲突），按对数词频加权后做L2归一化。
+    """
+    def __init__(self, dim: int = 1024, concept_weight: float = 3.0, normalizer: Optional[SymptomNormalizer] = None):
+        """
+        初始化文本向量
+
+        Args:
+            dim: 向量维度
+            concept_weight: 标准症状概念特征的权重
+            normalizer: 用于提取标准症状的标准化器，默认使用进程级默认标准化器
+        """
+        self.dim = dim
+        self.concept_weight = concept_weight
+        self.normalizer = normalizer or default_normalizer
+
+    def _features(self, text: str) -> Dict[str, float]:
+        """
+        提取文本特征及权重
+
+        Args:
+            text: 文本
+
+        Returns:
+            Dict[str, float]: 特征 -> 权重
+        """
+        counts: Dict[str, float] = {}
+        for token in _TOKEN.findall(remove_negated(text)):
+            if token.isascii():
+                grams = ["w:" + token]
+                padded = f"#{token}#"
+                grams.extend("c:" + padded[i:i + 3] for i in range(len(padded) - 2))
+            else:
+                grams = list(token)
+                grams.extend(token[i:i + 2] for i in range(len(token) - 1))
+            for gram in grams:
+                counts[gram] = counts.get(gram, 0.0) + 1.0
+
+        weights = {gram: 1.0 + np.log(count) for gram, count in counts.items()}
+        for concept in self.normalizer.extract(text):
+            weights["concept:" + concept] = self.concept_weight
+        return weights
+
+    def embed(self, text: str) -> np.ndarray:
+        """
+        计算单条文本的向量
+
+        Args:
+            text: 文本
+
+        Returns:
+            np.ndarray: L2归一化的float32向量，空文本为零向量
+        """
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += weight if h & 0x80000000 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def embed_batch(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        批量计算文本向量
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            np.ndarray: 形状为(文本数, 维度)的向量矩阵
+        """
+        vectors = [self.embed(text) for text in texts]
+        return np.vstack(vectors) if vectors else np.zeros((0, self.dim), dtype=np.float32)
+
+
+class VectorIndex:
+    """
+    基于NumPy的内积向量索引（向量已归一化时即余弦相似度）
+
+    数据量不超过brute_force_limit时对全部向量做一次矩阵向量乘法；
+    超过时用k-means把向量分到若干簇（IVF），查询时只精确计算最近nprobe个簇中的向量。
+    """
+    def __init__(
+        self,
+        ids: List[str],
+        vectors: np.ndarray,
+        brute_force_limit: int = 20000,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        seed: int = 0
+    ):
+        """
+        构建索引
+
+        Args:
+            ids: 各向量对应的ID
+            vectors: 形状为(数量, 维度)的向量矩阵
+            brute_force_limit: 暴力检索的最大数据量
+            nlist: IVF簇数，默认约为sqrt(数量)
+            nprobe: 查询时检索的簇数
+            seed: k-means随机种子
+        """
+        self.ids = list(ids)
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.nprobe = nprobe
+        self.centroids = None
+        self.list_indptr = None
+        self.list_members = None
+
+        if len(self.ids) > brute_force_limit:
+            self._train_ivf(nlist or int(np.sqrt(len(self.ids))), seed)
+
+    def _train_ivf(self, nlist: int, seed: int, iterations: int = 10) -> None:
+        """
+        训练IVF：球面k-means聚类，并把向量按簇排列成CSR倒排表
+
+        Args:
+            nlist: 簇数
+            seed: 随机种子
+            iterations: 迭代次数
+        """
+        rng = np.random.default_rng(seed)
+        centroids = self.vectors[rng.choice(len(self.vectors), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, self.vectors)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # 空簇保留原中心
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        assignment = np.argmax(self.vectors @ centroids.T, axis=1)
+        self.centroids = centroids.astype(np.float32)
+        self.list_members = np.argsort(assignment, kind="stable")
+        self.list_indptr = np.concatenate(([0], np.cumsum(np.bincount(assignment, minlength=nlist))))
+
+    def search(self, query: np.ndarray, k: int = 5) -> List[Tuple[str, float]]:
+        """
+        查找与查询向量最相似的k个向量
+
+        Args:
+            query: 查询向量
+            k: 返回数量
+
+        Returns:
+            List[Tuple[str, float]]: (ID, 相似度)列表，按相似度降序
+        """
+        if not self.ids or k <= 0:
+            return []
+
+        if self.centroids is None:
+            candidates = None
+            scores = self.vectors @ query
+        else:
+            probes = np.argsort(-(self.centroids @ query))[:self.nprobe]
+            candidates = np.concatenate([
+                self.list_members[self.list_indptr[c]:self.list_indptr[c + 1]] for c in probes
+            ])
+            scores = self.vectors[candidates] @ query
+
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        positions = top if candidates is None else candidates[top]
+        return [(self.ids[i], float(s)) for i, s in zip(positions, scores[top])]
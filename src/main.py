@@ -9,7 +9,13 @@ from typing import Dict, List, Optional, Any
 
 from clp_agents.agent_manager import AgentManager
 from clp_agents.knowledge_base import KnowledgeBase
+from clp_agents.kb_reloader import ReloadableKnowledgeBase
+from clp_agents.kb_client import KnowledgeBaseClient
 from clp_agents.api_integration import APIIntegration
+from clp_agents.cassette import Cassette
+from clp_agents.circuit_breaker import CircuitBreaker, LLMUnavailableError
+from clp_agents.llm_client import LLMClient
+from clp_agents import telemetry
 from clp_agents.cleft_agent import CleftLipPalateAgent
 from clp_agents.craniofacial_agent import CraniofacialAgent
 from clp_agents.genetic_agent import GeneticAgent
@@ -20,16 +26,41 @@ class CLPAgentSystem:
     """
     唇腭裂多智能体系统，集成所有智能体并提供统一接口
     """
-    def __init__(self, api_keys: Dict[str, str] = None):
+    def __init__(self, api_keys: Dict[str, str] = None, cassette: Optional[Cassette] = None):
         """
         初始化唇腭裂多智能体系统
         
         Args:
             api_keys: API密钥字典，键为API名称，值为密钥
+            cassette: 录制/回放cassette（可选），未提供时读取CLP_CASSETTE_*环境变量
         """
         self.api_keys = api_keys or {}
-        self.knowledge_base = KnowledgeBase()
-        self.agent_manager = AgentManager()
+        self.cassette = cassette or Cassette.from_env()
+        # 设置了CLP_KB_SNAPSHOT且快照存在时以只读方式映射快照，启动时无需解析JSON；
+        # 数据源变化时由后台线程热加载新版本（CLP_KB_RELOAD_INTERVAL为检测间隔秒数，0表示不检测）；
+        # 设置了CLP_KB_SOCKET时不在本进程加载知识库，查询发往共享的知识库守护进程（kb_server）
+        socket_path = os.environ.get("CLP_KB_SOCKET")
+        snapshot_path = os.environ.get("CLP_KB_SNAPSHOT")
+        if socket_path:
+            self.knowledge_source = KnowledgeBaseClient(socket_path)
+        else:
+            self.knowledge_source = ReloadableKnowledgeBase(
+                snapshot_path=snapshot_path if snapshot_path and os.path.exists(snapshot_path) else None,
+                poll_interval=float(os.environ.get("CLP_KB_RELOAD_INTERVAL", "5"))
+            )
+        
+        # 配置了API密钥或cassette时使用真实的语言模型客户端，否则智能体返回模拟回复
+        # 语言模型服务异常或过慢（超过CLP_LLM_LATENCY_THRESHOLD秒）时熔断器打开，会诊降级为仅基于知识库的分析
+        self.circuit_breaker = CircuitBreaker()
+        self.llm_client = None
+        if self.api_keys.get("openai") or self.cassette:
+            self.llm_client = LLMClient(
+                api_key=self.api_keys.get("openai"),
+                cassette=self.cassette,
+                circuit_breaker=self.circuit_breaker
+            )
+        
+        self.agent_manager = AgentManager(llm_client=self.llm_client)
         self.api_integration = None
         
         # 注册所有专科智能体
@@ -67,15 +98,27 @@ class CLPAgentSystem:
         )
         self.agent_manager.register_agent("ophthalmology_agent", ophthalmology_agent)
     
+    @property
+    def knowledge_base(self) -> KnowledgeBase:
+        """当前版本的知识库"""
+        return self.knowledge_source.current
+    
     async def initialize(self):
-        """初始化系统，创建API集成实例"""
-        self.api_integration = APIIntegration(self.api_keys)
+        """初始化系统，创建API集成实例并启动知识库热加载"""
+        self.api_integration = APIIntegration(self.api_keys, self.cassette)
         await self.api_integration.__aenter__()
+        if self.knowledge_source.poll_interval > 0:
+            self.knowledge_source.start()
     
     async def close(self):
         """关闭系统，释放资源"""
         if self.api_integration:
             await self.api_integration.close()
+        if self.llm_client:
+            await self.llm_client.close()
+        if self.cassette:
+            self.cassette.save()
+        self.knowledge_source.close()
     
     async def analyze_patient(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -84,26 +127,96 @@ class CLPAgentSystem:
         Args:
             patient_data: 患者数据字典
             
+        Returns:
+            Dict[str, Any]: 分析结果，trace字段为本次会诊各阶段耗时、token和费用的统计；
+                语言模型服务不可用（超时、连接失败、429或5xx重试后仍失败、熔断中）时status为degraded
+        """
+        # 整个会诊租用同一版本的知识库，期间发布的新版本不影响本次会诊，旧版本在会诊结束后才关闭
+        with self.knowledge_source.lease() as knowledge_base, telemetry.consult_trace() as trace:
+            try:
+                analysis_result = await self._analyze_patient(patient_data, knowledge_base)
+            except LLMUnavailableError as e:
+                print(f"语言模型服务不可用（{str(e)}），使用知识库进行降级分析")
+                with telemetry.stage("degraded"):
+                    analysis_result = self._build_degraded_result(patient_data, knowledge_base)
+        
+        analysis_result["trace"] = trace.to_dict()
+        return analysis_result
+    
+    async def _analyze_patient(self, patient_data: Dict[str, Any], knowledge_base: KnowledgeBase) -> Dict[str, Any]:
+        """
+        执行知识库检索、智能体招募、协作分析和文献补充
+        
+        Args:
+            patient_data: 患者数据字典
+            knowledge_base: 本次会诊使用的知识库版本
+            
         Returns:
             Dict[str, Any]: 分析结果
         """
         # 补充患者数据中的综合征相关信息
+        syndrome_ids = []
+        next_questions = []
         if "symptoms" in patient_data:
-            # 使用知识库搜索可能的综合征
-            possible_syndromes = self.knowledge_base.search_syndromes(patient_data["symptoms"])
+            # 使用知识库搜索可能的综合征和相似的文献病例，并推荐最能区分候选综合征的待查症状
+            with telemetry.stage("kb_search"):
+                possible_syndromes = knowledge_base.search_syndromes_page(patient_data["symptoms"], k=3)["hits"]
+                similar_cases = knowledge_base.similar_cases(patient_data["symptoms"], 3)
+                next_questions = knowledge_base.next_questions(patient_data["symptoms"])
+            if similar_cases:
+                patient_data["similar_cases"] = [
+                    {
+                        "case_id": case["case_id"],
+                        "diagnosis": case["diagnosis"],
+                        "similarity": round(case["similarity"], 2),
+                        "shared_features": case["shared_features"]
+                    }
+                    for case in similar_cases
+                ]
             if possible_syndromes:
                 patient_data["possible_syndromes"] = [
                     {
-                        "name": syndrome["info"]["name"],
-                        "confidence": "high" if syndrome["match_percentage"] > 70 else 
-                                     "medium" if syndrome["match_percentage"] > 40 else "low"
+                        "name": knowledge_base.get_syndrome_info(syndrome["id"]).get("name", syndrome["id"]),
+                        "confidence": "high" if syndrome["score"] > 70 else 
+                                     "medium" if syndrome["score"] > 40 else "low"
                     }
-                    for syndrome in possible_syndromes[:3]  # 取匹配度最高的前三个
+                    for syndrome in possible_syndromes  # 匹配度最高的前三个
                 ]
+                syndrome_ids = [syndrome["id"] for syndrome in possible_syndromes]
+
+        # 病史和家族史是自由文本，通过语义检索补充症状匹配未覆盖的综合征；
+        # 只采用文本中明确提到（未被否定）该综合征至少一个症状的结果，字面相似不足以作为依据
+        history = " ".join(filter(None, [patient_data.get("medical_history"), patient_data.get("family_history")]))
+        if history:
+            with telemetry.stage("semantic_search"):
+                similar = knowledge_base.semantic_search(history, 5)
+            known = {syndrome["name"] for syndrome in patient_data.get("possible_syndromes", [])}
+            for hit in similar:
+                if (hit["type"] == "syndrome" and hit["score"] >= 0.3 and hit["matched_concepts"]
+                        and hit["info"]["name"] not in known):
+                    patient_data.setdefault("possible_syndromes", []).append(
+                        {"name": hit["info"]["name"], "confidence": "low"}
+                    )
+                    known.add(hit["info"]["name"])
+                    syndrome_ids.append(hit["id"])
         
+        # 可能综合征的候选基因和本地缓存的已知致病变异，供遗传学分析使用
+        if syndrome_ids:
+            candidate_genes = knowledge_base.genetic_workup(syndrome_ids)
+            if candidate_genes:
+                patient_data["candidate_genes"] = [
+                    {
+                        "gene": candidate["gene"],
+                        "syndromes": [knowledge_base.get_syndrome_info(syndrome_id).get("name", syndrome_id) for syndrome_id in candidate["syndromes"]],
+                        "variants": [variant.get("name", variant["id"]) for variant in candidate["variants"]]
+                    }
+                    for candidate in candidate_genes
+                ]
+
         # 招募智能体
         print("正在招募智能体...")
-        activated_agents = await self.agent_manager.recruit_agents(patient_data)
+        with telemetry.stage("recruitment"):
+            activated_agents = await self.agent_manager.recruit_agents(patient_data)
         print(f"已激活的智能体: {activated_agents}")
         
         if not activated_agents:
@@ -118,7 +231,7 @@ class CLPAgentSystem:
         
         # 协调智能体进行分析
         print("正在进行协作分析...")
-        analysis_result = await self.agent_manager.coordinate_analysis(query)
+        analysis_result = await self.agent_manager.coordinate_analysis(query, patient_data)
         
         # 补充外部医学信息
         if self.api_integration and "syndrome_type" in patient_data:
@@ -128,12 +241,91 @@ class CLPAgentSystem:
             
             if syndrome_name:
                 print(f"正在搜索相关医学文献: {syndrome_name}")
-                literature = await self.api_integration.search_literature(f"{syndrome_name} cleft lip palate", 3)
+                with telemetry.stage("literature"):
+                    literature = await self.api_integration.search_literature(f"{syndrome_name} cleft lip palate", 3)
                 if literature:
                     analysis_result["literature"] = literature
         
+        if next_questions:
+            analysis_result["next_questions"] = next_questions
+        
         return analysis_result
     
+    def _build_degraded_result(self, patient_data: Dict[str, Any], knowledge_base: KnowledgeBase) -> Dict[str, Any]:
+        """
+        构建仅基于知识库的降级分析结果
+        
+        Args:
+            patient_data: 患者数据字典
+            knowledge_base: 本次会诊使用的知识库版本
+            
+        Returns:
+            Dict[str, Any]: 降级分析结果
+        """
+        symptoms = patient_data.get("symptoms", [])
+        matches = knowledge_base.search_syndromes(symptoms, 3)
+        
+        # 优先使用匹配综合征的治疗指南，没有时按唇裂/腭裂使用非综合征性指南
+        guidelines = {}
+        for match in matches:
+            guideline = knowledge_base.get_treatment_guideline(match["id"])
+            if guideline:
+                guidelines[match["id"]] = guideline
+        if not guidelines:
+            for condition_id, keyword in (("non_syndromic_cleft_lip", "唇裂"), ("non_syndromic_cleft_palate", "腭裂")):
+                guideline = knowledge_base.get_treatment_guideline(condition_id)
+                if guideline and any(keyword in symptom for symptom in symptoms):
+                    guidelines[condition_id] = guideline
+        
+        possible_syndromes = [
+            {
+                "id": match["id"],
+                "name": match["info"].get("name", match["id"]),
+                "matched_symptoms": match["matched_symptoms"],
+                "total_symptoms": match["total_symptoms"],
+                "match_percentage": match["match_percentage"]
+            }
+            for match in matches
+        ]
+        
+        lines = ["# 降级分析报告（仅基于知识库，未经专科智能体分析）", "", "## 可能的综合征"]
+        if possible_syndromes:
+            for syndrome in possible_syndromes:
+                lines.append(f"- {syndrome['name']}（匹配度：{syndrome['match_percentage']:.0f}%）")
+        else:
+            lines.append("- 知识库中未找到匹配的综合征")
+        
+        lines += ["", "## 治疗指南"]
+        if guidelines:
+            for condition_id, guideline in guidelines.items():
+                lines.append(f"### {guideline.get('name', '')}")
+                for step in guideline.get("timeline", []):
+                    lines.append(f"- {step.get('age', '')}：{step.get('treatment', '')}")
+                # 按患者年龄标出当前阶段和下一阶段
+                steps = knowledge_base.guideline_steps_for(condition_id, patient_data.get("age"))
+                for label, key in (("当前阶段", "due"), ("下一阶段", "upcoming"), ("时间未定（请人工核对）", "unparsed")):
+                    if steps[key]:
+                        lines.append(f"- {label}：" + "；".join(f"{step.get('age', '')} {step.get('treatment', '')}" for step in steps[key]))
+        else:
+            lines.append("- 知识库中未找到适用的治疗指南")
+        
+        lines += ["", "语言模型服务暂不可用，请在服务恢复后重新分析。"]
+        
+        return {
+            "status": "degraded",
+            "degraded": True,
+            "message": "语言模型服务暂不可用，以下结果仅基于知识库生成",
+            "results": {
+                "knowledge_base": {
+                    "possible_syndromes": possible_syndromes,
+                    "treatment_guidelines": guidelines,
+                    "next_questions": knowledge_base.next_questions(symptoms)
+                }
+            },
+            "integrated_result": "\n".join(lines),
+            "circuit_breaker": self.circuit_breaker.to_dict()
+        }
+    
     def _build_analysis_query(self, patient_data: Dict[str, Any]) -> str:
         """
         构建分析查询
@@ -174,7 +366,37 @@ class CLPAgentSystem:
         Returns:
             Dict[str, Any]: 治疗指南
         """
-        return self.knowledge_base.get_treatment_guideline(condition_id)
+        with self.knowledge_source.lease() as knowledge_base:
+            return knowledge_base.get_treatment_guideline(condition_id)
+    
+    async def refresh_variant_cache(self, genes: Optional[List[str]] = None, max_results: int = 20) -> int:
+        """
+        从ClinVar拉取基因的变异摘要并写入知识库的本地缓存，之后的genetic_workup可离线给出已知致病变异
+        
+        Args:
+            genes: 基因符号列表，默认为知识库综合征涉及的全部基因
+            max_results: 每个基因拉取的最大变异数
+            
+        Returns:
+            int: 缓存的变异数
+            
+        Raises:
+            RuntimeError: 知识库是只读的（从快照加载或通过守护进程访问）
+        """
+        # 已发布的知识库版本不可修改，写入数据源的存储引擎后由热加载发布新版本
+        writer = self.knowledge_source.open_writer()
+        try:
+            if not self.api_integration:
+                await self.initialize()
+            genes = genes or list(writer.gene_index.gene_syndromes)
+            results = await asyncio.gather(*(
+                self.api_integration.search_gene_variant(f"{gene}[gene]", max_results) for gene in genes
+            ))
+            cached = writer.cache_clinvar_variants(variant for variants in results for variant in variants)
+        finally:
+            writer.close()
+        self.knowledge_source.check_for_changes()
+        return cached
     
     async def search_medical_literature(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
         """
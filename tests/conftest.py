@@ -0,0 +1,12 @@
+"""
+pytest配置：将src目录和项目根目录加入Python路径，测试中可以直接导入clp_agents
+"""
+
+import os
+import sys
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+for path in (os.path.join(ROOT_DIR, 'src'), ROOT_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
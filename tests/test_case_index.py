@@ -0,0 +1,82 @@
+"""
+相似病例MinHash LSH索引单元测试
+"""
+
+import random
+
+import pytest
+
+from clp_agents.case_index import CaseIndex, normalize_features, is_labeled
+
+FEATURES = [f"feature_{i}" for i in range(80)]
+
+
+def _random_cases(seed, count=300):
+    """生成随机病例"""
+    rng = random.Random(seed)
+    return [
+        {"case_id": f"case_{i}", "clinical_features": rng.sample(FEATURES, rng.randint(3, 10)), "diagnosis": f"诊断{i % 9}"}
+        for i in range(count)
+    ]
+
+
+def _jaccard(a, b):
+    """精确Jaccard相似度"""
+    return len(a & b) / len(a | b)
+
+
+def test_identical_case_found():
+    """与某个病例特征完全相同的查询以相似度1.0排在第一位"""
+    cases = _random_cases(1)
+    index = CaseIndex(cases)
+    for case in cases[:20]:
+        results = index.query(case["clinical_features"], k=3)
+        assert results[0]["similarity"] == 1.0
+        assert set(results[0]["case"]["clinical_features"]) == set(case["clinical_features"])
+        assert results[0]["shared_features"] == sorted(normalize_features(case["clinical_features"]))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_high_similarity_recall(seed):
+    """Jaccard相似度较高的病例都能被检索到，返回的相似度为精确值且按降序排列"""
+    cases = _random_cases(seed)
+    index = CaseIndex(cases)
+    feature_sets = [normalize_features(case["clinical_features"]) for case in cases]
+    rng = random.Random(seed + 50)
+
+    for _ in range(30):
+        base = rng.choice(cases)["clinical_features"]
+        query = base[:-1] + [rng.choice(FEATURES)]
+        query_set = normalize_features(query)
+        results = index.query(query, k=len(cases))
+
+        similarities = [result["similarity"] for result in results]
+        assert similarities == sorted(similarities, reverse=True)
+        for result in results:
+            features = normalize_features(result["case"]["clinical_features"])
+            assert result["similarity"] == pytest.approx(_jaccard(query_set, features))
+
+        found = {result["case"]["case_id"] for result in results}
+        expected = {cases[i]["case_id"] for i, features in enumerate(feature_sets) if _jaccard(query_set, features) >= 0.6}
+        assert expected <= found
+
+
+def test_empty_inputs():
+    """空查询、空病例库和k<=0返回空列表"""
+    index = CaseIndex(_random_cases(2, count=10))
+    assert index.query([]) == []
+    assert index.query(["feature_1"], k=0) == []
+    assert CaseIndex([]).query(["feature_1"]) == []
+
+
+def test_invalid_bands():
+    """签名长度不能整除分桶数"""
+    with pytest.raises(ValueError):
+        CaseIndex([], num_perm=64, bands=10)
+
+
+def test_is_labeled():
+    """没有诊断的病例"""
+    assert is_labeled({"diagnosis": "Van der Woude综合征"})
+    assert not is_labeled({"diagnosis": "未提供诊断"})
+    assert not is_labeled({})
@@ -0,0 +1,99 @@
+"""
+录制/回放cassette单元测试
+"""
+
+import asyncio
+import gzip
+import json
+
+import pytest
+
+from clp_agents.cassette import Cassette, CassetteMissError
+from clp_agents.llm_client import LLMClient
+
+
+def _record(path, calls):
+    """录制一组(类别, 请求, 响应)并保存"""
+    cassette = Cassette(str(path), mode=Cassette.RECORD)
+
+    async def run():
+        for kind, request, response in calls:
+            async def send(response=response):
+                return response
+            assert await cassette.call(kind, request, send) == response
+
+    asyncio.run(run())
+    cassette.save()
+    return cassette
+
+
+def test_record_and_replay(tmp_path):
+    """回放时按请求内容返回录制的响应，同一请求按录制顺序依次返回，超出后重复最后一次"""
+    path = tmp_path / "llm.cassette.gz"
+    _record(path, [
+        ("llm", {"model": "m", "prompt": "a"}, {"text": "第一次"}),
+        ("llm", {"model": "m", "prompt": "b"}, {"text": "其他请求"}),
+        ("llm", {"model": "m", "prompt": "a"}, {"text": "第二次"}),
+    ])
+
+    cassette = Cassette(str(path))
+
+    async def replay():
+        send = None  # 回放模式不发送请求
+        return [
+            await cassette.call("llm", {"prompt": "a", "model": "m"}, send),
+            await cassette.call("llm", {"model": "m", "prompt": "b"}, send),
+            await cassette.call("llm", {"model": "m", "prompt": "a"}, send),
+            await cassette.call("llm", {"model": "m", "prompt": "a"}, send),
+        ]
+
+    assert asyncio.run(replay()) == [{"text": "第一次"}, {"text": "其他请求"}, {"text": "第二次"}, {"text": "第二次"}]
+
+    cassette.rewind()
+    assert asyncio.run(cassette.call("llm", {"model": "m", "prompt": "a"}, None)) == {"text": "第一次"}
+
+
+def test_replay_miss(tmp_path):
+    """回放时没有录制的请求和请求类别不同的请求抛出CassetteMissError"""
+    path = tmp_path / "llm.cassette.gz"
+    _record(path, [("llm", {"prompt": "a"}, {"text": "响应"})])
+    cassette = Cassette(str(path))
+    with pytest.raises(CassetteMissError):
+        asyncio.run(cassette.call("llm", {"prompt": "c"}, None))
+    with pytest.raises(CassetteMissError):
+        asyncio.run(cassette.call("pubmed", {"prompt": "a"}, None))
+
+
+def test_sensitive_keys_scrubbed(tmp_path):
+    """敏感字段不写入文件，也不参与请求匹配"""
+    path = tmp_path / "llm.cassette.gz"
+    _record(path, [("llm", {"prompt": "a", "api_key": "secret", "headers": {"Authorization": "Bearer secret"}}, {"text": "响应"})])
+
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        content = f.read()
+    assert "secret" not in content
+    assert json.loads(content.splitlines()[0])["request"] == {"prompt": "a", "headers": {}}
+
+    cassette = Cassette(str(path))
+    assert asyncio.run(cassette.call("llm", {"prompt": "a", "api_key": "other", "headers": {}}, None)) == {"text": "响应"}
+
+
+def test_invalid_mode_and_missing_file(tmp_path):
+    """不支持的模式和不存在的cassette文件"""
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / "llm.cassette.gz"), mode="live")
+    with pytest.raises(FileNotFoundError):
+        Cassette(str(tmp_path / "missing.cassette.gz"))
+
+
+def test_llm_client_replays_without_network(tmp_path):
+    """语言模型客户端经由cassette回放，不建立网络连接"""
+    path = tmp_path / "llm.cassette.gz"
+    payload = {"model": "m", "messages": [{"role": "user", "content": "你好"}], "temperature": 0.7}
+    response = {"choices": [{"message": {"content": "回放的回复"}}], "usage": {"total_tokens": 3}}
+    _record(path, [("llm", payload, response)])
+
+    client = LLMClient(api_key="test", base_url="http://127.0.0.1:9", cassette=Cassette(str(path)))
+    reply = asyncio.run(client.chat(payload["messages"], model="m"))
+    assert reply == "回放的回复"
+    assert client.session is None
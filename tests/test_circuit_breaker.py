@@ -0,0 +1,117 @@
+"""
+熔断器状态机和语言模型客户端熔断统计单元测试
+"""
+
+import asyncio
+
+import pytest
+
+from clp_agents.circuit_breaker import CircuitBreaker, CircuitOpenError, LLMUnavailableError
+from clp_agents.llm_client import LLMClient
+
+
+def _trip(breaker):
+    """连续失败直到熔断器打开"""
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures():
+    """连续失败达到阈值后打开，等待期内拒绝请求"""
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open()
+    assert not breaker.allow_request()
+    assert breaker.rejected == 1
+
+
+def test_opens_on_failure_rate():
+    """窗口填满后失败率达到阈值时打开"""
+    breaker = CircuitBreaker(failure_threshold=100, window_size=10, failure_rate_threshold=0.5, recovery_timeout=60)
+    for i in range(9):
+        breaker.record_failure() if i % 2 else breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_slow_success_counts_as_failure():
+    """超过延迟阈值的成功调用计为失败"""
+    breaker = CircuitBreaker(failure_threshold=2, latency_threshold=1.0, recovery_timeout=60)
+    breaker.record_success(latency=0.5)
+    breaker.record_success(latency=2.0)
+    breaker.record_success(latency=3.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_half_open_probe_success_closes():
+    """等待期结束后只放行限定数量的探测请求，探测成功则关闭"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.0, half_open_max_calls=1)
+    _trip(breaker)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.window == []
+    assert breaker.allow_request()
+
+
+def test_half_open_probe_failure_reopens():
+    """探测失败时重新打开"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.0)
+    _trip(breaker)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_release_returns_probe_slot():
+    """被取消或请求本身出错的探测归还名额，不改变状态"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.0, half_open_max_calls=1)
+    _trip(breaker)
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+def _client(breaker, error):
+    """_send抛出指定异常的客户端"""
+    client = LLMClient(api_key="test", circuit_breaker=breaker)
+
+    async def send(payload, stats):
+        raise error
+
+    client._send = send
+    return client
+
+
+def test_client_counts_only_unavailable_errors():
+    """只有服务不可用的错误计入熔断统计，请求本身的错误不计入"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    client = _client(breaker, RuntimeError("语言模型API返回错误 401"))
+    for _ in range(5):
+        with pytest.raises(RuntimeError):
+            asyncio.run(client.complete({"model": "test", "messages": []}))
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0
+
+    client = _client(breaker, LLMUnavailableError("语言模型API返回错误 503"))
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            asyncio.run(client.complete({"model": "test", "messages": []}))
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(client.complete({"model": "test", "messages": []}))
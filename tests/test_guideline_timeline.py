@@ -0,0 +1,104 @@
+"""
+治疗指南时间线单元测试：年龄文本解析和区间树查询
+"""
+
+import math
+import random
+
+import pytest
+
+from clp_agents.guideline_timeline import GuidelineTimeline, parse_age_interval, parse_age_months
+
+INF = math.inf
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("6个月", (6, 6)),
+    ("4 years", (48, 48)),
+    ("1岁3个月", (15, 15)),
+    ("1岁零3个月", (15, 15)),
+    ("2 years and 3 months", (27, 27)),
+    ("2y6m", (30, 30)),
+    ("4岁半", (54, 54)),
+    ("3-6个月", (3, 6)),
+    ("5-7岁", (60, 84)),
+    ("2岁-4岁", (24, 48)),
+    ("6个月至2岁", (6, 24)),
+    ("8岁以上", (96, INF)),
+    ("3个月后", (3, INF)),
+    ("3个月内", (0, 3)),
+    ("newborn", (0, 1)),
+    ("新生儿期", (0, 1)),
+    ("出生后", (0, INF)),
+    ("出生以后", (0, INF)),
+    ("出生后3个月", (3, 3)),
+    ("生后2周", (24 / 52, 24 / 52)),
+    ("６个月", (6, 6)),
+    (18, (18, 18)),
+])
+def test_parse_age_interval(text, expected):
+    """常见中英文年龄写法"""
+    start, end = parse_age_interval(text)
+    assert start == pytest.approx(expected[0])
+    assert end == pytest.approx(expected[1]) if expected[1] != INF else end == INF
+
+
+@pytest.mark.parametrize("text", [None, "", "视情况而定", "青春期", True])
+def test_parse_age_interval_unparsed(text):
+    """无法解析的年龄文本"""
+    assert parse_age_interval(text) is None
+
+
+def test_parse_age_months():
+    """患者年龄取区间起始值"""
+    assert parse_age_months("1岁3个月") == 15
+    assert parse_age_months("3-6个月") == 3
+    assert parse_age_months("不详") is None
+
+
+def test_timeline_due_and_upcoming():
+    """按月龄查询到期步骤和即将到来的步骤，无法解析的步骤单独列出"""
+    timeline = GuidelineTimeline([
+        {"age": "3-6个月", "treatment": "唇裂修复"},
+        {"age": "9-18个月", "treatment": "腭裂修复"},
+        {"age": "出生后", "treatment": "喂养指导"},
+        {"age": "8岁以上", "treatment": "牙槽突植骨"},
+        {"age": "视情况而定", "treatment": "正颌手术"},
+        {"age": "9个月", "treatment": "听力评估"},
+    ])
+    assert len(timeline) == 5
+    assert [step["treatment"] for step in timeline.unparsed] == ["正颌手术"]
+
+    assert [step["treatment"] for step in timeline.due(4)] == ["喂养指导", "唇裂修复"]
+    assert [step["treatment"] for step in timeline.due(9)] == ["喂养指导", "听力评估", "腭裂修复"]
+    assert [step["treatment"] for step in timeline.due(120)] == ["喂养指导", "牙槽突植骨"]
+
+    assert [step["treatment"] for step in timeline.upcoming(7)] == ["听力评估", "腭裂修复"]
+    assert [step["treatment"] for step in timeline.upcoming(7, limit=2)] == ["听力评估", "腭裂修复", "牙槽突植骨"]
+    assert timeline.upcoming(200) == []
+
+
+def test_timeline_matches_linear_scan():
+    """区间树查询与逐个步骤比较的结果一致"""
+    rng = random.Random(3)
+    steps = []
+    for i in range(300):
+        start = rng.randint(0, 200)
+        end = start + rng.randint(0, 60)
+        steps.append({"age": f"{start}-{end}个月", "treatment": f"步骤{i}", "interval": (start, end)})
+    timeline = GuidelineTimeline(steps)
+
+    for age in range(0, 270, 3):
+        expected = sorted(
+            (step for step in steps if step["interval"][0] <= age <= step["interval"][1]),
+            key=lambda step: (step["interval"], steps.index(step))
+        )
+        assert timeline.due(age) == expected
+
+        later = [step for step in steps if step["interval"][0] > age]
+        first_start = min((step["interval"][0] for step in later), default=None)
+        expected_upcoming = sorted(
+            (step for step in later if step["interval"][0] == first_start),
+            key=lambda step: (step["interval"], steps.index(step))
+        )
+        assert timeline.upcoming(age) == expected_upcoming
@@ -0,0 +1,90 @@
+"""
+知识库热加载单元测试：版本切换、租约期间旧版本保持打开、归还后关闭
+"""
+
+import sqlite3
+
+import pytest
+
+from clp_agents.kb_reloader import ReloadableKnowledgeBase
+from clp_agents.knowledge_base import KnowledgeBase
+
+
+def _add_syndrome(reloader, syndrome_id):
+    """通过可写的知识库写入一个综合征"""
+    writer = reloader.open_writer()
+    try:
+        writer.add_syndrome(syndrome_id, {"name": syndrome_id, "symptoms": ["唇裂", "耳聋"]})
+    finally:
+        writer.close()
+
+
+@pytest.fixture
+def reloader(tmp_path):
+    """基于知识库目录的热加载知识库"""
+    reloader = ReloadableKnowledgeBase(knowledge_dir=str(tmp_path), poll_interval=0.05)
+    yield reloader
+    reloader.close()
+
+
+def test_no_reload_without_changes(reloader):
+    """数据源没有变化时不发布新版本"""
+    assert reloader.check_for_changes() is False
+    assert reloader.version == 1
+
+
+def test_reload_publishes_new_version(reloader):
+    """写入提交后检测到变化并发布新版本"""
+    _add_syndrome(reloader, "new_syndrome")
+    assert reloader.check_for_changes() is True
+    assert reloader.version == 2
+    assert "new_syndrome" in reloader.current.syndrome_data
+    assert reloader.reloads == 1
+
+
+def test_leased_version_closed_after_release(reloader):
+    """被替换的版本在租约归还前保持可用，归还后关闭"""
+    with reloader.lease() as leased:
+        _add_syndrome(reloader, "new_syndrome")
+        assert reloader.check_for_changes() is True
+        assert reloader.current is not leased
+        assert "new_syndrome" not in leased.syndrome_data
+        leased.storage.load("syndromes")
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        leased.storage.load("syndromes")
+    assert reloader._retired == []
+
+
+def test_unleased_version_closed_on_reload(reloader):
+    """没有租约的旧版本在切换时立即关闭"""
+    previous = reloader.current
+    _add_syndrome(reloader, "new_syndrome")
+    reloader.check_for_changes()
+    with pytest.raises(sqlite3.ProgrammingError):
+        previous.storage.load("syndromes")
+
+
+def test_reload_warms_indexes(reloader):
+    """重新加载后新版本的索引已构建"""
+    _add_syndrome(reloader, "new_syndrome")
+    reloader.check_for_changes()
+    assert reloader.current._syndrome_index is not None
+    assert reloader.current._case_index is not None
+
+
+def test_snapshot_source(tmp_path):
+    """从快照加载时首次不预先构建次要索引，且不能写入"""
+    knowledge_base = KnowledgeBase(str(tmp_path))
+    snapshot_path = knowledge_base.save_snapshot()
+    knowledge_base.close()
+
+    reloader = ReloadableKnowledgeBase(snapshot_path=snapshot_path)
+    try:
+        assert reloader.current.snapshot is not None
+        assert reloader.current._vector_index is None
+        assert reloader.current._case_index is None
+        with pytest.raises(RuntimeError):
+            reloader.open_writer()
+    finally:
+        reloader.close()
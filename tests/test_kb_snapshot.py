@@ -0,0 +1,70 @@
+"""
+知识库二进制快照单元测试：快照打开的知识库与原知识库的数据和检索结果一致
+"""
+
+import random
+
+import pytest
+
+from clp_agents.knowledge_base import KnowledgeBase
+
+SYMPTOMS = ["唇裂", "腭裂", "下唇凹陷", "小下颌", "近视", "耳聋", "缺牙", "眼距增宽", "耳廓畸形", "心脏缺陷"]
+
+
+@pytest.fixture
+def knowledge_base(tmp_path):
+    """在默认数据之外加入随机综合征的知识库"""
+    knowledge_base = KnowledgeBase(str(tmp_path))
+    rng = random.Random(7)
+    knowledge_base.add_syndromes({
+        f"test_syndrome_{i}": {
+            "name": f"测试综合征{i}",
+            "description": "测试数据",
+            "symptoms": rng.sample(SYMPTOMS, rng.randint(1, 5)),
+            "genes": [f"GENE{i % 7}"]
+        }
+        for i in range(60)
+    })
+    yield knowledge_base
+    knowledge_base.close()
+
+
+def test_snapshot_round_trip(knowledge_base, tmp_path):
+    """快照中的综合征、症状映射和治疗指南与原知识库相同"""
+    snapshot_path = knowledge_base.save_snapshot(str(tmp_path / "knowledge.snapshot"))
+    snapshot_kb = KnowledgeBase.from_snapshot(snapshot_path)
+    try:
+        assert dict(snapshot_kb.syndrome_data) == dict(knowledge_base.syndrome_data)
+        assert dict(snapshot_kb.treatment_guidelines) == dict(knowledge_base.treatment_guidelines)
+        assert {symptom: list(ids) for symptom, ids in snapshot_kb.normalized_symptom_mapping.items()} == \
+            {symptom: list(ids) for symptom, ids in knowledge_base.normalized_symptom_mapping.items()}
+        assert snapshot_kb.get_syndrome_info("test_syndrome_3") == knowledge_base.get_syndrome_info("test_syndrome_3")
+        assert "missing_syndrome" not in snapshot_kb.syndrome_data
+    finally:
+        snapshot_kb.close()
+
+
+def test_snapshot_search_matches(knowledge_base, tmp_path):
+    """快照知识库的症状检索和分页结果与原知识库一致"""
+    snapshot_kb = KnowledgeBase.from_snapshot(knowledge_base.save_snapshot(str(tmp_path / "knowledge.snapshot")))
+    rng = random.Random(11)
+    try:
+        for _ in range(20):
+            symptoms = rng.sample(SYMPTOMS, rng.randint(1, 4))
+            assert snapshot_kb.search_syndromes(symptoms) == knowledge_base.search_syndromes(symptoms)
+            assert snapshot_kb.search_syndromes(symptoms, k=5) == knowledge_base.search_syndromes(symptoms, k=5)
+        assert snapshot_kb.search_syndromes(["不存在的症状"]) == []
+    finally:
+        snapshot_kb.close()
+
+
+def test_snapshot_is_read_only(knowledge_base, tmp_path):
+    """快照打开的知识库拒绝写入"""
+    snapshot_kb = KnowledgeBase.from_snapshot(knowledge_base.save_snapshot(str(tmp_path / "knowledge.snapshot")))
+    try:
+        with pytest.raises(RuntimeError):
+            snapshot_kb.add_syndrome("new_syndrome", {"name": "新综合征", "symptoms": ["唇裂"]})
+        with pytest.raises(RuntimeError):
+            snapshot_kb.add_treatment_guideline("new_syndrome", {"timeline": []})
+    finally:
+        snapshot_kb.close()
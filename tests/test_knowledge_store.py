@@ -0,0 +1,138 @@
+"""
+知识库存储引擎单元测试
+"""
+
+import sqlite3
+
+import pytest
+
+from clp_agents.knowledge_store import (
+    KnowledgeStore, SQLiteKnowledgeStore, JSONKnowledgeStore, create_knowledge_store
+)
+
+
+@pytest.fixture(params=["sqlite", "json"])
+def store(request, tmp_path):
+    """两种存储引擎各运行一次"""
+    store = create_knowledge_store(str(tmp_path), request.param)
+    yield store
+    store.close()
+
+
+def test_put_get_delete(store):
+    """写入、批量读取和删除"""
+    store.put("syndromes", "a", {"name": "A"})
+    store.put_many("syndromes", [("b", {"name": "B"}), ("c", {"name": "C"})])
+
+    assert store.load("syndromes") == {"a": {"name": "A"}, "b": {"name": "B"}, "c": {"name": "C"}}
+    assert store.get_many("syndromes", ["a", "c", "missing"]) == {"a": {"name": "A"}, "c": {"name": "C"}}
+    assert store.load("guidelines") == {}
+
+    store.delete("syndromes", "b")
+    assert set(store.load("syndromes")) == {"a", "c"}
+
+
+def test_get_many_large_key_list(store):
+    """键数超过单次查询的参数上限时分批读取"""
+    store.put_many("symptoms", [(f"s{i}", i) for i in range(1200)])
+    result = store.get_many("symptoms", [f"s{i}" for i in range(0, 1200, 2)])
+    assert len(result) == 600
+    assert result["s1198"] == 1198
+
+
+def test_transaction_rollback(store):
+    """事务中抛出异常时，事务内的全部写入回滚"""
+    store.put("syndromes", "a", 1)
+    with pytest.raises(ValueError):
+        with store.transaction():
+            store.put("syndromes", "a", 2)
+            store.put("syndromes", "b", 3)
+            raise ValueError("中止")
+    assert store.load("syndromes") == {"a": 1}
+
+
+def test_nested_transaction_commits_once(tmp_path):
+    """嵌套事务只在最外层结束时提交，其他连接在此之前看不到写入"""
+    store = SQLiteKnowledgeStore(str(tmp_path / "knowledge.db"))
+    reader = SQLiteKnowledgeStore(str(tmp_path / "knowledge.db"))
+    try:
+        with store.transaction():
+            with store.transaction():
+                store.put("syndromes", "a", 1)
+            assert reader.load("syndromes") == {}
+        assert reader.load("syndromes") == {"a": 1}
+    finally:
+        store.close()
+        reader.close()
+
+
+def test_sqlite_version_changes_on_other_connection_commit(tmp_path):
+    """其他连接提交后版本标记变化，本连接自身的写入不改变版本标记"""
+    store = SQLiteKnowledgeStore(str(tmp_path / "knowledge.db"))
+    writer = SQLiteKnowledgeStore(str(tmp_path / "knowledge.db"))
+    try:
+        version = store.version()
+        store.put("syndromes", "a", 1)
+        assert store.version() == version
+
+        writer.put("syndromes", "b", 2)
+        assert store.version() != version
+        assert store.load("syndromes") == {"a": 1, "b": 2}
+    finally:
+        store.close()
+        writer.close()
+
+
+def test_json_version_changes_after_write(tmp_path):
+    """JSON存储写入文件后版本标记变化"""
+    store = JSONKnowledgeStore(str(tmp_path))
+    version = store.version()
+    store.put("syndromes", "a", 1)
+    assert store.version() != version
+    assert JSONKnowledgeStore(str(tmp_path)).load("syndromes") == {"a": 1}
+
+
+class _FailingCommitConnection:
+    """COMMIT时抛出SQLITE_BUSY的连接包装"""
+    def __init__(self, conn):
+        self._conn = conn
+        self.fail_commit = True
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT" and self.fail_commit:
+            raise sqlite3.OperationalError("database is locked")
+        return self._conn.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def test_sqlite_commit_failure_rolls_back(tmp_path):
+    """提交失败时回滚并退出事务，连接可以继续使用"""
+    store = SQLiteKnowledgeStore(str(tmp_path / "knowledge.db"))
+    connection = _FailingCommitConnection(store._conn)
+    store._conn = connection
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            store.put("syndromes", "a", 1)
+        assert store._depth == 0
+        assert not connection.in_transaction
+        assert store.load("syndromes") == {}
+
+        connection.fail_commit = False
+        store.put("syndromes", "b", 2)
+        assert store.load("syndromes") == {"b": 2}
+    finally:
+        store.close()
+
+
+def test_unknown_engine():
+    """未知的存储引擎"""
+    with pytest.raises(ValueError):
+        create_knowledge_store(".", "redis")
+
+
+def test_store_is_abstract():
+    """存储引擎基类不能直接实例化"""
+    with pytest.raises(TypeError):
+        KnowledgeStore()
@@ -0,0 +1,104 @@
+"""
+症状-综合征CSR关联矩阵单元测试，打分和选择结果与逐个综合征计算的结果对照
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from clp_agents.syndrome_index import SyndromeIndex
+
+
+def _random_catalog(seed, num_syndromes=200, num_symptoms=60):
+    """生成随机综合征目录和症状映射"""
+    rng = random.Random(seed)
+    symptoms = [f"症状{i}" for i in range(num_symptoms)]
+    syndrome_data = {}
+    symptom_mapping = {symptom: [] for symptom in symptoms}
+    for i in range(num_syndromes):
+        syndrome_id = f"syndrome_{i}"
+        chosen = rng.sample(symptoms, rng.randint(1, 8))
+        syndrome_data[syndrome_id] = {"name": syndrome_id, "symptoms": chosen}
+        for symptom in chosen:
+            symptom_mapping[symptom].append(syndrome_id)
+    return syndrome_data, symptom_mapping, symptoms
+
+
+def _brute_force(syndrome_data, symptoms):
+    """逐个综合征计算(综合征ID, 匹配症状数, 症状总数, 匹配度)，按匹配度降序、录入顺序排序"""
+    patient = set(symptoms)
+    results = []
+    for syndrome_id, info in syndrome_data.items():
+        matched = len(patient & set(info["symptoms"]))
+        if matched:
+            total = len(info["symptoms"])
+            results.append((syndrome_id, matched, total, matched * 100.0 / total))
+    order = {syndrome_id: i for i, syndrome_id in enumerate(syndrome_data)}
+    results.sort(key=lambda item: (-item[3], order[item[0]]))
+    return results
+
+
+def test_match_counts_small():
+    """重复症状、未知症状和映射中重复的综合征只计一次"""
+    syndrome_data = {
+        "a": {"symptoms": ["唇裂", "腭裂"]},
+        "b": {"symptoms": ["腭裂", "小颌", "耳聋"]},
+    }
+    symptom_mapping = {"唇裂": ["a"], "腭裂": ["a", "b", "b"], "小颌": ["b", "unknown"], "耳聋": ["b"]}
+    index = SyndromeIndex.build(syndrome_data, symptom_mapping)
+
+    assert index.match_counts(["腭裂", "腭裂", "小颌", "发热"]).tolist() == [1, 2]
+    assert index.match_counts([]).tolist() == [0, 0]
+    assert index.top_k(index.match_counts(["腭裂", "小颌"])) == [
+        ("b", 2, 3, pytest.approx(200 / 3)),
+        ("a", 1, 2, 50.0),
+    ]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_select_matches_brute_force(seed):
+    """完整排序、前k个和批量打分与逐个计算一致"""
+    syndrome_data, symptom_mapping, symptoms = _random_catalog(seed)
+    index = SyndromeIndex.build(syndrome_data, symptom_mapping)
+    rng = random.Random(seed + 100)
+    patients = [rng.sample(symptoms, rng.randint(0, 6)) for _ in range(20)]
+
+    batch = index.match_counts_batch(patients)
+    for row, patient in enumerate(patients):
+        counts = index.match_counts(patient)
+        np.testing.assert_array_equal(batch[row], counts)
+
+        expected = _brute_force(syndrome_data, patient)
+        assert index.select(counts) == expected
+        for k in (1, 3, 10):
+            assert index.select(counts, k) == expected[:k]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_select_paging_and_min_score(seed):
+    """按上一页末尾分页拼接的结果与完整排序一致，匹配度下限包含边界"""
+    syndrome_data, symptom_mapping, symptoms = _random_catalog(seed, num_syndromes=300, num_symptoms=20)
+    index = SyndromeIndex.build(syndrome_data, symptom_mapping)
+    counts = index.match_counts(symptoms[:8])
+    expected = index.select(counts)
+
+    pages, after = [], None
+    while True:
+        page = index.select(counts, 7, after=after)
+        if not page:
+            break
+        pages.extend(page)
+        last = page[-1]
+        after = (last[3], index.syndrome_pos[last[0]])
+    assert pages == expected
+
+    threshold = expected[len(expected) // 2][3]
+    assert index.select(counts, min_score=threshold) == [item for item in expected if item[3] >= threshold]
+
+
+def test_empty_index():
+    """空目录"""
+    index = SyndromeIndex.build({}, {"唇裂": ["a"]})
+    assert index.match_counts(["唇裂"]).tolist() == []
+    assert index.select(index.match_counts(["唇裂"]), 5) == []